@@ -28,10 +28,16 @@ Copyright: Ian Vermes 2019
 """
 import exceptions
 import helpers.paragraphs as paragraphs
+import helpers.pipeline as pipeline
+import helpers.runs as runs
+import helpers.shards as shards
+import helpers.xml as xml
 from helpers.argparse import RecomposeArgParser
-from helpers.xml import XMLAsInput
 import helpers.logging as pkg_logging
 
+import os
+from collections import Counter
+
 
 class _TestingPrimitive():
     """This class is used by the package's test suit for initial validation."""
@@ -48,20 +54,157 @@ class _TestingPrimitive():
         raise package_base_eror
 
 
-def main(input_filename, output_filename):
-    """Entry point."""
-    input = XMLAsInput()
+def main(input_filename, output_filename, sidecar=False, backend="auto",
+         classify=False, max_memory=None, accept_changes=False,
+         verdict_cache=None):
+    """Entry point.
+
+    Kwargs:
+        sidecar(bool): False by default, otherwise reuse or write a sidecar
+            file of the extracted runs next to the input file.
+        backend(str): 'auto' by default, selects one by the input size and
+            max_memory, see runs.select_backend, otherwise see runs.extract.
+        classify(bool): False by default, otherwise only process paragraphs
+            classified as entries, see paragraphs.process_paragraphs.
+        max_memory(int, None): Memory budget in bytes of the 'auto' backend,
+            None for no budget.
+        accept_changes(bool): False by default, otherwise tracked changes
+            are accepted as the input is read instead of rejected.
+        verdict_cache(str, None): None by default, otherwise the filename of
+            a cache of input file verdicts, see xml.VerdictCache.
+    """
+    logger = pkg_logging.getLogger()
+    if backend == runs.AUTO:
+        backend, reason = runs.select_backend(input_filename, max_memory)
+        logger.info(f"Backend '{backend}' selected: {reason}.")
+    else:
+        logger.info(f"Backend '{backend}' requested.")
+    if verdict_cache is not None:
+        verdict_cache = xml.VerdictCache(verdict_cache)
     try:
-        input.isSuitable(input_filename, fatal=True)
+        paragraph_runs = runs.extract(input_filename, use_sidecar=sidecar,
+                                      backend=backend,
+                                      accept_changes=accept_changes,
+                                      verdict_cache=verdict_cache)
     except exceptions.InputFileError as err:
         raise exceptions.RecomposeExit(exception=err) from None
+    paragraphs.process_paragraphs(paragraph_runs, classify=classify)
     # TODO - placeholder for the XML writer component
     with open(output_filename, "w") as handle:
         handle.write("foo")
     return
 
 
-def main_wrapper(log_filename=None, log_level=None, **kwargs):
+def aconvert(input_filename, executor=None, accept_changes=False):
+    """Entry point of services: async iterator of the paragraph Records.
+
+    For example, in a coroutine: async for record in aconvert(filename).
+    Reading, processing and the consumer of the Records overlap, with
+    bounded queues in between, see pipeline.aconvert.
+
+    Kwargs:
+        executor(concurrent.futures.Executor, None): None by default, the
+            default executor of the event loop.
+        accept_changes(bool): False by default, see main.
+    """
+    return pipeline.aconvert(input_filename, executor=executor,
+                             accept_changes=accept_changes)
+
+
+def triage(paths, workers=None):
+    """Entry point that prints the verdict of many input files.
+
+    Directories are searched for .xml files, see xml.triage_files.
+
+    Kwarg:
+        workers(int, None): Number of worker processes, by default the number
+            of CPUs.
+    Returns:
+        Counter of the verdicts.
+    """
+    logger = pkg_logging.getLogger()
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            filenames.extend(sorted(os.path.join(path, name)
+                                    for name in os.listdir(path)
+                                    if name.lower().endswith(".xml")))
+        else:
+            filenames.append(path)
+    counts = Counter()
+    for filename, verdict in xml.triage_files(filenames, workers):
+        counts[verdict] += 1
+        logger.info(f"Triage {verdict}: {filename}")
+        print(f"{verdict:<12} {filename}")
+    summary = ", ".join(f"{counts[v]} {v}" for v in xml.TRIAGE_VERDICTS)
+    logger.info(f"Triage of {len(filenames)} files: {summary}.")
+    return counts
+
+
+def shard(input_filename, workdir, units=None, manifest=False,
+          accept_changes=False):
+    """Entry point that splits the conversion into independent work units.
+
+    The units are written to workdir, to be run on any host that shares its
+    filesystem, see run_shard, then merged, see merge.
+
+    Kwargs:
+        units(int, None): Most work units, by default the number of CPUs.
+        manifest(bool): False by default, the paragraphs of one huge input
+            file are split, otherwise the input is a manifest of input
+            files, one per line, which are split, see shards.read_manifest.
+        accept_changes(bool): False by default, see main.
+    Returns:
+        list of the unit filenames.
+    """
+    logger = pkg_logging.getLogger()
+    if units is None:
+        units = os.cpu_count() or 1
+    try:
+        if manifest:
+            filenames = shards.read_manifest(input_filename)
+            unit_filenames = shards.shard_manifest(filenames, workdir, units,
+                                                   accept_changes)
+        else:
+            unit_filenames = shards.shard_file(input_filename, workdir,
+                                               units,
+                                               accept_changes=accept_changes)
+    except exceptions.InputFileError as err:
+        raise exceptions.RecomposeExit(exception=err) from None
+    logger.info(f"Shard of {len(unit_filenames)} units in '{workdir}'.")
+    for unit_filename in unit_filenames:
+        print(unit_filename)
+    return unit_filenames
+
+
+def run_shard(unit_filename):
+    """Entry point that runs one work unit of a shard, on any host."""
+    try:
+        return shards.run_unit(unit_filename)
+    except exceptions.ShardError as err:
+        raise exceptions.RecomposeExit(exception=err) from None
+
+
+def merge(workdir):
+    """Entry point that merges the work units of a shard once all are run.
+
+    Writes 'merged.jsonl' and 'merged.report.json' to workdir, see
+    shards.merge_units.
+    """
+    logger = pkg_logging.getLogger()
+    try:
+        filenames = shards.merge_units(workdir)
+    except exceptions.ShardError as err:
+        raise exceptions.RecomposeExit(exception=err) from None
+    logger.info(f"Merged the shard of '{workdir}'.")
+    for filename in filenames:
+        print(filename)
+    return filenames
+
+
+def main_wrapper(log_filename=None, log_level=None, check_only=None,
+                 shard_dir=None, units=None, manifest=False, shard_unit=None,
+                 merge_dir=None, **kwargs):
     """Entry point with logging tidyed as necessary."""
     if log_filename:
         suppress = False
@@ -74,7 +217,17 @@ def main_wrapper(log_filename=None, log_level=None, **kwargs):
         logger = pkg_logging.getLogger()
         log_level_actual = pkg_logging.get_current_logging_level_by_name()
         logger.info(f"Logging level set at {log_level_actual}.")
-        main(**kwargs)
+        if check_only:
+            triage(check_only)
+        elif shard_dir:
+            shard(kwargs["input_filename"], shard_dir, units, manifest,
+                  kwargs.get("accept_changes", False))
+        elif shard_unit:
+            run_shard(shard_unit)
+        elif merge_dir:
+            merge(merge_dir)
+        else:
+            main(**kwargs)
     finally:
         pkg_logging.finish_logging()
 
@@ -121,6 +121,14 @@ class __Coded():
         args = (first_arg, *args[1:])
         super().__init__(*args)
 
+    def __reduce__(self):
+        # The message is already formatted, e.g. when sent between processes.
+        return _unpickle_coded, (self.__class__, self.args)
+
+
+def _unpickle_coded(cls, args):
+    return cls.__new__(cls, *args)
+
 
 class _CodedErrors(__Coded, RecomposeError):
     _strcode = None
@@ -159,10 +167,25 @@ class LoggingSetupError(_CodedErrors):
     _strcode = "logging_setup"
 
 
+class SidecarError(_CodedErrors, ValueError):
+    """The sidecar file is not a readable cache of extracted runs."""
+    _strcode = "sidecar_invalid"
+
+
+class ShardError(_CodedErrors, ValueError):
+    """A work unit is missing, incomplete or out of date."""
+    _strcode = "shard_invalid"
+
+
 class PreProcessedValueError(_CodedErrors, ValueError):
     """If the class is initialised with the wrong element."""
     _strcode = "preprocessed_init"
 
+
+class ProcessorEmptyStringError(_CodedErrors, ValueError):
+    """If a Processor is given an empty string."""
+    _strcode = "processor_empty_string"
+
 class ParagraphItalicPatternWarning(_CodedWarning):
     """Paragraph lacks the normal non-italic, italic, not-italic pattern."""
     _strcode = "preprocessed_italic_pattern"
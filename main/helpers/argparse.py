@@ -55,11 +55,29 @@ class RecomposeArgParser(object):
         else:
             return return_obj
 
+    @staticmethod
+    def to_bytes(size):
+        """Convert a size such as '512M' or '2G' to a number of bytes."""
+        units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+        text = size.strip().upper().rstrip("B")
+        factor = units.get(text[-1:], 1)
+        if factor != 1:
+            text = text[:-1]
+        try:
+            number = float(text)
+        except ValueError:
+            number = -1
+        if number <= 0:
+            msg = (f"Expected a size such as '512M' or '2G', got '{size}'.")
+            raise argparse.ArgumentTypeError(msg)
+        return int(number * factor)
+
     def _make_parser(self):
         desc = ("Read a Microsoft Word XML and produce a books-received "
                 "XML as output.")
         parser = argparse.ArgumentParser(description=desc)
         parser.add_argument("input_filename",
+                            nargs='?',
                             metavar="XML",
                             type=lambda x: self.is_file(x),
                             help="The xml file to process.")
@@ -86,6 +104,127 @@ class RecomposeArgParser(object):
                                   "Optionally one can specify the log file "
                                   "location.")
         )
+        parser.add_argument('--check-only',
+                            dest="check_only",
+                            nargs='+',
+                            metavar="PATH",
+                            type=lambda x: (x if os.path.isdir(x)
+                                            else self.is_file(x)),
+                            default=None,
+                            help=("Only report whether each XML file, or "
+                                  "each .xml file in a directory, is "
+                                  "suitable, unsuitable or has 'Track "
+                                  "Changes'. Files are screened in parallel "
+                                  "with a quick streaming check, no output "
+                                  "file is made.")
+        )
+        parser.add_argument('--shard',
+                            dest="shard_dir",
+                            metavar="WORKDIR",
+                            type=str,
+                            default=None,
+                            help=("Split the conversion of the XML, or of "
+                                  "the files of a manifest with --manifest, "
+                                  "into independent work units in WORKDIR, "
+                                  "a directory that every host can reach. "
+                                  "Run each unit with --run-shard, on any "
+                                  "host, then --merge them.")
+        )
+        parser.add_argument('--units',
+                            dest="units",
+                            metavar="N",
+                            type=int,
+                            default=None,
+                            help=("Most work units of --shard, by default "
+                                  "the number of CPUs of this host.")
+        )
+        parser.add_argument('--manifest',
+                            dest="manifest",
+                            action="store_true",
+                            help=("The input of --shard is a manifest of XML "
+                                  "files, one per line, rather than one XML "
+                                  "whose paragraphs are split.")
+        )
+        parser.add_argument('--run-shard',
+                            dest="shard_unit",
+                            metavar="UNIT",
+                            type=lambda x: self.is_file(x),
+                            default=None,
+                            help=("Run one work unit made by --shard and "
+                                  "write its partial output and report next "
+                                  "to it.")
+        )
+        parser.add_argument('--merge',
+                            dest="merge_dir",
+                            metavar="WORKDIR",
+                            type=str,
+                            default=None,
+                            help=("Merge the partial outputs and reports of "
+                                  "the work units in WORKDIR, once all are "
+                                  "run, into 'merged.jsonl' and "
+                                  "'merged.report.json' in WORKDIR.")
+        )
+        parser.add_argument('--sidecar',
+                            dest="sidecar",
+                            action="store_true",
+                            help=("Cache the runs extracted from the XML in a "
+                                  "binary sidecar file next to it. Later runs "
+                                  "reuse the sidecar while the XML is "
+                                  "unchanged and skip parsing altogether.")
+        )
+        parser.add_argument('--backend',
+                            dest="backend",
+                            choices=["auto", "tree", "events", "xslt",
+                                     "chunks"],
+                            default="auto",
+                            help=("How runs are extracted from the XML: "
+                                  "'tree' queries a parsed tree, 'events' "
+                                  "collects them while parsing without "
+                                  "building a tree, 'xslt' transforms a "
+                                  "parsed tree with a stylesheet, 'chunks' "
+                                  "parses chunks of the document body in "
+                                  "parallel processes. Default is 'auto', "
+                                  "which picks one by the size of the XML "
+                                  "and the memory budget.")
+        )
+        parser.add_argument('--max-memory',
+                            dest="max_memory",
+                            metavar="SIZE",
+                            type=lambda x: self.to_bytes(x),
+                            default=None,
+                            help=("Memory budget of the 'auto' backend, such "
+                                  "as '512M' or '2G'. A backend that is "
+                                  "estimated to need more is not picked, "
+                                  "by default there is no budget.")
+        )
+        parser.add_argument('--accept-changes',
+                            dest="accept_changes",
+                            action="store_true",
+                            help=("Accept all tracked changes as the XML is "
+                                  "read, rather than reject an XML with "
+                                  "unaccepted 'Track Changes'. Deleted text "
+                                  "is dropped and inserted text is kept.")
+        )
+        parser.add_argument('--verdict-cache',
+                            dest="verdict_cache",
+                            metavar="CACHE",
+                            type=str,
+                            default=None,
+                            help=("Keep the suitability verdicts of XML "
+                                  "files in this JSON file. An unchanged XML "
+                                  "skips the suitability checks and one that "
+                                  "was rejected is rejected again without "
+                                  "being read.")
+        )
+        parser.add_argument('--classify',
+                            dest="classify",
+                            action="store_true",
+                            help=("Only process the paragraphs that a cheap "
+                                  "classifier takes for entries, rather than "
+                                  "every paragraph with italics. Headings, "
+                                  "blanks and suspicious paragraphs are "
+                                  "skipped with a warning.")
+        )
         parser.add_argument('--level',
                             dest="log_level",
                             metavar="MODE",
@@ -101,4 +240,7 @@ class RecomposeArgParser(object):
     def get_args(self):
         parser = self._make_parser()
         args = parser.parse_args()
+        if (args.input_filename is None and not args.check_only
+                and not args.shard_unit and not args.merge_dir):
+            parser.error("the following arguments are required: XML")
         return args
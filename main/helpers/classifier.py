@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Cheap classification of paragraphs before their full processing.
+
+Labels are ENTRY, HEADING, BLANK or SUSPICIOUS, only entries are worth the
+italic analysis of PreProcessed and the Processors.
+
+Other funcs:
+    classify
+    classify_paragraphs
+
+Copyright: Ian Vermes 2019
+"""
+
+from helpers.runs import Runs, runs_from_element
+from helpers import paragraphs as pkg_paragraphs
+
+from lxml import etree
+
+import re
+import functools
+from collections import Counter
+
+ENTRY = "entry"
+HEADING = "heading"
+BLANK = "blank"
+SUSPICIOUS = "suspicious"
+LABELS = (ENTRY, HEADING, BLANK, SUSPICIOUS)
+
+# Longest text of an unstyled paragraph still taken for a heading.
+HEADING_MAXLENGTH = 80
+
+_RGX_HEADING_STYLE = re.compile(r"(?:heading|title|subtitle|toc)", re.I)
+_RGX_ISBN = re.compile(r"isbn|97[89][\s-]?(?:\d[\s-]?){9}\d", re.I)
+
+
+def classify(paragraph, paragraph_style=None):
+    """Label a paragraph from cheap signals, without any italic analysis.
+
+    The signals are the text, the number of runs, the formatting of the
+    first run with text, the paragraph style and ISBN or price digits.
+
+    Arg:
+        paragraph(Runs, etree._Element): A w:p element or its Runs.
+    Kwarg:
+        paragraph_style(str, None): None by default, otherwise it is used
+            instead of the w:pStyle of the paragraph, see Runs.style.
+
+    >>> classify(Runs([(False, False, "Ilan, Tal, "),
+    ...                (True, False, "Lexicon of Jewish Names. "),
+    ...                (False, False, "Mohr Siebeck, 2018. €174.00.")]))
+    'entry'
+    >>> classify(Runs([(True, False, "Biblical Studies")]))
+    'heading'
+    """
+    if isinstance(paragraph, etree._Element):
+        paragraph = runs_from_element(paragraph)
+    elif not isinstance(paragraph, Runs):
+        msg = f"Arg is not Runs or etree._Element type but {type(paragraph)}."
+        raise TypeError(msg)
+    if paragraph_style is None:
+        paragraph_style = paragraph.style
+
+    text = paragraph.text
+    if not text.strip():
+        return BLANK
+    elif (paragraph_style is not None
+          and _RGX_HEADING_STYLE.match(paragraph_style)):
+        return HEADING
+    has_digits = bool(_RGX_ISBN.search(text) or _rgx_price().search(text))
+    first = next(run for run in paragraph if run.text.strip())
+    # Entries open with non-italic authors, then italic and non-italic text.
+    if len(paragraph) > 1 and not first.italic and any(paragraph.pattern):
+        return ENTRY if has_digits else SUSPICIOUS
+    elif not has_digits and len(text) <= HEADING_MAXLENGTH:
+        return HEADING
+    else:
+        return SUSPICIOUS
+
+
+def classify_paragraphs(paragraphs, counts=None):
+    """Yield the label and paragraph of every paragraph.
+
+    Kwarg:
+        counts(Counter, None): None by default, otherwise it is updated with
+            the number of paragraphs of each label.
+    """
+    if counts is None:
+        counts = Counter()
+    for paragraph in paragraphs:
+        label = classify(paragraph)
+        counts[label] += 1
+        yield label, paragraph
+
+
+@functools.lru_cache(maxsize=None)
+def _rgx_price():
+    # Made on first use, as helpers.paragraphs imports this module.
+    currencies = re.escape(pkg_paragraphs.CURRENCIES)
+    return re.compile(rf"[{currencies}]\s?\d")
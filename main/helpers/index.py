@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Random access to the paragraphs of an input file.
+
+IndexEntry - namedtuple of the byte range and w14:paraId of a w:p.
+ParagraphIndex - class that writes and reads a binary index of the byte
+    range and w14:paraId of every w:p of the document body.
+
+Other funcs:
+    scan_paragraphs
+
+Copyright: Ian Vermes 2019
+"""
+
+from helpers.runs import SidecarHeader
+from helpers.xml import ParagraphSelector, open_buffer, find_body
+import exceptions
+
+from lxml import etree
+
+import os
+import re
+import struct
+import itertools
+from collections import namedtuple
+
+
+IndexEntry = namedtuple("IndexEntry", "offset length para_id")
+
+_RGX_PARAGRAPH_TAG = re.compile(rb"<(/?)w:p(?=[\s/>])[^>]*?(/?)>")
+_RGX_PARA_ID = re.compile(rb"\sw14:paraId=\"([0-9A-Fa-f]{1,8})\"")
+
+
+def scan_paragraphs(buffer, start, end):
+    """Byte range and w14:paraId of every w:p between start and end.
+
+    The w:p tags are found by byte scanning, in document order of their start
+    tags, hence nested paragraphs come after the paragraph around them.
+
+    Returns:
+        list of IndexEntry, para_id is 8 upper case hex digits or None.
+
+    >>> scan_paragraphs(b'<w:p w14:paraId="1a2b"><w:r/></w:p><w:p/>', 0, 41)
+    [IndexEntry(offset=0, length=35, para_id='00001A2B'), \
+IndexEntry(offset=35, length=6, para_id=None)]
+    """
+    entries = []
+    open_slots = []
+    for match in _RGX_PARAGRAPH_TAG.finditer(buffer, start, end):
+        closing, empty = match.groups()
+        if closing:
+            if open_slots:
+                slot = open_slots.pop()
+                offset, _, para_id = entries[slot]
+                entries[slot] = IndexEntry(offset, match.end() - offset,
+                                           para_id)
+            continue
+        para_id = _RGX_PARA_ID.search(match.group())
+        if para_id is not None:
+            para_id = para_id.group(1).decode("ascii").upper().zfill(8)
+        entries.append(IndexEntry(match.start(), match.end() - match.start(),
+                                  para_id))
+        if not empty:
+            open_slots.append(len(entries) - 1)
+    return entries
+
+
+class ParagraphIndex(object):
+    """Index file of the paragraphs of the document body of an input file.
+
+    The index is built in one pass of byte scanning and records the offset,
+    length and w14:paraId of every w:p, in the same order as
+    ParagraphSelector.iter_all, with the start and end tags around the body
+    content. A paragraph is then read and parsed by itself, so random access
+    costs about the size of the paragraph rather than that of the document.
+    The file is not checked for suitability, see XMLAsInput.
+
+    The header is a SidecarHeader. As the entries are byte offsets, the
+    paragraphs are only read while the source corresponds to the stamp of
+    the built or loaded index, otherwise SidecarError is raised.
+
+    Arg:
+        source(str): Input filename.
+    Kwarg:
+        filename(str, None): Index filename, by default the source filename
+            with the SUFFIX appended.
+    Methods:
+        isValid
+        build
+        load
+        dump
+        update
+        iter_paragraphs
+        find
+    Attr:
+        entries(list): IndexEntry of every paragraph.
+    """
+
+    SUFFIX = ".pidx"
+    MAGIC = b"RCPI"
+    VERSION = 1
+    _HEADER = SidecarHeader(MAGIC, VERSION)
+    _WRAPPER = struct.Struct("<II")
+    _ENTRY = struct.Struct("<QII")
+    _NO_PARA_ID = 0xFFFFFFFF  # w14:paraId values are below 0x80000000.
+
+    def __init__(self, source, filename=None):
+        self.source = source
+        if filename is None:
+            filename = source + self.SUFFIX
+        self.filename = filename
+        self.entries = []
+        self._head = self._tail = b""
+        self._para_ids = None
+        self._stamp = None  # Of the source as scanned.
+
+    def __len__(self):
+        return len(self.entries)
+
+    def isValid(self):
+        """Boolean check: does the index still correspond to the source?"""
+        header = self._HEADER.read(self.filename)
+        if header is None:
+            return False
+        stamp, _ = header
+        return self._HEADER.current(stamp, self.source) is not None
+
+    def _check_source(self):
+        # Raises unless the source is still as it was scanned.
+        stamp = None
+        if self._stamp is not None:
+            stamp = self._HEADER.current(self._stamp, self.source)
+        if stamp is None:
+            raise exceptions.SidecarError(detail=self.filename)
+        self._stamp = stamp
+
+    def build(self):
+        """Scan the source file for the paragraphs, returns self.
+
+        Exceptions:
+            InputFileError: if the file has no document body.
+        """
+        # The digest is left to dump, it costs another pass of the file.
+        stamp = self._HEADER.stamp(self.source, digest=False)
+        with open_buffer(self.source) as buffer:
+            span = find_body(buffer)
+            if span is None:
+                detail = os.path.basename(self.source)
+                raise exceptions.InputFileError(detail=detail)
+            self.entries = scan_paragraphs(buffer, span.start, span.end)
+        self._head, self._tail = span.head, span.tail
+        self._para_ids = None
+        self._stamp = stamp
+        return self
+
+    def dump(self):
+        """Write the built or loaded index to the index file.
+
+        Exceptions:
+            SidecarError: if the source changed since the index was built.
+        """
+        self._check_source()
+        size, mtime_ns, digest = self._stamp
+        if digest is None:
+            digest = self._HEADER.stamp(self.source)[2]
+            self._stamp = size, mtime_ns, digest
+        chunks = [self._HEADER.pack(self._stamp, len(self.entries)),
+                  self._WRAPPER.pack(len(self._head), len(self._tail)),
+                  self._head, self._tail]
+        for offset, length, para_id in self.entries:
+            para_id = self._NO_PARA_ID if para_id is None else int(para_id, 16)
+            chunks.append(self._ENTRY.pack(offset, length, para_id))
+        # Write then rename so that readers never see a partial index.
+        partial = self.filename + ".partial"
+        with open(partial, "wb") as handle:
+            handle.write(b"".join(chunks))
+        os.replace(partial, self.filename)
+
+    def load(self):
+        """Read the index file, returns self."""
+        with open(self.filename, "rb") as handle:
+            data = handle.read()
+        header = self._HEADER.unpack(data)
+        if header is None:
+            raise exceptions.SidecarError(detail=self.filename)
+        stamp, count = header
+        offset = self._HEADER.size
+        head_length, tail_length = self._WRAPPER.unpack_from(data, offset)
+        offset += self._WRAPPER.size
+        self._head = data[offset:offset + head_length]
+        offset += head_length
+        self._tail = data[offset:offset + tail_length]
+        offset += tail_length
+        entries = []
+        for start, length, para_id in self._ENTRY.iter_unpack(
+                data[offset:offset + count * self._ENTRY.size]):
+            para_id = None if para_id == self._NO_PARA_ID else f"{para_id:08X}"
+            entries.append(IndexEntry(start, length, para_id))
+        if len(entries) != count:
+            raise exceptions.SidecarError(detail=self.filename)
+        self.entries = entries
+        self._para_ids = None
+        self._stamp = stamp
+        return self
+
+    def update(self):
+        """Load the index file if valid, otherwise build and dump it."""
+        if self.isValid():
+            return self.load()
+        self.build()
+        self.dump()
+        return self
+
+    def iter_paragraphs(self, start=None, stop=None):
+        """Yield the w:p elements of entries[start:stop].
+
+        Each w:p is parsed by itself, within the start tags around the body
+        content, and has no following siblings.
+
+        Exceptions:
+            SidecarError: if the source changed since the index was built or
+                loaded.
+        """
+        self._check_source()
+        selector = ParagraphSelector()
+        with open(self.source, "rb") as handle:
+            for offset, length, _ in itertools.islice(self.entries, start,
+                                                      stop):
+                handle.seek(offset)
+                root = etree.fromstring(self._head + handle.read(length)
+                                        + self._tail)
+                yield selector.find_body(root)[0]
+
+    def find(self, para_id):
+        """Get the w:p element with a w14:paraId.
+
+        Exceptions:
+            KeyError: if no paragraph has the w14:paraId.
+            SidecarError: see iter_paragraphs.
+        """
+        if self._para_ids is None:
+            self._para_ids = {}
+            for i, entry in enumerate(self.entries):
+                if entry.para_id is not None:
+                    self._para_ids.setdefault(entry.para_id, i)
+        i = self._para_ids[para_id.upper().zfill(8)]
+        return next(self.iter_paragraphs(i, i + 1))
@@ -2,19 +2,33 @@
 # -*- coding: utf8 -*-
 """Various paragraph processing classes for Recompose.
 
+DocumentContext - class that holds the XPaths of the paragraphs of a document.
 PreProcessed - class that converts a paragraph element into 3 major substrings.
 PostProcessed - class that validates and extracts data from a preprocessed obj.
 
 Other classes/funcs:
     get_paragraph_head
     process_paragraphs
+    ParagraphRecord
+    chain_stages
+    select_paragraphs
+    extract_runs
+    classify_records
+    process_records
+    validate_records
+    serialize_records
+    memo_info
+    clear_memo
 
 Copyright: Ian Vermes 2019
 """
 
 import exceptions
 from helpers.strformat import makeItalic
+from helpers.runs import Runs, coalesce_element, runs_from_element
+from helpers.styles import StyleIndex
 from helpers import xml
+from helpers import classifier
 from helpers import logging as pkg_logging
 
 from lxml import etree
@@ -22,10 +36,85 @@ from lxml import etree
 import itertools
 import re
 import abc
+import inspect
+import os
+import threading
+import concurrent.futures
 import operator
 import textwrap
+import functools
+import contextlib
+import bisect
+import json
+from collections import namedtuple, Counter
 from functools import partial
 
+MEMO_MAXSIZE = 4096
+EXECUTION_MODES = ("serial", "thread", "process")
+CURRENCIES = "$£€₪"  # Currency symbols of a price.
+MemoInfo = namedtuple("MemoInfo", "hits misses maxsize currsize hit_rate")
+AuthorTokens = namedtuple("AuthorTokens", ("commas commaspaces oxford_commas "
+                                           "oxford_ands bare_ands editors "
+                                           "positional_editor names "
+                                           "longest_name"))
+TitleScan = namedtuple("TitleScan", ("ends_with_punctuation is_series title "
+                                     "series has_vol fullstops first_fullstop "
+                                     "first_colon first_volume_digits "
+                                     "series_colons series_volume_digits "
+                                     "series_volume"))
+ParagraphRecord = namedtuple("ParagraphRecord",
+                             ("number paragraph styles runs label "
+                              "preprocessed postprocessed valid error"),
+                             defaults=(None,) * 7)
+# ProcessorMeta is not complete yet, hence its fields are not validated.
+VALIDATED_FIELDS = ("authors", "editors", "title", "series")
+_MEMOIZED = {}
+
+
+def _memoize(name, copy=None, maxsize=MEMO_MAXSIZE):
+    """Decorator: bounded LRU memoization keyed by the (string) args.
+
+    Args:
+        name(str): Key of the statistics in memo_info.
+    Kwargs:
+        copy(callable): Applied to every returned value so callers can not
+            mutate the memoized one.
+    """
+    def decorator(func):
+        cached = functools.lru_cache(maxsize=maxsize)(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = cached(*args, **kwargs)
+            return result if copy is None else copy(result)
+
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        _MEMOIZED[name] = wrapper
+        return wrapper
+    return decorator
+
+
+def memo_info():
+    """Return the statistics of every memoized method as MemoInfo by name."""
+    result = {}
+    for name, func in _MEMOIZED.items():
+        hits, misses, maxsize, currsize = func.cache_info()
+        calls = hits + misses
+        hit_rate = hits / calls if calls else 0.0
+        result[name] = MemoInfo(hits, misses, maxsize, currsize, hit_rate)
+    return result
+
+
+def clear_memo():
+    """Empty every memoized method, e.g. after the Processor rules change."""
+    for func in _MEMOIZED.values():
+        func.cache_clear()
+
+
+def _copy_validation_state(state):
+    return {k: (set(v) if isinstance(v, set) else v) for k, v in state.items()}
+
 
 class Processor(abc.ABC):
     """Abstract/base class for Processor subclasses."""
@@ -42,6 +131,7 @@ class Processor(abc.ABC):
     _WARNING_PLACEHOLDER = (1, "WARNING TO ADD TO EXCEPTION STRING")  # TODO
     _INVALID_PLACEHOLDER = (2, "DETAIL TO ADD TO EXCEPTION STRING")  # TODO
     _CONDITIONAL_METHOD = "_cond"
+    _fill_value = str  # Data attribute value of an invalid string.
 
     def __init__(self, source):
         self._oktype = PreProcessed
@@ -71,7 +161,8 @@ class Processor(abc.ABC):
                    "is not a string. Got: {type(raw_string)}")
             raise TypeError(msg) from None
         if not raw_string:
-            raise ValueError("Empty string.")
+            raise exceptions.ProcessorEmptyStringError(
+                detail=self._pre_attr_name)
         return raw_string
 
     @abc.abstractmethod
@@ -80,7 +171,7 @@ class Processor(abc.ABC):
         try:
             report = self._structure_report
         except AttributeError:
-            self._isValid()
+            self._validate()
             report = self._structure_report
         # TODO Perhaps a different method called reportValiditiy or
         # reportStructure could handle the underlying set of tuple results.
@@ -99,6 +190,32 @@ class Processor(abc.ABC):
     def _isValid(self):
         pass
 
+    @classmethod
+    def _get_conditions(cls):
+        # The conditional methods of each class are only looked up once.
+        names = cls.__dict__.get("_cached_conditions")
+        if names is None:
+            prefix = cls._CONDITIONAL_METHOD
+            names = tuple(n for n in dir(cls) if n.startswith(prefix))
+            cls._cached_conditions = names
+        return names
+
+    def _validate(self):
+        # Same attributes as self._isValid() sets, memoized by raw string.
+        state = self._validation_state(self.__class__, self._raw_string)
+        for attr, value in state.items():
+            super().__setattr__(attr, value)
+
+    @staticmethod
+    @_memoize("Processor._validation_state", copy=_copy_validation_state)
+    def _validation_state(cls, raw_string):
+        processor = object.__new__(cls)
+        processor._raw_string = raw_string
+        processor._isValid()
+        state = vars(processor)
+        del state["_raw_string"]
+        return state
+
     @abc.abstractmethod
     def _assign_values(self):
         pass
@@ -109,7 +226,7 @@ class Processor(abc.ABC):
         try:
             report = self._structure_report
         except AttributeError:
-            self._isValid()
+            self._validate()
             report = self._structure_report
         return results.union(report)
 
@@ -118,6 +235,86 @@ class Processor(abc.ABC):
     def split(cls, string):
         pass
 
+    _BATCH_SEPARATOR = "\x00"
+
+    @classmethod
+    def _batch_strings(cls, sources):
+        strings = []
+        for source in sources:
+            if isinstance(source, str):
+                string = source
+            else:
+                string = getattr(source, cls._pre_attr_name, None)
+                if not isinstance(string, str):
+                    msg = ("Batch members must be strings or have a string "
+                           f"attribute '{cls._pre_attr_name}'.")
+                    raise TypeError(msg)
+            if not string:
+                raise exceptions.ProcessorEmptyStringError(
+                    detail=cls._pre_attr_name)
+            strings.append(string)
+        return strings
+
+    @classmethod
+    def _batch_counts(cls, strings, tokens, lower=False):
+        """Count each token in every string in one joined buffer.
+
+        Each token is searched once across the whole batch and the matches
+        are binned by the start offsets of the strings. The counts are equal
+        to str.count as the separator is in neither the strings nor tokens.
+
+        Returns:
+            dict of token: list of counts, one per string.
+        """
+        separator = cls._BATCH_SEPARATOR
+        if lower:
+            # Lowercasing can change the length of a string, e.g. 'İ'.
+            strings = [string.lower() for string in strings]
+        buffer = separator.join(strings)
+        starts, offset = [], 0
+        for string in strings:
+            starts.append(offset)
+            offset += len(string) + len(separator)
+        result = dict()
+        for token in tokens:
+            positions = (m.start() for m in re.finditer(re.escape(token), buffer))
+            bins = Counter(bisect.bisect_right(starts, p) - 1 for p in positions)
+            result[token] = [bins[i] for i in range(len(strings))]
+        return result
+
+    @classmethod
+    def _batch_ambiguous(cls, strings):
+        # Subclasses flag strings whose features do not settle their values.
+        return [True] * len(strings)
+
+    @classmethod
+    def _batch_fill(cls, string):
+        # Data attribute values of an invalid string, as _assign_values sets.
+        return {attr: cls._fill_value() for attr in cls._data_attrs}
+
+    @classmethod
+    def batch(cls, sources):
+        """Process many strings (or PreProcessed objects) at once.
+
+        Cheap structural features are computed for the whole batch, strings
+        that they show to be invalid get the fill values directly and only
+        the others are processed one by one.
+
+        Returns:
+            list of dicts of the data attributes, one per source.
+        """
+        strings = cls._batch_strings(sources)
+        ambiguous = cls._batch_ambiguous(strings)
+        results = []
+        for string, flag in zip(strings, ambiguous):
+            if flag:
+                processor = cls(string)
+                values = {a: getattr(processor, a) for a in cls._data_attrs}
+            else:
+                values = cls._batch_fill(string)
+            results.append(values)
+        return results
+
 
 class ProcessorAuthors(Processor):
     """Processor for authorial data from a string or PreProcessed object.
@@ -138,11 +335,61 @@ class ProcessorAuthors(Processor):
     Class Methods:
         split
         strip_editor
+        tokenize
     """
     _pre_attr_name = "pre_italic"
     _data_attrs = set("authors editors".split())
+    _fill_value = list
+    _EDITOR_NOTATIONS = ("(ed.)", "(eds)")
+    _POSITIONAL_EDITORS = tuple(n + "," for n in _EDITOR_NOTATIONS)
+    _RGX_EDITOR_FUZZY = re.compile(r"([\(\ ][Ee][Dd][Ss\.]?)")
 
     @classmethod
+    @_memoize("ProcessorAuthors.tokenize")
+    def tokenize(cls, string):
+        """Gather the separators, names and editor notation of a string once.
+
+        Every condition and split read this (memoized) result instead of
+        scanning the string again. The counts are those of str.count for
+        ',', ', ', ', and' (ignoring case), ', and ', ' and ' and the editor
+        notation; names is the split of the string without joining the first
+        author, or None if it has fewer than two names, and longest_name the
+        length of the longest name once the first one is joined.
+
+        >>> tokens = ProcessorAuthors.tokenize("Roberts, Lilly-Ann, and J.R.R. Tolkein (eds),")
+        >>> tokens.commas, tokens.oxford_ands, tokens.editors, tokens.positional_editor
+        (3, 1, 1, True)
+        >>> tokens.names
+        ('Roberts', 'Lilly-Ann', 'J.R.R. Tolkein')
+        """
+        count = string.count
+        editors = sum(count(notation) for notation in cls._EDITOR_NOTATIONS)
+        positional = editors > 0 and (
+            string.endswith(cls._POSITIONAL_EDITORS)
+            or string[:-1].endswith(cls._POSITIONAL_EDITORS)
+            and string.endswith("\n"))
+        # Names of the string stripped of whitespace, the editor notation
+        # and then commas.
+        body = string.strip()
+        if editors and body.endswith(cls._POSITIONAL_EDITORS):
+            body = body[:-len(cls._POSITIONAL_EDITORS[0])]
+        body = body.strip().strip(cls._COMMA)
+        # Split an author after the oxford comma, if there is one.
+        other_auths, *last = body.rsplit(cls._OXFORDAND, maxsplit=1)
+        names = other_auths.split(cls._COMMASPACE) + last
+        if len(names) - len(last) >= 2:
+            names = tuple(names)
+            first = len(names[0]) + len(names[1]) + 1
+            longest = max(first, max(map(len, names[2:]), default=0))
+        else:
+            names = longest = None
+        return AuthorTokens(count(cls._COMMA), count(cls._COMMASPACE),
+                            string.lower().count(cls._OXFORDCOMMA),
+                            count(cls._OXFORDAND), count(" and "),
+                            editors, positional, names, longest)
+
+    @classmethod
+    @_memoize("ProcessorAuthors.strip_editor")
     def strip_editor(cls, string):
         """Strip the editorial notation from a string.
 
@@ -153,13 +400,17 @@ class ProcessorAuthors(Processor):
         >>> ProcessorAuthors.strip_editor(string)
         'Roberts, Lilly-Ann '
         """
-        base_editor_pattern = r"\(ed[\.s]\)"  # TODO CODE SMELL
-        pattern_is_positional_editor = rf"({base_editor_pattern}\,$)"
-        rgx_positional_editor = re.compile(pattern_is_positional_editor)
-        new_string = rgx_positional_editor.sub("", string)
+        if not cls.tokenize(string).positional_editor:
+            return string
+        length = len(cls._POSITIONAL_EDITORS[0])
+        if string.endswith("\n"):
+            new_string = string[:-length - 1] + "\n"
+        else:
+            new_string = string[:-length]
         return new_string
 
     @classmethod
+    @_memoize("ProcessorAuthors.split", copy=list)
     def split(cls, string, join_first=True):
         """Split a string with authors and editorial notations into a list.
 
@@ -175,27 +426,31 @@ class ProcessorAuthors(Processor):
         >>> ProcessorAuthors.split(string, join_first=False)
         [('Lilly-Ann', 'Roberts'), 'J.R.R. Tolkein']
         """
-        result = []
-        string = string.strip()
-        string = cls.strip_editor(string)
-        string = string.strip().strip(cls._COMMA)
-        # Split an author after the oxford comma, if there is one.
-        other_auths, *last = string.rsplit(cls._OXFORDAND, maxsplit=1)
-        # From the remainder split into firstauthor_name1, name2 and other auths
-        split_once = other_auths.split(cls._COMMASPACE, maxsplit=2)
-        first_surname, first_name, *other_auths = split_once
+        names = cls.tokenize(string).names
+        if names is None:
+            msg = "not enough values to unpack (expected at least 2, got 1)"
+            raise ValueError(msg)
+        first_surname, first_name, *other_auths = names
         # Process the first author
         first = first_name, first_surname
         if join_first:
             first = " ".join(first)
-        result.append(first)
-        # Process the remaining other_auths
-        if other_auths:
-            other_auths = other_auths.pop()
-            other_auths = other_auths.split(cls._COMMASPACE)
-        result = result + other_auths + last
+        result = [first] + other_auths
         return result
 
+    @classmethod
+    def _batch_ambiguous(cls, strings):
+        # Each feature mirrors a condition of _isValid that alone invalidates.
+        tokens = [cls._COMMA, cls._COMMASPACE, cls._OXFORDAND, " and "]
+        counts = cls._batch_counts(strings, tokens)
+        features = zip(strings, *(counts[t] for t in tokens))
+        return [commas >= 2
+                and string.endswith(cls._COMMA)
+                and commas - commaspaces == 1
+                and bare_ands == oxford_ands
+                for string, commas, commaspaces, oxford_ands, bare_ands
+                in features]
+
     def isValid(self):
         """Boolean check: does object pass validation?
 
@@ -213,9 +468,8 @@ class ProcessorAuthors(Processor):
 
         main_flag = self._maincond_count_commas()
         if main_flag:
-            prefix = self._CONDITIONAL_METHOD
-            cond_methods = [getattr(self, name) for name in dir(self)
-                            if name.startswith(prefix)]
+            cond_methods = [getattr(self, name)
+                            for name in self._get_conditions()]
             iter_bool = (m() for m in cond_methods)
             secondary_flag = all([b for b in iter_bool if b is not None])
             flag = secondary_flag and main_flag
@@ -254,7 +508,11 @@ class ProcessorAuthors(Processor):
                 self.editors = list()
         else:
             for attr in self._data_attrs:
-                super().__setattr__(attr, list())
+                super().__setattr__(attr, self._fill_value())
+
+    @property
+    def _tokens(self):
+        return self.tokenize(self._raw_string)
 
     def _maincond_count_commas(self):
         count_comma = self.__count_commas()
@@ -265,11 +523,11 @@ class ProcessorAuthors(Processor):
         return flag
 
     def __count_commas(self):
-        return self._raw_string.count(self._COMMA)
+        return self._tokens.commas
 
     def _cond_seperators_balance(self):
         count_comma = self.__count_commas()
-        count_commaspace = self._raw_string.count(self._COMMASPACE)
+        count_commaspace = self._tokens.commaspaces
         flag = count_comma - count_commaspace == 1
         # TODO injected error code/error detail is generic PLACEHOLDER
         if not flag:
@@ -278,8 +536,7 @@ class ProcessorAuthors(Processor):
 
     def _cond_ok_oxford_comma(self):
         if self.__count_commas() > 2:
-            string = self._raw_string.lower()
-            flag = string.count(self._OXFORDCOMMA) == 1
+            flag = self._tokens.oxford_commas == 1
             # TODO injected error code/error detail is generic PLACEHOLDER
             if not flag:
                 self._structure_report.add(self._INVALID_PLACEHOLDER)
@@ -296,17 +553,10 @@ class ProcessorAuthors(Processor):
         return flag
 
     def _cond_editors(self):
-        pattern_is_editor_fuzzy = r"([\(\ ][Ee][Dd][Ss\.]?)"
-        base_editor_pattern = r"\(ed[\.s]\)"
-        pattern_is_editor = f"({base_editor_pattern})"
-        pattern_is_positional_editor = rf"({base_editor_pattern}\,$)"
-        rgx_editor_fuzzy = re.compile(pattern_is_editor_fuzzy)
-        rgx_editor = re.compile(pattern_is_editor)
-        rgx_positional_editor = re.compile(pattern_is_positional_editor)  # TODO CODE SMELL
-
         string = self._raw_string
-        flag_position = rgx_positional_editor.search(string) is not None  # TODO CODE SMELL
-        flag_count_is_one = len(rgx_editor.findall(string)) == 1
+        tokens = self._tokens
+        flag_position = tokens.positional_editor
+        flag_count_is_one = tokens.editors == 1
         # Save calculation to assignment for isEditor to call.
         self._has_editors = flag_position and flag_count_is_one
         # Whether there is an editor pattern at the end or not does not rule out other
@@ -324,12 +574,12 @@ class ProcessorAuthors(Processor):
                 self._structure_report.add(self._INVALID_PLACEHOLDER)
                 return structurally_flawed
         elif not flag_position:
-            if rgx_editor.search(string) is not None:
+            if tokens.editors:
                 # TODO injected error code/error detail is generic PLACEHOLDER
                 ## Editor appears but not at end.
                 self._structure_report.add(self._INVALID_PLACEHOLDER)
                 return structurally_flawed
-            elif rgx_editor_fuzzy.search(string) is not None:
+            elif self._RGX_EDITOR_FUZZY.search(string) is not None:
                 # TODO injected error code/error detail is generic PLACEHOLDER
                 ## Something that looks like Editor appears.
                 self._structure_report.add(self._INVALID_PLACEHOLDER)
@@ -340,19 +590,18 @@ class ProcessorAuthors(Processor):
 
     def _cond_auth_length(self):
         sane_length = 40
-        authors = self.split(self._raw_string, join_first=True)
-        flags = [len(a) <= sane_length for a in authors]
-        flag = all(flags)
+        longest = self._tokens.longest_name
+        if longest is None:
+            self.split(self._raw_string)  # Raises ValueError, too few names.
+        flag = longest <= sane_length
         # TODO injected error code/error detail is generic PLACEHOLDER
         if not flag:
             self._structure_report.add(self._INVALID_PLACEHOLDER)
         return flag
 
     def _cond_rogue_and(self):
-        bare_and = " and "
-        oxford_and = self._OXFORDAND
-        count = self._raw_string.count
-        flag = count(bare_and) == count(oxford_and)
+        tokens = self._tokens
+        flag = tokens.bare_ands == tokens.oxford_ands
         # TODO injected error code/error detail is generic PLACEHOLDER
         ## Distinguish error for _cond_ok_oxford_comma
         if not flag:
@@ -378,19 +627,71 @@ class ProcessorTitle(Processor):
 
     Class Methods:
         split
+        scan
     """
     _pre_attr_name = "italic"
     _data_attrs = set("title series".split())
+    _fill_value = str
     _TERMINAL_PUNCTUATION = {Processor._FULLSTOP,
                              Processor._EXCLAMATIONMARK,
                              Processor._QUESTIONMARK}
     _SERIES_SUBSTRINGS = {"volume", "vol"}
     _RGX_COLON_VOLUME = re.compile(r"(:\s*[Vv]ol)")
-    _RGX_SERIES_ROMANDIGITS = re.compile(r"(\:\svolume\s[ivxlcm]{1,13}\.?)")
-    _RGX_SERIES_ARABICDIGITS = re.compile(r"(\:\svolume\s[1-9][0-9]{1,12}\.?)")
-    _RGX_RAW_ROMANDIGITS = re.compile(r"(volume\s[ivxlcm]{1,13}\.?)")
-    _RGX_RAW_ARABICDIGITS = re.compile(r"(volume\s[1-9][0-9]{1,12}\.?)")
-    _RGX_RAW_TERMINAL_PUNCT = re.compile(r"(?:[^\.\?\!])([\.\?\!]$)")
+    _RGX_SERIES_VOLUME_DIGITS = re.compile(r"(\:\svolume\s(?:[ivxlcm]{1,13}|[1-9][0-9]{1,12}))")
+    _RGX_RAW_VOLUME_DIGITS = re.compile(r"(volume\s(?:[ivxlcm]{1,13}|[1-9][0-9]{1,12}))")
+
+    @classmethod
+    @_memoize("ProcessorTitle.scan")
+    def scan(cls, string):
+        """Gather the punctuation, series and volume features of a string once.
+
+        Every condition, isSeries and split read this (memoized) result
+        instead of lowercasing, splitting and searching the string again.
+
+        >>> scan = ProcessorTitle.scan("Hope: a story. Some Journal: Volume I.")
+        >>> scan.is_series, scan.title, scan.series
+        (True, 'Hope: a story', 'Some Journal: Volume I')
+        >>> scan.fullstops, scan.first_fullstop, scan.first_colon, scan.first_volume_digits
+        (2, 13, 4, 29)
+        """
+        lower = string.lower()
+        end = len(string) - 1  # Series rules ignore the final character.
+        last_fullstop = string.rfind(cls._FULLSTOP, 0, end)
+        # A colon and 'vol' after the final midstring fullstop is series info,
+        # which also satisfies the rules for any midstring fullstop.
+        is_series = (last_fullstop > -1 and cls._RGX_COLON_VOLUME.search(
+            string, last_fullstop + 1, end) is not None)
+        terminal = cls._TERMINAL_PUNCTUATION
+        ends_with_punctuation = (len(string) > 1 and string[-1] in terminal
+                                 and string[-2] not in terminal)
+        volume_digits = cls._RGX_RAW_VOLUME_DIGITS.search(lower)
+
+        if is_series:
+            stripped = string.rstrip(cls._FULLSTOP)  # Don't strip other punct.
+            result = stripped.rsplit(cls._FULLSTOP, 1)
+        else:
+            # Otherwise leave the string intact
+            result = [string, ""]
+        title, series = (r.strip().rstrip(cls._FULLSTOP) for r in result)
+        series_lower = series.lower()
+
+        return TitleScan(
+            ends_with_punctuation=ends_with_punctuation,
+            is_series=is_series,
+            title=title,
+            series=series,
+            has_vol="vol" in lower,
+            # Positions are compared with first_volume_digits, so they are
+            # offsets in the lowered string too: lowering can change length.
+            fullstops=lower.count(cls._FULLSTOP),
+            first_fullstop=lower.find(cls._FULLSTOP),
+            first_colon=lower.find(cls._COLON),
+            first_volume_digits=(-1 if volume_digits is None
+                                 else volume_digits.start()),
+            series_colons=series.count(cls._COLON),
+            series_volume_digits=bool(
+                cls._RGX_SERIES_VOLUME_DIGITS.search(series_lower)),
+            series_volume="volume" in series_lower)
 
     @classmethod
     def split(cls, string):
@@ -403,15 +704,22 @@ class ProcessorTitle(Processor):
         >>> ProcessorTitle.split(with_series)
         ['Illustrated puffins', 'Some journal: Volume III']
         """
-        if cls._isSeries(string):
-            string = string.rstrip(cls._FULLSTOP)  # Don't strip other punct.
-            result = string.rsplit(cls._FULLSTOP, 1)
-        else:
-            # Otherwise leave the string intact
-            result = [string, ""]
-        # Postprocess the strings.
-        for i, substring in enumerate(result):
-            result[i] = substring.strip().rstrip(cls._FULLSTOP)
+        scan = cls.scan(string)
+        return [scan.title, scan.series]
+
+    @classmethod
+    def _batch_ambiguous(cls, strings):
+        # Same as _maincond_ends_with_punctuation: the last character is
+        # terminal punctuation but the penultimate one is not.
+        punctuation = cls._TERMINAL_PUNCTUATION
+        separator = cls._BATCH_SEPARATOR
+        buffer = separator.join(strings)
+        result, end = [], -len(separator)
+        for string in strings:
+            end += len(string) + len(separator)
+            result.append(len(string) > 1
+                          and buffer[end - 1] in punctuation
+                          and buffer[end - 2] not in punctuation)
         return result
 
     def isValid(self):
@@ -433,6 +741,10 @@ class ProcessorTitle(Processor):
         """
         return super().isValid()
 
+    @property
+    def _scan(self):
+        return self.scan(self._raw_string)
+
     def _isValid(self):
         self._structure_report = set()
         main_flag = self._maincond_ends_with_punctuation()
@@ -443,9 +755,8 @@ class ProcessorTitle(Processor):
                       "title": title,
                       "series": series}
 
-            prefix = self._CONDITIONAL_METHOD
-            cond_methods = [getattr(self, name) for name in dir(self)
-                            if name.startswith(prefix)]
+            cond_methods = [getattr(self, name)
+                            for name in self._get_conditions()]
             iter_bool = (m(**kwargs) for m in cond_methods)
             secondary_flag = all([b for b in iter_bool if b is not None])
             flag = secondary_flag and main_flag
@@ -458,12 +769,7 @@ class ProcessorTitle(Processor):
             return flag
 
     def _maincond_ends_with_punctuation(self):
-        last_char = self._raw_string[-1]
-        flag_terminal = last_char in self._TERMINAL_PUNCTUATION
-
-        rgx_penultimate = self._RGX_RAW_TERMINAL_PUNCT
-        flag_penultimate = bool(rgx_penultimate.search(self._raw_string))
-        flag = flag_terminal and flag_penultimate
+        flag = self._scan.ends_with_punctuation
         # TODO injected error code/error detail is generic PLACEHOLDER
         if not flag:
             self._structure_report.add(self._INVALID_PLACEHOLDER)
@@ -496,29 +802,19 @@ class ProcessorTitle(Processor):
         if self.isSeries():
             return
         else:
-            rawstring = rawstring.lower()
-            for substring in self._SERIES_SUBSTRINGS:
-                if substring in rawstring:
-                    warn = True
-                    break
-            else:
-                warn = False
+            # Any 'volume' is also a 'vol'.
+            warn = self._scan.has_vol
             if warn:
                 # TODO injected error code/error detail is generic PLACEHOLDER
                 self._structure_report.add(self._WARNING_PLACEHOLDER)
             return
 
     def _cond_string_has_volume_digits_before_first_fullstop(self, rawstring, **_):
-        rawstring = rawstring.lower()
-        rgx_volumeroman = self._RGX_RAW_ROMANDIGITS
-        rgx_volumearabic = self._RGX_RAW_ARABICDIGITS
-        flag_multiple_fullstop = rawstring.count(self._FULLSTOP) > 1
+        scan = self._scan
+        flag_multiple_fullstop = scan.fullstops > 1
         if flag_multiple_fullstop:
-            first, *rest = rawstring.split(self._FULLSTOP, 1)
-            # Check for the pattern: if either is there, that's bad.
-            pattern_roman_absent = rgx_volumeroman.search(first) is None
-            pattern_arabic_absent = rgx_volumearabic.search(first) is None
-            flag_absent = pattern_roman_absent and pattern_arabic_absent
+            # Check for the pattern: if it is there, that's bad.
+            flag_absent = not (-1 < scan.first_volume_digits < scan.first_fullstop)
             if not flag_absent:
                 self._structure_report.add(self._INVALID_PLACEHOLDER)
             return flag_absent
@@ -527,16 +823,11 @@ class ProcessorTitle(Processor):
             return True
 
     def _cond_string_has_volume_digits_before_first_colon(self, rawstring, **_):
-        rawstring = rawstring.lower()
-        rgx_volumeroman = self._RGX_RAW_ROMANDIGITS
-        rgx_volumearabic = self._RGX_RAW_ARABICDIGITS
-        flag_has_colon = rawstring.count(self._COLON) > 0
+        scan = self._scan
+        flag_has_colon = scan.first_colon > -1
         if flag_has_colon:
-            first, *rest = rawstring.split(self._COLON, 1)
-            # Check for the pattern: if either is there, that's bad.
-            pattern_roman_absent = rgx_volumeroman.search(first) is None
-            pattern_arabic_absent = rgx_volumearabic.search(first) is None
-            flag_absent = pattern_roman_absent and pattern_arabic_absent
+            # Check for the pattern: if it is there, that's bad.
+            flag_absent = not (-1 < scan.first_volume_digits < scan.first_colon)
             if not flag_absent:
                 self._structure_report.add(self._INVALID_PLACEHOLDER)
             return flag_absent
@@ -569,7 +860,7 @@ class ProcessorTitle(Processor):
         if not len(series):
             return True
         else:
-            count = series.count(self._COLON)
+            count = self._scan.series_colons
             flag = count >= 1
             if not flag:
                 self._structure_report.add(self._INVALID_PLACEHOLDER)
@@ -579,12 +870,7 @@ class ProcessorTitle(Processor):
         if not len(series):
             return True
         else:
-            series = series.lower()
-            rgx_volume_roman = self._RGX_SERIES_ROMANDIGITS
-            rgx_volume_arabic = self._RGX_SERIES_ARABICDIGITS
-            flag_roman = bool(rgx_volume_roman.search(series))
-            flag_arabic = bool(rgx_volume_arabic.search(series))
-            flag = flag_roman or flag_arabic
+            flag = self._scan.series_volume_digits
             if not flag:
                 self._structure_report.add(self._INVALID_PLACEHOLDER)
             return flag
@@ -593,8 +879,8 @@ class ProcessorTitle(Processor):
         if not len(series):
             return True
         else:
-            series = series.lower()
-            flag = all([sub in series for sub in self._SERIES_SUBSTRINGS])
+            # Any 'volume' is also a 'vol'.
+            flag = self._scan.series_volume
             if not flag:
                 self._structure_report.add(self._INVALID_PLACEHOLDER)
             return flag
@@ -610,76 +896,18 @@ class ProcessorTitle(Processor):
         >>> with_series.isSeries()
         True
         """
-        try:
-            result = self._isSeries_cached
-        except AttributeError:
-            self._isSeries_cached = self._isSeries(self._raw_string)
-            result = self.isSeries()
-        return result
+        return self._scan.is_series
 
     @classmethod
     def _isSeries(cls, string):
-        test_funcs = [cls._has_midstring_fullstop,
-                      cls._has_seriesinfo_after_midstring_fullstop,
-                      cls._has_colonvol_after_midstring_fullstop,
-                      cls._has_colonvol_after_final_midstring_fullstop]
-        battery = [f(string) for f in test_funcs]
-        flag = all(battery)
-        return flag
+        return cls.scan(string).is_series
 
     def _assign_values(self):
         if self.isValid():
             self.title, self.series = self.split(self._raw_string)
         else:
             for attr in self._data_attrs:
-                super().__setattr__(attr, str())
-
-    @classmethod
-    def _has_midstring_fullstop(cls, string):
-        partialstring = string[:-1]
-        flag = cls._FULLSTOP in partialstring
-        return flag
-
-    @classmethod
-    def _has_seriesinfo_after_midstring_fullstop(cls, string):
-        partialstring = string[:-1]
-        partialstring = partialstring.lower()
-        titlelike, *rest = partialstring.split(cls._FULLSTOP)
-        if not rest:
-            return False
-        else:
-            substrings_present = []
-            for fragment in rest:
-                for substring in cls._SERIES_SUBSTRINGS:
-                    if substring in fragment:
-                        substrings_present.append(True)
-                        break
-                else:
-                    substrings_present.append(False)
-            return any(substrings_present)
-
-    @classmethod
-    def _has_colonvol_after_final_midstring_fullstop(cls, string):
-        start = -1
-        result = cls._has_colonvol_after_midstring_fullstop(string, start)
-        return result
-
-    @classmethod
-    def _has_colonvol_after_midstring_fullstop(cls, string, start=0):
-        partialstring = string[:-1]
-        titlelike, *rest = partialstring.split(cls._FULLSTOP)
-        rgx_colonvol = cls._RGX_COLON_VOLUME
-        if not rest:
-            return False
-        else:
-            pattern_present = []
-            for fragment in rest[start:]:
-                if len(rgx_colonvol.findall(fragment)):
-                    pattern_present.append(True)
-                    break
-            else:
-                pattern_present.append(False)
-            return any(pattern_present)
+                super().__setattr__(attr, self._fill_value())
 
 
 class ProcessorMeta(Processor):
@@ -690,7 +918,8 @@ class ProcessorMeta(Processor):
     _extra_attrs = set("illustrator translator".split())
     _RGX_SEARCH_ISBN = re.compile(r"([Ii][Ss][Bb][Nn]\s[0-9\s]{5,})")
     _RGX_SEARCH_ISSN = re.compile(r"([Ii][Ss]{2}[Nn]\s[0-9\sXx]{5,})")
-    _RGX_SEARCH_PRICE = re.compile(r"([\$\£\€\₪]\s?[0-9]{1,}\.[0-9]{2})")
+    _RGX_SEARCH_PRICE = re.compile(
+        rf"([{re.escape(CURRENCIES)}]\s?[0-9]{{1,}}\.[0-9]{{2}})")
     _RGX_SEARCH_PAGES = re.compile(r"((?:[XxVvIiCcMmLl]{1,}\s?\,?\s?)?[0-9]{1,}\s[Pp]{2})")
     _RGX_SEARCH_YEAR = re.compile(r"(?:\b\w{1,},\s)(\b[12][0-9]{3}\b)")
     _RGX_SEARCH_PUBLISHER = re.compile(r"(^.{1,}(?=,(?:\s\b[\w-]{1,})+,?\s\b[12][0-9]{3}\b))")
@@ -707,6 +936,7 @@ class ProcessorMeta(Processor):
         return count
 
     @classmethod
+    @_memoize("ProcessorMeta.split", copy=dict)
     def split(cls, string):
         """Split a meta-data string into a dictionary.
 
@@ -749,6 +979,54 @@ class ProcessorMeta(Processor):
         result["translator"] = cls._search_translator(string)
         return result
 
+    # Lowercase substrings without which a search can not match.
+    _BATCH_REQUIRED = {"isbn": ["isbn"],
+                       "issn": ["issn"],
+                       "price": list(CURRENCIES),
+                       "pages": ["pp"],
+                       "extra": ["translat", "illustra"]}
+    _BATCH_DEPENDENTS = {"extra": ["illustrator", "translator"]}
+
+    @classmethod
+    def batch(cls, sources):
+        """Split many meta-data strings (or PreProcessed objects) at once.
+
+        Like split, but the presence of the substrings that the ISBN, ISSN,
+        price, pages and extra patterns require is checked for the whole
+        batch first, and those searches only run where it is present.
+        ProcessorMeta does not validate, so there is no fill value.
+
+        >>> out = ProcessorMeta.batch(["Oxford University Press, Oxford, 2018. 368 pp. £25.00. ISBN 978 0 19049 954 9."])
+        >>> out[0]['isbn'], out[0]['issn'], out[0]['translator']
+        ('ISBN 978 0 19049 954 9', '', '')
+
+        Returns:
+            list of dicts with the same keys and values as split.
+        """
+        strings = cls._batch_strings(sources)
+        tokens = set(itertools.chain.from_iterable(cls._BATCH_REQUIRED.values()))
+        counts = cls._batch_counts(strings, tokens, lower=True)
+        searches = {"publisher": cls._search_publisher,
+                    "pubplace": cls._search_pubplace,
+                    "isbn": cls._search_isbn,
+                    "issn": cls._search_issn,
+                    "price": cls._search_price,
+                    "pages": cls._search_pages,
+                    "year": cls._search_year,
+                    "extra": cls._search_extra,
+                    "illustrator": cls._search_illustrator,
+                    "translator": cls._search_translator}
+        results = []
+        for i, string in enumerate(strings):
+            skip = set()
+            for key, required in cls._BATCH_REQUIRED.items():
+                if not any(counts[token][i] for token in required):
+                    skip.add(key)
+                    skip.update(cls._BATCH_DEPENDENTS.get(key, []))
+            results.append({key: (str() if key in skip else search(string))
+                            for key, search in searches.items()})
+        return results
+
     @classmethod
     def _get_matchobject_group(cls, match, group=1, default=""):
         if match is None:
@@ -880,43 +1158,159 @@ class ProcessorMeta(Processor):
 
 
 class PostProcessed(object):
-    """A data-object that validates and greps a PreProcessed object."""
-    _processor_types = [ProcessorAuthors, ProcessorTitle, ProcessorMeta]
+    """A data-object that validates and greps a PreProcessed object.
+
+    Each data attribute is computed on first access by the Processor that
+    owns it; a Processor is only instantiated once and only if one of its
+    data attributes is accessed. Abstract Processors, e.g. ProcessorMeta
+    until it is complete, cannot be instantiated and provide no fields.
+
+    Arg:
+        preprocessed(PreProcessed)
+    Kwarg:
+        fields(iterable, None): Names of the data attributes to provide, all
+            by default. Other data attributes raise AttributeError and the
+            Processors that own none of the fields never run.
+    Methods:
+        iter_processors
+    """
+    _processor_types = [P for P in (ProcessorAuthors, ProcessorTitle,
+                                    ProcessorMeta) if not inspect.isabstract(P)]
     _data_attrs = set(itertools.chain.from_iterable(
                       p._data_attrs for p in _processor_types))
 
-    def __init__(self, preprocessed):
-        # Assign the Processor object programatically and map it with its own
-        # data attributes.
-        attr2processor = dict()
+    def __init__(self, preprocessed, fields=None):
+        if fields is None:
+            fields = self._data_attrs
+        else:
+            fields = set(fields)
+            unknown = fields.difference(self._data_attrs)
+            if unknown:
+                msg = (f"Unknown fields {sorted(unknown)}, expected any of "
+                       f"{sorted(self._data_attrs)}.")
+                raise ValueError(msg)
+        self._preprocessed = preprocessed
+        self._fields = frozenset(fields)
+        # NB The implicit logic is: PostProcessor.attr <- Processor.attr
+        self._attr2processor = {da: Processor
+                                for Processor in self._processor_types
+                                for da in Processor._data_attrs
+                                if da in self._fields}
+
+    def __getattr__(self, name):
+        # Only called when the attribute is not (yet) in the instance dict.
+        attr2processor = self.__dict__.get("_attr2processor", {})
+        if name not in attr2processor:
+            msg = f"'{self.__class__.__name__}' object has no attribute '{name}'"
+            raise AttributeError(msg)
+        processor_obj = self._get_processor(attr2processor[name])
+        processor_val = getattr(processor_obj, name)
+        # Ensure empty string replaces None or empty containers
+        # if not processor_val:  # TODO - uncomment once integration test passes.
+        #     processor_val = str()
+        super().__setattr__(name, processor_val)
+        return processor_val
+
+    def iter_processors(self):
+        """Yield each Processor type that owns any of the fields and its object.
+
+        The object is None if the string of the Processor is empty.
+        """
         for Processor in self._processor_types:
-            attr_name = "_" + Processor.__name__.lower() + "_obj"
-            obj = Processor(preprocessed)
-            attr2processor.update({da: obj for da in Processor._data_attrs})
+            if self._fields.isdisjoint(Processor._data_attrs):
+                continue
+            try:
+                processor = self._get_processor(Processor)
+            except exceptions.ProcessorEmptyStringError:
+                processor = None
+            yield Processor, processor
+
+    def _get_processor(self, Processor):
+        attr_name = "_" + Processor.__name__.lower() + "_obj"
+        try:
+            obj = self.__dict__[attr_name]
+        except KeyError:
+            obj = Processor(self._preprocessed)
             super().__setattr__(attr_name, obj)
+        return obj
 
-        # Assign the corresponding Processor object value for each specified
-        # Class data attribute.
-        # NB The implicit logic is: PostProcessor.attr <- Processor.attr
-        for postprocessor_attr in PostProcessed._data_attrs:
-            processor_obj = attr2processor[postprocessor_attr]
-            processor_val = getattr(processor_obj, postprocessor_attr)
-            # Ensure empty string replaces None or empty containers
-            # if not processor_val:  # TODO - uncomment once integration test passes.
-            #     processor_val = str()
-            super().__setattr__(postprocessor_attr, processor_val)
 
-        self._attr2processor = attr2processor
+class DocumentContext(object):
+    """The namespaces and compiled XPath queries of one document.
+
+    The XPaths are made from the first element given to get_xpaths and
+    every thread gets a copy of its own, see XPaths.copy. PreProcessed
+    instances with different contexts share nothing, hence documents with
+    different nsmaps may be processed at the same time. Use it as a context
+    manager, or call close, to release the XPaths once the document is done.
+
+    Methods:
+        get_xpaths
+        close
+    Attr:
+        nsmap(dict, None): Prefix -> URI, None until the first element.
+        xpaths(XPaths, None): Those of the current thread, if any.
+    """
+
+    def __init__(self):
+        self._xpaths = None
+        self._threads = threading.local()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def nsmap(self):
+        xpaths = self._xpaths
+        return None if xpaths is None else xpaths.nsmap
+
+    @property
+    def xpaths(self):
+        return getattr(self._threads, "xpaths", None)
+
+    def get_xpaths(self, element):
+        """The XPaths of the current thread, made from element if need be."""
+        xpaths = self.xpaths
+        if xpaths is None:
+            # Only one thread finds the namespaces, every thread copies them.
+            with self._lock:
+                if self._xpaths is None:
+                    self._xpaths = xml.XPaths(element)
+                xpaths = self._xpaths.copy()
+            self._threads.xpaths = xpaths
+        return xpaths
+
+    def close(self):
+        """Release the XPaths, the next element makes them anew."""
+        with self._lock:
+            self._xpaths = None
+            self._threads = threading.local()
 
 
 class PreProcessed(object):
     """Identify the italic and non-italic parts of an XML paragraph element.
 
+    The paragraph may also be given as the Runs extracted from an element,
+    for example when loaded from a sidecar file, without any XML at all.
+
+    Kwarg:
+        coalesce(bool): False by default, otherwise adjacent runs with the
+            same formatting are merged first, see Runs.coalesce. An element
+            is normalized in place by helpers.runs.coalesce_element.
+        context(DocumentContext, None): None by default, otherwise the
+            XPaths of the paragraph's document are those of the context.
+            Without a context the XPaths are set class wide by the first
+            element ever seen, hence for a single nsmap.
     Attrs:
         pre_italic
         italic
         post_italic
         xpaths
+        context
     Methods:
         is_valid_italic_pattern
         get_italic_pattern
@@ -932,12 +1326,18 @@ class PreProcessed(object):
     __query_bool_node_has_italic_and_text = ("(count(descendant::w:i) > 0) "
                                              "and "
                                              "(count(descendant::w:t) > 0)")
-    __query_bool_node_proceded_italic = ("boolean(preceding-sibling::*//w:i "
+    # Only w:r siblings, as in __query_r_elements and Runs: the w:i of an
+    # italic paragraph mark (w:pPr/w:rPr/w:i) does not precede a run.
+    __query_bool_node_proceded_italic = ("boolean(preceding-sibling::w:r"
+                                         "[descendant::w:t]/w:rPr/w:i "
                                          "and "
                                          ".//*[count(w:i) = 0])")
     __query_text_from_t = "w:t/text()"
 
-    def __init__(self, paragraph):
+    def __init__(self, paragraph, coalesce=False, context=None):
+        self.context = context
+        if coalesce:
+            paragraph = self._coalesce(paragraph)
         self.__paragraph = self._check_init_arg(paragraph)
         self.__pre_italic = None
         self.__italic = None
@@ -951,18 +1351,22 @@ class PreProcessed(object):
         return string
 
     def _check_init_arg(self, paragraph):
+        if isinstance(paragraph, Runs):
+            return self._check_init_runs(paragraph)
         if not isinstance(paragraph, etree._Element):
             msg = f"Arg is not etree._Element type but {type(paragraph)}."
             raise TypeError(msg)
-        # XPaths is set class wide and if XPaths was assigned by another
-        # instance its left alone.
-        self._set_xpaths(paragraph)
+        # Without a context, XPaths is set class wide and if XPaths was
+        # assigned by another instance its left alone.
+        if self.context is None:
+            self._set_xpaths(paragraph)
+        xpaths = self._get_xpaths(paragraph, context=self.context)
         # Check if element is paragraph and otherwise suitable
         tag_italic_query = self.__query_bool_node_has_italic_and_text
         current_element_query = self.__query_bool_node_is_paragraph
-        has_italic_and_text = self.xpaths.get(tag_italic_query)
+        has_italic_and_text = xpaths.get(tag_italic_query)
         has_italic_and_text = has_italic_and_text(paragraph)
-        is_paragraph_node = self.xpaths.get(current_element_query)
+        is_paragraph_node = xpaths.get(current_element_query)
         is_paragraph_node = is_paragraph_node(paragraph)
         flags = (has_italic_and_text, is_paragraph_node)
         if all(flags):
@@ -980,9 +1384,28 @@ class PreProcessed(object):
             detail = details[flags]
             raise exceptions.PreProcessedValueError(detail=detail)
 
+    @staticmethod
+    def _coalesce(paragraph):
+        if isinstance(paragraph, Runs):
+            return paragraph.coalesce()
+        elif isinstance(paragraph, etree._Element):
+            coalesce_element(paragraph)
+        return paragraph
+
+    def _check_init_runs(self, runs):
+        has_italic = any(run.italic for run in runs)
+        has_text = bool(len(runs))
+        if has_italic and has_text:
+            return runs
+        else:
+            detail = (f"{self.__class__.__name__} as it has neither italic "
+                      "nor text runs")
+            raise exceptions.PreProcessedValueError(detail=detail)
+
     def identify_substrings(self):
         element = self.__paragraph
-        pre, italic, post = self._identify_substrings(element)
+        pre, italic, post = self._identify_substrings(
+            element, context=self.context)
         self.__pre_italic = pre
         self.__italic = italic
         self.__post_italic = post
@@ -1008,14 +1431,11 @@ class PreProcessed(object):
         return "".join(strings)
 
     @classmethod
-    def _identify_substrings(cls, element, _memoize=True):
+    def _identify_substrings(cls, element, _memoize=True, context=None):
+        if isinstance(element, Runs):
+            return cls._identify_run_substrings(element)
 
-        if not _memoize:
-            xpaths = xml.XPaths(element)
-        elif cls._xpaths is None:
-            xpaths = xml.XPaths(element)
-        else:
-            xpaths = cls._xpaths
+        xpaths = cls._get_xpaths(element, _memoize, context)
 
         get_string = cls._get_string_from_r_elem_sequence
 
@@ -1035,19 +1455,32 @@ class PreProcessed(object):
         post_string = get_string(r_non_italic_post, xpaths)
         return pre_string, italic_string, post_string
 
+    @staticmethod
+    def _get_string_from_run_sequence(runs):
+        strings = (r.text.upper() if r.smallcaps else r.text for r in runs)
+        return "".join(strings)
+
+    @classmethod
+    def _identify_run_substrings(cls, runs):
+        get_string = cls._get_string_from_run_sequence
+        # Non-italic runs are 'pre' until the first italic run.
+        first_italic = runs.pattern.index(True)
+        r_non_italic_pre = runs[:first_italic]
+        r_italic = [r for r in runs if r.italic]
+        r_non_italic_post = [r for r in runs[first_italic:] if not r.italic]
+        return (get_string(r_non_italic_pre),
+                get_string(r_italic),
+                get_string(r_non_italic_post))
+
     def get_italic_pattern(self):
         element = self.__paragraph
-        return self._get_italic_pattern(element)
+        return self._get_italic_pattern(element, context=self.context)
 
     @classmethod
-    def _get_italic_pattern(cls, element, _memoize=True):
-        # _memoize kwarg + boiler plate is there to support unittesting
-        if not _memoize:
-            xpaths = xml.XPaths(element)
-        elif cls._xpaths is None:
-            xpaths = xml.XPaths(element)
-        else:
-            xpaths = cls._xpaths
+    def _get_italic_pattern(cls, element, _memoize=True, context=None):
+        if isinstance(element, Runs):
+            return element.pattern
+        xpaths = cls._get_xpaths(element, _memoize, context)
 
         find_r_elems_with_text = xpaths.get(cls.__query_r_elements)
         r_elements = find_r_elems_with_text(element)
@@ -1060,11 +1493,13 @@ class PreProcessed(object):
         italic = True
         return self._is_valid_italic_pattern(element,
                                              fatal=fatal,
-                                             _font=italic)
+                                             _font=italic,
+                                             context=self.context)
 
     @classmethod
-    def _is_valid_italic_pattern(cls, element, fatal=False, _memoize=True, _font=False):
-        # _memoize kwarg + boiler plate is there to support unittesting
+    def _is_valid_italic_pattern(cls, element, fatal=False, _memoize=True,
+                                 _font=False, context=None):
+        # _memoize kwarg is there to support unittesting
 
         def annotate_italic_space(index, groups):
             _, string = groups[index]
@@ -1120,11 +1555,13 @@ class PreProcessed(object):
         # Generate the simple pattern of the italics tags in the paragraph.
         # If they do not correspond to the expected pattern, raise a
         # detailed error.
-        pattern = cls._get_italic_pattern(element, _memoize=_memoize)
+        pattern = cls._get_italic_pattern(element, _memoize=_memoize,
+                                          context=context)
         simple_pattern = tuple(cls._unique_justseen(pattern))
         is_valid = simple_pattern == cls._allowed_pattern
         if fatal and not is_valid:
-            groups = cls._group_contiguous_text_by_font(element)
+            groups = cls._group_contiguous_text_by_font(element,
+                                                        context=context)
             detail = format_detail(groups, _font)
             err = exceptions.ParagraphItalicPatternWarning(detail=detail)
             raise err
@@ -1132,14 +1569,13 @@ class PreProcessed(object):
             return is_valid
 
     @classmethod
-    def _group_contiguous_text_by_font(cls, element, _memoize=True):
-        # _memoize kwarg + boiler plate is there to support unittesting
-        if not _memoize:
-            xpaths = xml.XPaths(element)
-        elif cls._xpaths is None:
-            xpaths = xml.XPaths(element)
-        else:
-            xpaths = cls._xpaths
+    def _group_contiguous_text_by_font(cls, element, _memoize=True, context=None):
+        if isinstance(element, Runs):
+            is_italic = operator.attrgetter("italic")
+            get_string = cls._get_string_from_run_sequence
+            return [(italicflag, get_string(r_group))
+                    for italicflag, r_group in itertools.groupby(element, key=is_italic)]
+        xpaths = cls._get_xpaths(element, _memoize, context)
 
         find_r_elems = xpaths.get(cls.__query_r_elements)
         r_elems = find_r_elems(element)
@@ -1164,6 +1600,18 @@ class PreProcessed(object):
         t1, t2 = itertools.tee(iterable)
         return itertools.filterfalse(pred, t1), filter(pred, t2)
 
+    @classmethod
+    def _get_xpaths(cls, element, _memoize=True, context=None):
+        # _memoize kwarg is there to support unittesting
+        if not _memoize:
+            return xml.XPaths(element)
+        elif context is not None:
+            return context.get_xpaths(element)
+        elif cls._xpaths is None:
+            return xml.XPaths(element)
+        else:
+            return cls._xpaths
+
     @classmethod
     def _set_xpaths(cls, element):
         if cls._xpaths is None:
@@ -1171,6 +1619,8 @@ class PreProcessed(object):
 
     @property
     def xpaths(self):
+        if self.context is not None:
+            return self.context.xpaths
         return self._xpaths
 
     @property
@@ -1191,25 +1641,288 @@ class PreProcessed(object):
         cls._xpaths = None
 
 
-def process_paragraphs(paragraph_elements):
+def process_paragraphs(paragraph_elements, coalesce=False, classify=False,
+                       mode="serial", workers=None, context=None):
+    """Process paragraph elements or Runs, returns a Counter of their labels.
+
+    Kwargs:
+        coalesce(bool): False by default, see PreProcessed.
+        classify(bool): False by default, otherwise only paragraphs that
+            helpers.classifier labels as entries are processed, the others
+            are logged as warnings, and the number of each label is logged. The Counter is empty otherwise.
+        mode(str): 'serial', by default, processes the paragraphs one by
+            one, 'thread' in a pool of threads, each with XPaths of its own,
+            and 'process' in a pool of processes, which receive copies of
+            the elements, as XML. Serial and thread modes coalesce elements
+            in place, the latter before the threads start as lxml trees can
+            not be modified by several threads at once, process mode does
+            not. Paragraphs are logged in the same order whatever the mode.
+        workers(int, None): Number of worker threads or processes, by default
+            the number of CPUs.
+        context(DocumentContext, None): The context of the paragraphs'
+            document, by default a new one that is closed once done. Worker
+            processes, each for one document, use the class wide XPaths.
+    """
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Unknown mode '{mode}', expected one of "
+                         f"{EXECUTION_MODES}.")
     logger = pkg_logging.getLogger()
+    counts = Counter()
+    if classify:
+        labelled = classifier.classify_paragraphs(paragraph_elements, counts)
+    else:
+        labelled = ((classifier.ENTRY, p) for p in paragraph_elements)
+    if context is None:
+        document = DocumentContext()  # Closed once the paragraphs are done.
+    else:
+        document = contextlib.nullcontext(context)
+    with document as context:
+        if mode == "serial":
+            labelled = ((label, element, _preprocess(element, coalesce,
+                                                     context)
+                         if label == classifier.ENTRY else None)
+                        for label, element in labelled)
+        else:
+            labelled = _preprocess_in_pool(labelled, coalesce, mode, workers,
+                                           context)
+        _log_preprocessed(labelled, logger)
+    if classify:
+        summary = ", ".join(f"{label}={counts[label]}"
+                            for label in classifier.LABELS)
+        logger.info(f"Paragraph classification: {summary}.")
+    return counts
+
+
+def _log_preprocessed(labelled, logger):
     prelog_len = 30
-    for i, element in enumerate(paragraph_elements, start=1):
+    for i, (label, element, error) in enumerate(labelled, start=1):
+        if label != classifier.ENTRY:
+            head = get_paragraph_head(element, prelog_len, bullet_num=i)
+            logger.warning(f"Skipped {label}: {head}")
+            continue
         prelog = partial(get_paragraph_head, element, prelog_len, bullet_num=i)
         try:
             with pkg_logging.log_and_reraise(logger, prelog=prelog):
-                pre = PreProcessed(element)
+                if error is not None:
+                    raise error
         except exceptions.RecomposeWarning:
             continue
         else:
             pass
 
 
+def _preprocess(element, coalesce=False, context=None):
+    # The exception is returned, to be raised and logged in document order.
+    if isinstance(element, bytes):
+        element = etree.fromstring(element)
+    try:
+        PreProcessed(element, coalesce=coalesce, context=context)
+    except Exception as err:
+        return err
+    return None
+
+
+def _preprocess_in_pool(labelled, coalesce, mode, workers, context):
+    labelled = list(labelled)
+    entries = [element for label, element in labelled
+               if label == classifier.ENTRY]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if mode == "thread":
+        executor = concurrent.futures.ThreadPoolExecutor(workers)
+        # Entries may share a tree, which only one thread may modify.
+        if coalesce:
+            entries = [PreProcessed._coalesce(e) for e in entries]
+            coalesce = False
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(workers)
+        context = None
+        # Elements can not be pickled, unlike their XML and Runs.
+        entries = [etree.tostring(e) if isinstance(e, etree._Element) else e
+                   for e in entries]
+    with executor:
+        errors = iter(list(executor.map(_preprocess, entries,
+                                        itertools.repeat(coalesce),
+                                        itertools.repeat(context),
+                                        chunksize=_chunksize(len(entries),
+                                                             workers))))
+    return [(label, element,
+             next(errors) if label == classifier.ENTRY else None)
+            for label, element in labelled]
+
+
+def _chunksize(count, workers):
+    # A few chunks per worker process, ignored by threads.
+    return max(1, count // (workers * 4))
+
+
+def chain_stages(source, stages=None):
+    """Return the lazy chain of generator stages of the paragraphs of source.
+
+    Each stage takes the iterable of the previous one, the first takes the
+    source, and yields one record at a time, so the first record is ready
+    as soon as its paragraph is and only the records in flight are held.
+    Stages are added, removed or given kwargs with functools.partial, e.g.
+    without classify_records every paragraph is processed as an entry.
+
+    Kwarg:
+        stages(iterable, None): None by default, for STAGES.
+    """
+    if stages is None:
+        stages = STAGES
+    return functools.reduce(lambda records, stage: stage(records), stages,
+                            source)
+
+
+def select_paragraphs(source, accept_changes=False, verdict_cache=None):
+    """Stage: yield a ParagraphRecord of each paragraph of the source.
+
+    Paragraphs of an input file or XMLAsInput are selected as for the
+    'tree' backend of runs.extract, with the StyleIndex of the document.
+
+    Arg:
+        source(str, XMLAsInput, iterable): An input filename, a suitable
+            XMLAsInput or the paragraph elements or Runs themselves.
+    Kwargs:
+        accept_changes(bool): False by default, see runs.extract.
+        verdict_cache(VerdictCache, None): None by default, see XMLAsInput.
+    Exceptions:
+        InputFileError
+    """
+    styles = None
+    if isinstance(source, str):
+        input = xml.XMLAsInput(accept_changes=accept_changes,
+                               verdict_cache=verdict_cache)
+        input.isSuitable(source, fatal=True)
+        source = input
+    if isinstance(source, xml.XMLAsInput):
+        styles = StyleIndex.from_tree(source.tree)
+        source = source.iter_paragraphs(force_all=styles.has_formatting)
+    for number, paragraph in enumerate(source, start=1):
+        yield ParagraphRecord(number, paragraph, styles)
+
+
+def extract_runs(records):
+    """Stage: yield the records with the Runs of their paragraph."""
+    for record in records:
+        paragraph = record.paragraph
+        if isinstance(paragraph, etree._Element):
+            paragraph_runs = runs_from_element(paragraph, record.styles)
+        else:
+            paragraph_runs = Runs(paragraph)
+        yield record._replace(runs=paragraph_runs)
+
+
+def classify_records(records, counts=None):
+    """Stage: yield the records with the helpers.classifier label.
+
+    Kwarg:
+        counts(Counter, None): None by default, otherwise it is updated with
+            the number of records of each label.
+    """
+    if counts is None:
+        counts = Counter()
+    for record in records:
+        label = classifier.classify(_record_paragraph(record))
+        counts[label] += 1
+        yield record._replace(label=label)
+
+
+def process_records(records, coalesce=False, context=None):
+    """Stage: yield the records with the PreProcessed of entries.
+
+    Records without a label are entries. A RecomposeWarning or
+    PreProcessedValueError of PreProcessed, e.g. for a paragraph without
+    italics when there is no classify_records stage, is the error of its
+    record, other exceptions are raised.
+
+    Kwargs:
+        coalesce(bool): False by default, see PreProcessed.
+        context(DocumentContext, None): The context of the paragraphs'
+            document, by default a new one that is closed once done.
+    """
+    if context is None:
+        document = DocumentContext()  # Closed once the records are done.
+    else:
+        document = contextlib.nullcontext(context)
+    with document as context:
+        for record in records:
+            if record.label not in (None, classifier.ENTRY):
+                yield record
+                continue
+            try:
+                preprocessed = PreProcessed(_record_paragraph(record),
+                                            coalesce=coalesce, context=context)
+            except (exceptions.RecomposeWarning,
+                    exceptions.PreProcessedValueError) as err:
+                yield record._replace(error=err)
+                continue
+            yield record._replace(preprocessed=preprocessed)
+
+
+def validate_records(records, fields=VALIDATED_FIELDS):
+    """Stage: yield the records with the PostProcessed of their PreProcessed.
+
+    The valid dict of a record maps the name of each Processor that owns any
+    of the fields to its isValid, False if its string is empty.
+
+    Kwarg:
+        fields(iterable, None): Fields of the PostProcessed, see its kwarg.
+    """
+    for record in records:
+        if record.preprocessed is None:
+            yield record
+            continue
+        postprocessed = PostProcessed(record.preprocessed, fields=fields)
+        valid = {Processor.__name__: processor is not None
+                 and processor.isValid()
+                 for Processor, processor in postprocessed.iter_processors()}
+        yield record._replace(postprocessed=postprocessed, valid=valid)
+
+
+def serialize_records(records, extra=None):
+    """Stage: yield each record as a line of JSON, without a newline.
+
+    Kwarg:
+        extra(dict, None): None by default, otherwise items added to the
+            JSON object of every record, e.g. the input filename.
+    """
+    for record in records:
+        paragraph = _record_paragraph(record)
+        if isinstance(paragraph, etree._Element):
+            text = paragraph.xpath("string()")
+        else:
+            text = Runs(paragraph).text
+        data = {"number": record.number, "label": record.label, "text": text}
+        if record.preprocessed is not None:
+            data.update(pre_italic=record.preprocessed.pre_italic,
+                        italic=record.preprocessed.italic,
+                        post_italic=record.preprocessed.post_italic)
+        if record.valid is not None:
+            data["valid"] = record.valid
+        if record.error is not None:
+            data["error"] = f"{record.error.__class__.__name__}: {record.error}"
+        if extra is not None:
+            data.update(extra)
+        yield json.dumps(data, ensure_ascii=False)
+
+
+def _record_paragraph(record):
+    # Runs once extracted, the paragraph otherwise.
+    if record.runs is not None:
+        return record.runs
+    return record.paragraph
+
+
+STAGES = (select_paragraphs, extract_runs, classify_records, process_records,
+          validate_records, serialize_records)
+
+
 def get_paragraph_head(source, maxlength, bullet_num=-1, bullet=False):
     """Return the paragraph text of specific length, optionally prefix a bullet.
 
     Args:
-        source(str, PreProcessed, etree._Element)
+        source(str, PreProcessed, Runs, etree._Element)
         maxlength(int)
     Kwargs:
         bullet(bool): False by default, otherwise prefix paragraph text with
@@ -1232,6 +1945,8 @@ def get_paragraph_head(source, maxlength, bullet_num=-1, bullet=False):
         string = str(source.pre_italic)
     elif isinstance(source, etree._Element):
         string = source.xpath("string()")
+    elif isinstance(source, Runs):
+        string = source.text
     # TODO PostProcessed condition
     else:
         string = str(source)
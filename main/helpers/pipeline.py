@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Asyncio pipeline that converts an input file for Recompose services.
+
+Record - namedtuple of a paragraph, its classifier label and PreProcessed.
+
+Other funcs:
+    aconvert
+
+Copyright: Ian Vermes 2019
+"""
+
+from helpers.xml import (XMLAsInput, UNSUITABLE, TRACKCHANGES, open_buffer,
+                         verdict_error)
+from helpers.paragraphs import PreProcessed
+from helpers import runs
+from helpers import classifier
+from helpers import logging as pkg_logging
+import exceptions
+
+import asyncio
+from collections import namedtuple, Counter
+
+QUEUE_SIZE = 4  # Batches held between two stages.
+STAGE_CHUNK_SIZE = 1 << 20  # Least bytes of body content per batch.
+
+Record = namedtuple("Record", "number label runs preprocessed warning")
+Record.__doc__ = """A paragraph of the input file and what became of it.
+
+number is counted from 1 in document order, preprocessed is None unless the
+label is classifier.ENTRY and warning is the RecomposeWarning, if any, that
+PreProcessed raised instead.
+"""
+
+_END = None  # Last item of a stage queue.
+
+
+async def aconvert(filename, executor=None, queue_size=QUEUE_SIZE,
+                   chunk_size=STAGE_CHUNK_SIZE, accept_changes=False):
+    """Async iterator of the Record of every paragraph of an input file.
+
+    Three stages run concurrently: the reader extracts the Runs of chunks
+    of the document body one at a time, see runs.extract_chunks, the
+    processor classifies them and makes their PreProcessed, and the
+    consumer of the iterator, e.g. a writer. The work of the reader and
+    processor is done in the executor. Each queue between two stages holds
+    at most queue_size batches of a chunk's paragraphs, hence a stage waits
+    for a slower one downstream and memory stays bounded.
+
+    Paragraphs are the same as those of the 'events' backend. The namespace
+    check is done before the first Record, as the chunks are only read if
+    the body content declares no namespaces, otherwise the 'events' backend
+    checks the whole file first. Track changes are raised as soon as they
+    are found, so revisions in the body may raise InputFileError after some
+    Records.
+
+    Kwargs:
+        executor(concurrent.futures.Executor, None): None by default, the
+            default executor of the event loop, otherwise e.g. a
+            ProcessPoolExecutor for parallel stages.
+        queue_size(int): Most batches held between two stages.
+        chunk_size(int): Least bytes of body content per batch.
+        accept_changes(bool): False by default, see runs.extract.
+    Exceptions:
+        InputFileError
+    """
+    batches = asyncio.Queue(queue_size)
+    processed = asyncio.Queue(queue_size)
+    tasks = [asyncio.create_task(_read(filename, batches, executor,
+                                       chunk_size, accept_changes)),
+             asyncio.create_task(_process(batches, processed, executor))]
+    counts = Counter()
+    try:
+        while True:
+            records = await processed.get()
+            if records is _END:
+                break
+            elif isinstance(records, BaseException):
+                raise records
+            for record in records:
+                counts[record.label] += 1
+                yield record
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    logger = pkg_logging.getLogger()
+    summary = ", ".join(f"{label}={counts[label]}"
+                        for label in classifier.LABELS)
+    logger.info(f"Paragraph classification: {summary}.")
+
+
+async def _read(filename, batches, executor, chunk_size, accept_changes):
+    loop = asyncio.get_running_loop()
+    try:
+        split = await loop.run_in_executor(executor, _split, filename,
+                                           chunk_size, accept_changes)
+        emitted = 0
+        if split is not None:
+            span, chunks, (styles, namespaces, has_trackchanges) = split
+            if has_trackchanges:
+                raise verdict_error(filename, TRACKCHANGES)
+            if not XMLAsInput().namespace_verdict(namespaces):
+                raise verdict_error(filename, UNSUITABLE)
+            for start, end in chunks:
+                result = await loop.run_in_executor(
+                    executor, runs.extract_chunk, filename, start, end,
+                    span.head, span.tail, styles, accept_changes)
+                if result is None:
+                    break
+                paragraphs, _, chunk_trackchanges = result
+                if chunk_trackchanges:
+                    raise verdict_error(filename, TRACKCHANGES)
+                await batches.put(paragraphs)
+                emitted += len(paragraphs)
+            else:
+                await batches.put(_END)
+                return
+        # The body is not found or declares namespaces, or a chunk is not
+        # whole elements.
+        paragraphs = await loop.run_in_executor(
+            executor, runs.extract_events, filename, accept_changes)
+        await batches.put(paragraphs[emitted:])
+        await batches.put(_END)
+    except Exception as err:
+        await batches.put(err)
+
+
+async def _process(batches, processed, executor):
+    loop = asyncio.get_running_loop()
+    number = 1
+    while True:
+        paragraphs = await batches.get()
+        if paragraphs is _END or isinstance(paragraphs, BaseException):
+            await processed.put(paragraphs)
+            return
+        try:
+            records = await loop.run_in_executor(executor, _process_batch,
+                                                 paragraphs, number)
+        except Exception as err:
+            await processed.put(err)
+            return
+        number += len(paragraphs)
+        await processed.put(records)
+
+
+def _split(filename, chunk_size, accept_changes):
+    with open_buffer(filename) as buffer:
+        if not XMLAsInput().sniff(buffer):
+            raise verdict_error(filename, UNSUITABLE)
+    split = runs.split_file(filename, chunk_size, accept_changes)
+    if split is None:
+        return None
+    span = split[0]
+    with open_buffer(filename) as buffer:
+        # The namespaces outside the body are not all of them, so the
+        # verdict would not be known until the last chunk.
+        if buffer.find(b"xmlns", span.start, span.end) != -1:
+            return None
+    return split
+
+
+def _process_batch(paragraphs, number):
+    records = []
+    for number, paragraph in enumerate(paragraphs, start=number):
+        label = classifier.classify(paragraph)
+        preprocessed = warning = None
+        if label == classifier.ENTRY:
+            try:
+                preprocessed = PreProcessed(paragraph)
+            except exceptions.RecomposeWarning as err:
+                warning = err
+        records.append(Record(number, label, paragraph, preprocessed,
+                              warning))
+    return records
@@ -0,0 +1,905 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Run level representation of paragraphs for Recompose.
+
+Run - namedtuple of the formatting flags and the text of a w:r element.
+Runs - tuple of Run objects that represents a single paragraph.
+SidecarHeader - class that packs and checks the header of a binary file
+    derived from an input file.
+RunsSidecar - class that writes and reads a binary cache of extracted Runs.
+RunsBuilder - parser target that collects Runs without building elements.
+
+Other funcs:
+    extract
+    extract_chunks
+    extract_events
+    split_file
+    parse_outside_body
+    extract_chunk
+    select_backend
+    runs_from_element
+    runs_from_xslt
+    styled_paragraphs
+    coalesce_element
+
+Copyright: Ian Vermes 2019
+"""
+
+from helpers.xml import (XMLAsInput, PruningTarget, AcceptChangesTarget,
+                         SAMPLE_URIS,
+                         DOCUMENT_PART_NAMES, FEED_SIZE, CHUNK_SIZE,
+                         SUITABLE, UNSUITABLE, TRACKCHANGES,
+                         open_buffer, find_body, split_body, file_digest,
+                         verdict_error)
+from helpers.styles import StyleIndex
+from helpers import logging as pkg_logging
+import exceptions
+
+from lxml import etree
+
+import os
+import struct
+import itertools
+import operator
+import functools
+import concurrent.futures
+from collections import namedtuple
+
+
+Run = namedtuple("Run", "italic smallcaps text")
+
+# Children of w:p that split runs without adding any text.
+NOISE_TAGS = ("proofErr", "bookmarkStart", "bookmarkEnd")
+
+XSLT_FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "runs.xsl")
+
+
+class Runs(tuple):
+    """Immutable sequence of Run objects for a single paragraph.
+
+    Kwarg:
+        style(str, None): The w:pStyle of the paragraph, by default that of
+            runs if it is Runs, otherwise None.
+    Attr:
+        pattern: tuple of the italic flag of each run.
+        text: the joined text of all runs.
+        style: the w:pStyle of the paragraph, None if it has none.
+    """
+
+    def __new__(cls, runs=(), style=None):
+        if style is None:
+            style = getattr(runs, "style", None)
+        self = super().__new__(cls, (Run(*run) for run in runs))
+        self.style = style
+        return self
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({super().__repr__()})"
+
+    @property
+    def pattern(self):
+        return tuple(run.italic for run in self)
+
+    @property
+    def text(self):
+        return "".join(run.text for run in self)
+
+    def coalesce(self):
+        """Merge adjacent runs with the same formatting.
+
+        The pattern of italic stretches and the text are the same, so are the
+        PreProcessed substrings. Returns self if there is nothing to merge.
+
+        >>> Runs([(False, False, "Ilan, "), (False, False, "Tal, "),
+        ...       (True, False, "Lexicon")]).coalesce()
+        Runs((Run(italic=False, smallcaps=False, text='Ilan, Tal, '), \
+Run(italic=True, smallcaps=False, text='Lexicon')))
+        """
+        groups = [(formatting, list(group)) for formatting, group
+                  in itertools.groupby(self, key=_formatting)]
+        if len(groups) == len(self):
+            return self
+        return self.__class__(
+            ((italic, smallcaps, "".join(run.text for run in group))
+             for (italic, smallcaps), group in groups), self.style)
+
+
+_formatting = operator.itemgetter(0, 1)
+
+
+def runs_from_element(paragraph, styles=None):
+    """Get the Runs of a w:p element, equivalent to PreProcessed XPaths.
+
+    Only w:r children with w:t descendants are considered and formatting is
+    read from their w:rPr. The w namespace is that of the paragraph itself.
+    The w:pStyle of the paragraph is the style of the Runs.
+
+    Kwarg:
+        styles(StyleIndex, None): None by default, otherwise runs are also
+            italic or small caps if their w:rStyle or the w:pStyle of the
+            paragraph say so.
+    """
+    if not isinstance(paragraph, etree._Element):
+        msg = f"Arg is not etree._Element type but {type(paragraph)}."
+        raise TypeError(msg)
+    w = "{%s}" % etree.QName(paragraph).namespace
+    tag_r, tag_rpr, tag_t = f"{w}r", f"{w}rPr", f"{w}t"
+    tag_i, tag_caps = f"{w}i", f"{w}smallCaps"
+    tag_rstyle, attr_val = f"{w}rStyle", f"{w}val"
+    paragraph_style = paragraph.find(f"{w}pPr/{w}pStyle")
+    if paragraph_style is not None:
+        paragraph_style = paragraph_style.get(attr_val)
+
+    runs = []
+    for r_elem in paragraph.iterchildren(tag_r):
+        if next(r_elem.iterdescendants(tag_t), None) is None:
+            continue
+        italic = smallcaps = False
+        run_style = None
+        for rpr in r_elem.iterchildren(tag_rpr):
+            italic = italic or rpr.find(tag_i) is not None
+            smallcaps = smallcaps or rpr.find(tag_caps) is not None
+            if styles is not None and run_style is None:
+                run_style = rpr.find(tag_rstyle)
+                if run_style is not None:
+                    run_style = run_style.get(attr_val)
+        if styles is not None:
+            styled = styles.formatting(paragraph_style, run_style)
+            italic = italic or styled.italic
+            smallcaps = smallcaps or styled.smallcaps
+        text = "".join(t.text or "" for t in r_elem.iterchildren(tag_t))
+        runs.append(Run(italic, smallcaps, text))
+    return Runs(runs, paragraph_style)
+
+
+def styled_paragraphs(paragraphs, styles):
+    """Yield the Runs of each w:p element with w:t that has italic runs.
+
+    A paragraph is italic if it has w:i descendants, as for
+    XMLAsInput.iter_paragraphs, or if the styles make any of its runs italic.
+    """
+    for paragraph in paragraphs:
+        w = "{%s}" % etree.QName(paragraph).namespace
+        if next(paragraph.iterdescendants(f"{w}t"), None) is None:
+            continue
+        runs = runs_from_element(paragraph, styles)
+        if (any(runs.pattern)
+                or next(paragraph.iterdescendants(f"{w}i"), None) is not None):
+            yield runs
+
+
+@functools.lru_cache(maxsize=None)
+def _get_transform():
+    return etree.XSLT(etree.parse(XSLT_FILENAME))
+
+
+def runs_from_xslt(tree, styles=None):
+    """Get the Runs of the suitable paragraphs of a tree in one XSLT pass.
+
+    The stylesheet runs.xsl walks the document body in C and gives the same
+    Runs as runs_from_element for the paragraphs of iter_paragraphs, or of
+    styled_paragraphs if the styles have any formatting.
+
+    Kwarg:
+        styles(StyleIndex, None): None by default, see runs_from_element.
+    """
+    if styles is not None and not styles.has_formatting:
+        styles = None
+    transform = _get_transform()
+    result = transform(tree, all="0" if styles is None else "1")
+    paragraphs = []
+    for p_elem in result.getroot():
+        paragraph_style = p_elem.get("s")
+        if styles is None:
+            paragraphs.append(Runs(((r.get("i") == "1", r.get("c") == "1",
+                                     r.text or "") for r in p_elem),
+                                   paragraph_style))
+            continue
+        runs = []
+        for r_elem in p_elem:
+            styled = styles.formatting(paragraph_style, r_elem.get("s"))
+            runs.append(Run(r_elem.get("i") == "1" or styled.italic,
+                            r_elem.get("c") == "1" or styled.smallcaps,
+                            r_elem.text or ""))
+        runs = Runs(runs, paragraph_style)
+        if p_elem.get("i") == "1" or any(runs.pattern):
+            paragraphs.append(runs)
+    return paragraphs
+
+
+def coalesce_element(paragraph):
+    """Normalize a w:p element in place before italic analysis.
+
+    Removes w:proofErr and bookmark children, which Word adds between runs,
+    then merges every w:r into the preceding one if both only have w:rPr and
+    w:t children and the same italic, small caps and w:rStyle. Revision IDs
+    and other w:rPr properties are ignored. The PreProcessed substrings stay
+    the same. Returns the number of w:r elements removed.
+    """
+    if not isinstance(paragraph, etree._Element):
+        msg = f"Arg is not etree._Element type but {type(paragraph)}."
+        raise TypeError(msg)
+    w = "{%s}" % etree.QName(paragraph).namespace
+    tag_r, tag_rpr, tag_t = f"{w}r", f"{w}rPr", f"{w}t"
+    noise = tuple(f"{w}{tag}" for tag in NOISE_TAGS)
+
+    def formatting(r_elem):
+        # None if the run has children other than w:rPr and w:t.
+        rpr = None
+        for child in r_elem:
+            if child.tag == tag_rpr and rpr is None:
+                rpr = child
+            elif child.tag != tag_t:
+                return None
+        if rpr is None:
+            return (False, False, None)
+        rstyle = rpr.find(f"{w}rStyle")
+        return (rpr.find(f"{w}i") is not None,
+                rpr.find(f"{w}smallCaps") is not None,
+                None if rstyle is None else rstyle.get(f"{w}val"))
+
+    for element in list(paragraph.iterchildren(*noise)):
+        paragraph.remove(element)
+    removed = 0
+    previous = previous_formatting = None
+    for r_elem in list(paragraph.iterchildren()):
+        if r_elem.tag != tag_r:
+            previous = None
+            continue
+        current_formatting = formatting(r_elem)
+        if (previous is not None and current_formatting is not None
+                and current_formatting == previous_formatting
+                and r_elem.getprevious() is previous):
+            previous.extend(list(r_elem.iterchildren(tag_t)))
+            paragraph.remove(r_elem)
+            removed += 1
+        else:
+            previous, previous_formatting = r_elem, current_formatting
+    return removed
+
+
+class SidecarHeader(object):
+    """Header of a binary file derived from an input file, e.g. a sidecar.
+
+    The header records the format, a stamp of the input file and a count of
+    items. The stamp is the size, modification time and SHA-1 digest of the
+    file. A changed size means the file changed, a changed modification time
+    only does so if the digest differs as well.
+
+    Args:
+        magic(bytes): The first 4 bytes of the format.
+        version(int): Version of the format, other versions are invalid.
+    Methods:
+        stamp
+        current
+        pack
+        unpack
+        read
+    Attr:
+        size(int): Bytes of the header.
+    """
+
+    _STRUCT = struct.Struct("<4sHQq20sI")
+    size = _STRUCT.size
+
+    def __init__(self, magic, version):
+        self.magic = magic
+        self.version = version
+
+    @staticmethod
+    def stamp(source, digest=True):
+        """(size, mtime_ns, digest) of an input file.
+
+        Kwarg:
+            digest(bool): True by default, otherwise the digest is None.
+        """
+        stat = os.stat(source)
+        return (stat.st_size, stat.st_mtime_ns,
+                file_digest(source) if digest else None)
+
+    def current(self, stamp, source):
+        """The stamp with the current mtime_ns, None if the source changed.
+
+        A stamp without a digest only corresponds to an unmodified source.
+        """
+        size, mtime_ns, digest = stamp
+        current_size, current_mtime_ns, _ = self.stamp(source, digest=False)
+        if size != current_size:
+            return None
+        elif mtime_ns == current_mtime_ns:
+            return stamp
+        elif digest is not None and digest == file_digest(source):
+            return size, current_mtime_ns, digest
+        else:
+            return None
+
+    def pack(self, stamp, count):
+        """The header of a stamp and a count of items."""
+        return self._STRUCT.pack(self.magic, self.version, *stamp, count)
+
+    def unpack(self, data):
+        """(stamp, count) of the header at the start of data, or None."""
+        try:
+            magic, version, *stamp, count = self._STRUCT.unpack_from(data, 0)
+        except struct.error:
+            return None
+        if magic != self.magic or version != self.version:
+            return None
+        return tuple(stamp), count
+
+    def read(self, filename):
+        """(stamp, count) of the header of a file, None if there is none."""
+        if not os.path.isfile(filename):
+            return None
+        with open(filename, "rb") as handle:
+            return self.unpack(handle.read(self.size))
+
+
+class RunsSidecar(object):
+    """Binary cache of the Runs extracted from an input file.
+
+    The header is a SidecarHeader, a sidecar is valid as long as the stamp
+    of the input file corresponds to it.
+
+    Arg:
+        source(str): Input filename.
+    Kwarg:
+        filename(str, None): Sidecar filename, by default the source filename
+            with the SUFFIX appended.
+    Methods:
+        isValid
+        load
+        dump
+    """
+
+    SUFFIX = ".runs"
+    MAGIC = b"RCRN"
+    VERSION = 3  # Version 1 ignored styles, version 2 paragraph styles.
+    _HEADER = SidecarHeader(MAGIC, VERSION)
+    _RUNS = struct.Struct("<II")
+    _RUN = struct.Struct("<BI")
+    _NO_STYLE = 0xFFFFFFFF
+    _FLAG_ITALIC = 1
+    _FLAG_SMALLCAPS = 2
+
+    def __init__(self, source, filename=None):
+        self.source = source
+        if filename is None:
+            filename = source + self.SUFFIX
+        self.filename = filename
+
+    def isValid(self):
+        """Boolean check: does the sidecar still correspond to the source?"""
+        header = self._HEADER.read(self.filename)
+        if header is None:
+            return False
+        stamp, _ = header
+        return self._HEADER.current(stamp, self.source) is not None
+
+    def dump(self, paragraphs):
+        """Write a sequence of Runs to the sidecar file."""
+        paragraphs = list(paragraphs)
+        chunks = [self._HEADER.pack(self._HEADER.stamp(self.source),
+                                    len(paragraphs))]
+        for runs in paragraphs:
+            style = getattr(runs, "style", None)
+            if style is None:
+                chunks.append(self._RUNS.pack(len(runs), self._NO_STYLE))
+            else:
+                encoded = style.encode("utf8")
+                chunks.append(self._RUNS.pack(len(runs), len(encoded)))
+                chunks.append(encoded)
+            for italic, smallcaps, text in runs:
+                flags = ((self._FLAG_ITALIC if italic else 0)
+                         | (self._FLAG_SMALLCAPS if smallcaps else 0))
+                encoded = text.encode("utf8")
+                chunks.append(self._RUN.pack(flags, len(encoded)))
+                chunks.append(encoded)
+        # Write then rename so that readers never see a partial sidecar.
+        partial = self.filename + ".partial"
+        with open(partial, "wb") as handle:
+            handle.write(b"".join(chunks))
+        os.replace(partial, self.filename)
+
+    def load(self):
+        """Read the sidecar file and return a list of Runs."""
+        with open(self.filename, "rb") as handle:
+            data = handle.read()
+        header = self._HEADER.unpack(data)
+        if header is None:
+            raise exceptions.SidecarError(detail=self.filename)
+        _, count = header
+        offset = self._HEADER.size
+        paragraphs = []
+        for _ in range(count):
+            run_count, style_length = self._RUNS.unpack_from(data, offset)
+            offset += self._RUNS.size
+            style = None
+            if style_length != self._NO_STYLE:
+                style = data[offset:offset + style_length].decode("utf8")
+                offset += style_length
+            runs = []
+            for _ in range(run_count):
+                flags, length = self._RUN.unpack_from(data, offset)
+                offset += self._RUN.size
+                text = data[offset:offset + length].decode("utf8")
+                offset += length
+                runs.append(Run(bool(flags & self._FLAG_ITALIC),
+                                bool(flags & self._FLAG_SMALLCAPS),
+                                text))
+            paragraphs.append(Runs(runs, style))
+        return paragraphs
+
+
+class _RunState(object):
+    __slots__ = ("depth", "italic", "smallcaps", "has_t", "in_rpr", "texts",
+                 "style")
+
+    def __init__(self, depth):
+        self.depth = depth
+        self.italic = self.smallcaps = self.has_t = self.in_rpr = False
+        self.texts = []
+        self.style = None
+
+
+class _ParagraphState(object):
+    __slots__ = ("depth", "slot", "has_i", "has_t", "runs", "run", "style",
+                 "run_styles")
+
+    def __init__(self, depth, slot):
+        self.depth = depth
+        self.slot = slot
+        self.has_i = self.has_t = False
+        self.runs = []
+        self.run = None
+        self.style = None
+        self.run_styles = []
+
+
+class RunsBuilder(object):
+    """Parser target that collects the Runs of paragraphs from parser events.
+
+    The paragraphs and runs are the same as XMLAsInput.iter_paragraphs and
+    runs_from_element give from a tree: every w:p with w:i and w:t
+    descendants, in document order. Paragraphs of package parts other than the
+    document part are ignored. Only the state of the open paragraphs is
+    kept, no elements are built. It has the TreeBuilder interface so it can be
+    the builder of a PruningTarget, or be a parser target by itself.
+
+    The w:style events go to a StyleIndex, so style based formatting is the
+    same as runs_from_element with the styles of the document. As the styles
+    part may come after the document part, every paragraph with w:t is kept
+    until close.
+
+    Kwarg:
+        w_uri(str): The URI of the w prefix.
+        styles(StyleIndex, None): None by default, otherwise the styles of a
+            document whose paragraphs are parsed without its styles part.
+    Methods:
+        close: returns a list of Runs.
+    Attr:
+        styles(StyleIndex)
+    """
+
+    def __init__(self, w_uri=SAMPLE_URIS["w"], styles=None):
+        w = "{%s}" % w_uri
+        self._tag_p, self._tag_r, self._tag_rpr = f"{w}p", f"{w}r", f"{w}rPr"
+        self._tag_t, self._tag_i = f"{w}t", f"{w}i"
+        self._tag_caps = f"{w}smallCaps"
+        self._tag_styles, self._tag_ppr = f"{w}styles", f"{w}pPr"
+        self._tag_pstyle, self._tag_rstyle = f"{w}pStyle", f"{w}rStyle"
+        self._attr_val = f"{w}val"
+        self._pkg_part = "{%s}part" % SAMPLE_URIS["pkg"]
+        self._pkg_name = "{%s}name" % SAMPLE_URIS["pkg"]
+        self._other_part_depth = 0  # Depth of an open non-document part
+        self.styles = StyleIndex(w_uri) if styles is None else styles
+        self._styles_depth = 0  # Depth of the open w:styles, 0 if none
+        self._paragraphs = []  # Slots in start order, None if unsuitable
+        self._open = []
+        self._depth = 0
+        self._text = None  # Texts of the run while in one of its w:t
+
+    def start(self, tag, attrib=None, nsmap=None):
+        self._depth += 1
+        self._text = None
+        depth = self._depth
+        if self._styles_depth:
+            self.styles.start(tag, attrib)
+            return
+        elif tag == self._pkg_part:
+            if attrib.get(self._pkg_name) not in DOCUMENT_PART_NAMES:
+                self._other_part_depth = depth
+            return
+        elif tag == self._tag_p and not self._other_part_depth:
+            self._open.append(_ParagraphState(depth, len(self._paragraphs)))
+            self._paragraphs.append(None)
+            return
+        elif not self._open:
+            if tag == self._tag_styles:
+                self._styles_depth = depth
+                self.styles.start(tag, attrib)
+            return
+        paragraph = self._open[-1]
+        run = paragraph.run
+        if tag == self._tag_t:
+            paragraph.has_t = True
+        elif tag == self._tag_i:
+            paragraph.has_i = True
+
+        if run is None:
+            if tag == self._tag_r and depth == paragraph.depth + 1:
+                paragraph.run = _RunState(depth)
+            elif tag == self._tag_pstyle and depth == paragraph.depth + 2:
+                paragraph.style = attrib.get(self._attr_val)
+        elif tag == self._tag_t:
+            run.has_t = True
+            if depth == run.depth + 1:
+                self._text = run.texts
+        elif tag == self._tag_rpr and depth == run.depth + 1:
+            run.in_rpr = True
+        elif run.in_rpr and depth == run.depth + 2:
+            run.italic = run.italic or tag == self._tag_i
+            run.smallcaps = run.smallcaps or tag == self._tag_caps
+            if tag == self._tag_rstyle and run.style is None:
+                run.style = attrib.get(self._attr_val)
+
+    def end(self, tag):
+        depth = self._depth
+        self._depth -= 1
+        self._text = None
+        if self._styles_depth:
+            self.styles.end(tag)
+            if depth == self._styles_depth:
+                self._styles_depth = 0
+            return
+        elif depth == self._other_part_depth:
+            self._other_part_depth = 0
+            return
+        elif not self._open:
+            return
+        paragraph = self._open[-1]
+        run = paragraph.run
+        if depth == paragraph.depth:
+            self._end_paragraph()
+        elif run is None:
+            return
+        elif depth == run.depth:
+            if run.has_t:
+                text = "".join(run.texts)
+                paragraph.runs.append(Run(run.italic, run.smallcaps, text))
+                paragraph.run_styles.append(run.style)
+            paragraph.run = None
+        elif depth == run.depth + 1 and tag == self._tag_rpr:
+            run.in_rpr = False
+
+    def _end_paragraph(self):
+        paragraph = self._open.pop()
+        if paragraph.has_t:
+            # Without w:i only styles can make it suitable, known at close.
+            paragraph.run = None
+            self._paragraphs[paragraph.slot] = paragraph
+        if self._open:
+            # A nested paragraph is a descendant of its ancestors and runs.
+            parent = self._open[-1]
+            parent.has_i = parent.has_i or paragraph.has_i
+            parent.has_t = parent.has_t or paragraph.has_t
+            if parent.run is not None:
+                parent.run.has_t = parent.run.has_t or paragraph.has_t
+
+    def data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+    def comment(self, text):
+        self._text = None
+
+    def pi(self, target, data=None):
+        self._text = None
+
+    def close(self):
+        styles = self.styles if self.styles.has_formatting else None
+        if styles is not None:
+            formatting = styles.formatting
+        paragraphs = []
+        for paragraph in self._paragraphs:
+            if paragraph is None:
+                continue
+            elif styles is None:
+                if paragraph.has_i:
+                    paragraphs.append(Runs(paragraph.runs, paragraph.style))
+                continue
+            runs = Runs(((italic or styled.italic, smallcaps or styled.smallcaps,
+                          text)
+                         for (italic, smallcaps, text), styled in zip(
+                             paragraph.runs,
+                             (formatting(paragraph.style, s)
+                              for s in paragraph.run_styles))),
+                        paragraph.style)
+            if paragraph.has_i or any(runs.pattern):
+                paragraphs.append(runs)
+        self._paragraphs = []
+        return paragraphs
+
+
+BACKENDS = ("tree", "events", "xslt", "chunks")
+AUTO = "auto"
+ACCEPTED_SUFFIX = ".accepted" + RunsSidecar.SUFFIX
+
+SMALL_FILE = 8 << 20  # Largest file given to the tree backend by default.
+HUGE_BODY = 64 << 20  # Least body content given to the chunks backend.
+# Peak memory per byte of input, measured on synthetic Word XML packages. The
+# namespace check of a full tree makes a node per element and namespace.
+MEMORY_FACTORS = {"tree": 330, "xslt": 330, "events": 4, "chunks": 4}
+
+
+def select_backend(filename, max_memory=None):
+    """Pick the backend for an input file from its size and a memory budget.
+
+    The body content is found by find_body, a byte scan that parses nothing.
+    Small files get the tree backend, huge bodies the chunks backend when
+    there is more than one CPU, and all other files the events backend. A
+    backend whose estimated peak memory, see MEMORY_FACTORS, is over the
+    budget is passed over.
+
+    Kwarg:
+        max_memory(int, None): Memory budget in bytes, None for no budget.
+    Returns:
+        tuple of the backend and the reason for it, both str.
+    """
+    def fits(backend):
+        return max_memory is None or size * MEMORY_FACTORS[backend] <= max_memory
+
+    size = os.path.getsize(filename)
+    with open_buffer(filename) as buffer:
+        span = find_body(buffer)
+    body = size if span is None else span.end - span.start
+    cpus = os.cpu_count() or 1
+    mib = f"{size / (1 << 20):.1f} MiB"
+    if body >= HUGE_BODY and span is not None and cpus > 1:
+        backend = "chunks"
+        reason = (f"body of {body / (1 << 20):.1f} MiB is huge, parsed in "
+                  f"chunks by {cpus} CPUs")
+    elif size <= SMALL_FILE and fits("tree"):
+        backend = "tree"
+        reason = f"file of {mib} is small"
+    elif size <= SMALL_FILE:
+        backend = "events"
+        reason = f"a tree of a file of {mib} exceeds the memory budget"
+    else:
+        backend = "events"
+        reason = f"file of {mib} is large, streamed without a tree"
+    if not fits(backend):
+        reason += ", even though it exceeds the memory budget"
+    return backend, reason
+
+
+def extract(filename, use_sidecar=True, backend="tree", accept_changes=False,
+            verdict_cache=None):
+    """Extract the Runs of every suitable paragraph in the input file.
+
+    If the sidecar is valid the XML is not parsed at all, otherwise the file
+    is checked, parsed and a new sidecar is written. Italic and small caps
+    from paragraph and character styles are resolved with a StyleIndex of the
+    document.
+
+    Kwargs:
+        use_sidecar(bool): True, by default, read and write the sidecar.
+        backend(str): 'tree', by default, queries the paragraphs of the full
+            tree, 'events' collects them with a RunsBuilder in the same
+            single parse as the checks, without building a tree, 'xslt'
+            transforms the full tree with runs.xsl and 'chunks' parses
+            chunks of the body in parallel, see extract_chunks.
+        accept_changes(bool): False by default, otherwise accept tracked
+            changes as the file is parsed, see AcceptChangesTarget. The Runs
+            go to a sidecar of their own.
+        verdict_cache(VerdictCache, None): None by default, otherwise the
+            cached verdict of the file is used and a new one recorded, see
+            XMLAsInput.
+    Exceptions:
+        InputFileError
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of "
+                         f"{BACKENDS}.")
+    sidecar = RunsSidecar(filename)
+    if accept_changes:
+        sidecar = RunsSidecar(filename, filename + ACCEPTED_SUFFIX)
+    if use_sidecar and sidecar.isValid():
+        return sidecar.load()
+    if backend == "events":
+        paragraphs = extract_events(filename, accept_changes, verdict_cache)
+    elif backend == "chunks":
+        paragraphs = extract_chunks(filename, accept_changes=accept_changes,
+                                    verdict_cache=verdict_cache)
+    elif backend == "xslt":
+        input = XMLAsInput(accept_changes=accept_changes,
+                           verdict_cache=verdict_cache)
+        input.isSuitable(filename, fatal=True)
+        styles = StyleIndex.from_tree(input.tree)
+        paragraphs = runs_from_xslt(input.tree, styles)
+    else:
+        input = XMLAsInput(accept_changes=accept_changes,
+                           verdict_cache=verdict_cache)
+        input.isSuitable(filename, fatal=True)
+        styles = StyleIndex.from_tree(input.tree)
+        if styles.has_formatting:
+            paragraphs = list(styled_paragraphs(
+                input.iter_paragraphs(force_all=True), styles))
+        else:
+            paragraphs = [runs_from_element(p) for p in input.iter_paragraphs()]
+    if use_sidecar:
+        sidecar.dump(paragraphs)
+    return paragraphs
+
+
+def extract_chunks(filename, workers=None, chunk_size=CHUNK_SIZE,
+                   accept_changes=False, verdict_cache=None):
+    """Extract the same Runs as the 'events' backend, in parallel.
+
+    The memory-mapped file is split by byte scanning, see find_body and
+    split_body. Everything but the body content is parsed first, for the
+    styles, namespaces and track changes of the other parts. Then every chunk
+    of whole body elements, wrapped in the start and end tags of its
+    ancestors, is parsed with a RunsBuilder in a worker process. The Runs of
+    the chunks are joined in document order and the checks of XMLAsInput
+    are made with the namespaces and track changes of all parses.
+
+    The split is speculative, if the body is not found or a chunk does not
+    parse, the file is parsed by the 'events' backend instead.
+
+    Kwargs:
+        workers(int, None): Number of worker processes, by default the number
+            of CPUs. Chunks are parsed in this process if there is only one.
+        chunk_size(int): Least bytes of a chunk.
+        accept_changes(bool): False by default, see extract.
+        verdict_cache(VerdictCache, None): None by default, see extract.
+    Exceptions:
+        InputFileError
+    """
+    logger = pkg_logging.getLogger()
+    checker = XMLAsInput()
+    cached = None
+    if verdict_cache is not None:
+        cached = verdict_cache.get(filename, accept_changes)
+    if cached not in (None, SUITABLE):
+        raise verdict_error(filename, cached)
+    with open_buffer(filename) as buffer:
+        if not checker.sniff(buffer):
+            _record_verdict(verdict_cache, filename, UNSUITABLE,
+                            accept_changes)
+            raise verdict_error(filename, UNSUITABLE)
+    split = split_file(filename, chunk_size, accept_changes)
+    if split is None:
+        logger.debug("chunks: body not found, parsing serially.")
+        return extract_events(filename, accept_changes, verdict_cache)
+    span, chunks, (styles, namespaces, has_trackchanges) = split
+
+    args = [(filename, start, end, span.head, span.tail, styles,
+             accept_changes) for start, end in chunks]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(chunks))
+    logger.debug(f"chunks: {len(chunks)} chunks, {workers} workers.")
+    if workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(extract_chunk, *zip(*args)))
+    else:
+        results = [extract_chunk(*arg) for arg in args]
+    if None in results:
+        logger.debug("chunks: a chunk is not whole elements, parsing "
+                     "serially.")
+        return extract_events(filename, accept_changes, verdict_cache)
+
+    paragraphs = []
+    for chunk_paragraphs, chunk_namespaces, chunk_trackchanges in results:
+        paragraphs.extend(chunk_paragraphs)
+        namespaces.extend(chunk_namespaces)
+        has_trackchanges = has_trackchanges or chunk_trackchanges
+    if has_trackchanges:
+        verdict = TRACKCHANGES
+    elif not checker.namespace_verdict(namespaces):
+        verdict = UNSUITABLE
+    else:
+        verdict = SUITABLE
+    if verdict != cached:
+        _record_verdict(verdict_cache, filename, verdict, accept_changes)
+    if verdict != SUITABLE:
+        raise verdict_error(filename, verdict)
+    return paragraphs
+
+
+def _record_verdict(verdict_cache, filename, verdict, accept_changes):
+    if verdict_cache is not None:
+        verdict_cache.set(filename, verdict, accept_changes)
+        verdict_cache.dump()
+
+
+def extract_events(filename, accept_changes=False, verdict_cache=None):
+    """Extract the Runs of the 'events' backend, without a sidecar.
+
+    The file is checked and parsed once by an XMLAsInput with a RunsBuilder.
+
+    Kwargs:
+        accept_changes(bool): False by default, see extract.
+        verdict_cache(VerdictCache, None): None by default, see extract.
+    Exceptions:
+        InputFileError
+    """
+    input = XMLAsInput(builder=RunsBuilder, accept_changes=accept_changes,
+                       verdict_cache=verdict_cache)
+    input.isSuitable(filename, fatal=True)
+    return input.result
+
+
+def _feed(parser, buffer, start, end):
+    for offset in range(start, end, FEED_SIZE):
+        parser.feed(buffer[offset:min(offset + FEED_SIZE, end)])
+
+
+def _make_parser(target, accept_changes):
+    if accept_changes:
+        return etree.XMLParser(target=AcceptChangesTarget(target),
+                               huge_tree=True)
+    return etree.XMLParser(target=target, huge_tree=True)
+
+
+def split_file(filename, chunk_size, accept_changes):
+    """Split the body content of a file into chunks of whole body elements.
+
+    Returns:
+        (span, chunks, outside) tuple of the BodySpan, the (start, end) byte
+        ranges of the chunks, see split_body, and the parse_outside_body
+        result, or None if the body is not found or the rest does not parse.
+    """
+    with open_buffer(filename) as buffer:
+        span = find_body(buffer)
+        if span is None:
+            return None
+        chunks = split_body(buffer, span.start, span.end, chunk_size)
+        outside = parse_outside_body(buffer, span, accept_changes)
+    if outside is None:
+        return None
+    return span, chunks, outside
+
+
+def parse_outside_body(buffer, span, accept_changes):
+    """Parse all of a buffer but the body content of its BodySpan.
+
+    Returns:
+        (styles, namespaces, has_trackchanges) tuple of the StyleIndex and
+        the PruningTarget attributes, or None if it does not parse.
+    """
+    builder = RunsBuilder()
+    target = PruningTarget(keep_parts=None, builder=builder)
+    parser = _make_parser(target, accept_changes)
+    try:
+        _feed(parser, buffer, 0, span.start)
+        _feed(parser, buffer, span.end, len(buffer))
+        parser.close()
+    except (etree.XMLSyntaxError, UnicodeDecodeError):
+        return None
+    return builder.styles, target.namespaces, target.has_trackchanges
+
+
+def extract_chunk(filename, start, end, head, tail, styles, accept_changes):
+    """Extract the Runs of a byte range of whole body elements of a file.
+
+    The range is parsed within the head and tail of its BodySpan, with the
+    styles of parse_outside_body. It may run in a worker process, hence None
+    rather than an lxml exception if the range does not parse.
+
+    Returns:
+        (paragraphs, namespaces, has_trackchanges) tuple, or None.
+    """
+    target = PruningTarget(keep_parts=None, builder=RunsBuilder(styles=styles))
+    parser = _make_parser(target, accept_changes)
+    try:
+        parser.feed(head)
+        with open_buffer(filename) as buffer:
+            _feed(parser, buffer, start, end)
+        parser.feed(tail)
+        paragraphs = parser.close()
+    except (etree.XMLSyntaxError, UnicodeDecodeError):
+        return None
+    return paragraphs, target.namespaces, target.has_trackchanges
@@ -0,0 +1,62 @@
+<?xml version="1.0" encoding="utf-8"?>
+<!--
+Runs of the paragraphs of the document body, see helpers/runs.py.
+
+Each selected w:p becomes a p element of r elements, one per w:r child with
+w:t descendants. Flags are "1" or "0": i is italic and c is small caps from
+the w:rPr of the run. The optional s attributes are the w:pStyle of the
+paragraph and the w:rStyle of the run. The text of a run is that of its w:t
+children up to their first child node that is not text.
+
+Param all: 0 selects paragraphs with w:i and w:t descendants, as
+XMLAsInput.iter_paragraphs does, 1 selects every paragraph with w:t and
+flags the w:i descendants of each in its i attribute.
+
+Copyright: Ian Vermes 2019
+-->
+<xsl:stylesheet version="1.0"
+    xmlns:xsl="http://www.w3.org/1999/XSL/Transform"
+    xmlns:pkg="http://schemas.microsoft.com/office/2006/xmlPackage"
+    xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    exclude-result-prefixes="pkg w">
+
+  <xsl:output method="xml" encoding="utf-8" indent="no"/>
+  <xsl:param name="all" select="0"/>
+
+  <xsl:variable name="body"
+      select="(/pkg:package/pkg:part[@pkg:name = '/word/document.xml']/pkg:xmlData/w:document/w:body
+              | /w:document/w:body)[1]"/>
+
+  <xsl:template match="/">
+    <paragraphs>
+      <xsl:for-each select="$body//w:p[.//w:t][$all = 1 or .//w:i]">
+        <p>
+          <xsl:if test="$all = 1">
+            <xsl:attribute name="i">
+              <xsl:value-of select="number(boolean(.//w:i))"/>
+            </xsl:attribute>
+          </xsl:if>
+          <xsl:if test="w:pPr/w:pStyle">
+            <xsl:attribute name="s">
+              <xsl:value-of select="w:pPr/w:pStyle/@w:val"/>
+            </xsl:attribute>
+          </xsl:if>
+          <xsl:for-each select="w:r[.//w:t]">
+            <r i="{number(boolean(w:rPr/w:i))}"
+               c="{number(boolean(w:rPr/w:smallCaps))}">
+              <xsl:if test="w:rPr/w:rStyle">
+                <xsl:attribute name="s">
+                  <xsl:value-of select="w:rPr/w:rStyle/@w:val"/>
+                </xsl:attribute>
+              </xsl:if>
+              <xsl:for-each select="w:t">
+                <xsl:value-of select="node()[1][self::text()]"/>
+              </xsl:for-each>
+            </r>
+          </xsl:for-each>
+        </p>
+      </xsl:for-each>
+    </paragraphs>
+  </xsl:template>
+
+</xsl:stylesheet>
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Split the conversion of many or huge input files into work units.
+
+The units of a shard are JSON files in a work directory, on a filesystem that
+is shared by every host. Each unit runs on its own, on any host and in any
+order, and writes its partial output, a JSON line per paragraph, and its
+diagnostic report next to it. The merge combines them in the order of the
+units, hence its result is the same however the units were run.
+
+Other funcs:
+    read_manifest
+    shard_manifest
+    shard_file
+    run_unit
+    merge_units
+
+Copyright: Ian Vermes 2019
+"""
+
+from helpers.xml import (XMLAsInput, CHUNK_SIZE, SUITABLE, UNSUITABLE,
+                         TRACKCHANGES, open_buffer, find_body, verdict_error)
+from helpers import runs
+from helpers import paragraphs
+from helpers import logging as pkg_logging
+import exceptions
+
+import bisect
+import contextlib
+import functools
+import itertools
+import json
+import os
+import uuid
+from collections import Counter
+
+SHARD_VERSION = 1
+SHARD_BASENAME = "shard.json"
+UNIT_SUFFIX = ".unit.json"
+OUTPUT_SUFFIX = ".jsonl"
+REPORT_SUFFIX = ".report.json"
+MERGED_BASENAME = "merged"
+
+
+def read_manifest(filename):
+    """Return the input filenames of a manifest file, one per line.
+
+    Blank lines and lines that start with '#' are skipped. Relative filenames
+    are relative to the directory of the manifest.
+    """
+    dirname = os.path.dirname(os.path.abspath(filename))
+    with open(filename, encoding="utf8") as handle:
+        lines = [line.strip() for line in handle]
+    return [os.path.join(dirname, line) for line in lines
+            if line and not line.startswith("#")]
+
+
+def shard_manifest(filenames, workdir, units, accept_changes=False):
+    """Write the work units of many input files, returns their filenames.
+
+    Each unit has a contiguous run of the input files, of about the same
+    total size as the others. There are no more units than files.
+
+    Kwarg:
+        accept_changes(bool): False by default, see runs.extract.
+    """
+    filenames = [os.path.abspath(f) for f in filenames]
+    bounds = _partition([os.path.getsize(f) for f in filenames], units)
+    units = [{"kind": "files", "files": filenames[start:stop]}
+             for start, stop in bounds]
+    return _write_shard(workdir, units, accept_changes)
+
+
+def shard_file(filename, workdir, units, chunk_size=CHUNK_SIZE,
+               accept_changes=False):
+    """Write the work units of one huge input file, returns their filenames.
+
+    Each unit has a contiguous range of whole body elements, hence of
+    paragraphs, of about the same size as the others, split as for
+    runs.extract_chunks. The file is checked for track changes outside the
+    body, the namespaces are only checked by the merge. A file whose body is
+    not found is a single unit of the whole file.
+
+    Kwargs:
+        chunk_size(int): Least bytes of body content per split.
+        accept_changes(bool): False by default, see runs.extract.
+    Exceptions:
+        InputFileError
+    """
+    filename = os.path.abspath(filename)
+    with open_buffer(filename) as buffer:
+        if not XMLAsInput().sniff(buffer):
+            raise verdict_error(filename, UNSUITABLE)
+    split = runs.split_file(filename, chunk_size, accept_changes)
+    if split is None or not split[1]:
+        return shard_manifest([filename], workdir, 1, accept_changes)
+    span, chunks, (styles, namespaces, has_trackchanges) = split
+    if has_trackchanges:
+        raise verdict_error(filename, TRACKCHANGES)
+    stat = os.stat(filename)
+    bounds = _partition([end - start for start, end in chunks], units)
+    units = [{"kind": "range", "files": [filename],
+              "start": chunks[first][0], "end": chunks[last - 1][1],
+              "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+             for first, last in bounds]
+    return _write_shard(workdir, units, accept_changes)
+
+
+def run_unit(filename):
+    """Run a work unit, returns the filename of its diagnostic report.
+
+    The partial output has a JSON line per paragraph of the unit, see
+    paragraphs.serialize_records, with the input filename. The report has
+    the verdict, number of paragraphs, labels and warnings of each input
+    file. It is written last, hence a unit is complete once it exists. An
+    input file that is rejected does not stop the unit, it is reported.
+
+    Exceptions:
+        ShardError
+    """
+    logger = pkg_logging.getLogger()
+    unit = _load_json(filename)
+    output, report_filename = _unit_outputs(filename)
+    files = []
+    with _atomic_open(output) as handle:
+        for input_filename in unit["files"]:
+            entry = {"file": input_filename}
+            try:
+                if unit["kind"] == "range":
+                    paragraph_runs, namespaces = _extract_range(filename,
+                                                                unit)
+                    entry["namespaces"] = namespaces
+                else:
+                    paragraph_runs = runs.extract(
+                        input_filename, use_sidecar=False, backend="events",
+                        accept_changes=unit["accept_changes"])
+            except exceptions.InputFileTrackChangesError:
+                entry["verdict"] = TRACKCHANGES
+            except exceptions.InputFileError:
+                entry["verdict"] = UNSUITABLE
+            else:
+                entry["verdict"] = SUITABLE
+                counts = Counter()
+                lines = paragraphs.chain_stages(paragraph_runs, (
+                    paragraphs.select_paragraphs, paragraphs.extract_runs,
+                    functools.partial(paragraphs.classify_records,
+                                      counts=counts),
+                    paragraphs.process_records, _count_warnings(entry),
+                    paragraphs.validate_records,
+                    functools.partial(paragraphs.serialize_records,
+                                      extra={"file": input_filename})))
+                for line in lines:
+                    handle.write(line + "\n")
+                entry["paragraphs"] = len(paragraph_runs)
+                entry["counts"] = dict(counts)
+            logger.info(f"Unit {unit['unit']} {entry['verdict']}: "
+                        f"{input_filename}")
+            files.append(entry)
+    report = {"version": SHARD_VERSION, "shard": unit["shard"],
+              "unit": unit["unit"], "files": files}
+    with _atomic_open(report_filename) as handle:
+        json.dump(report, handle, indent=1, sort_keys=True)
+    return report_filename
+
+
+def merge_units(workdir, output_filename=None, report_filename=None):
+    """Combine the outputs and reports of the work units of a shard.
+
+    The lines of the partial outputs are joined in the order of the units,
+    without those of rejected input files, and the paragraphs of an input
+    file split by shard_file are numbered again from 1. The report has the
+    verdict, number of paragraphs and labels of each input file, in order,
+    and their totals.
+
+    Kwargs:
+        output_filename(str, None): By default 'merged.jsonl' in workdir.
+        report_filename(str, None): By default 'merged.report.json' in
+            workdir.
+    Returns:
+        (output_filename, report_filename) tuple.
+    Exceptions:
+        ShardError: If a unit is missing, incomplete or of another shard.
+    """
+    merged = os.path.join(workdir, MERGED_BASENAME)
+    if output_filename is None:
+        output_filename = merged + OUTPUT_SUFFIX
+    if report_filename is None:
+        report_filename = merged + REPORT_SUFFIX
+    shard = _load_json(os.path.join(workdir, SHARD_BASENAME))
+    unit_filenames = [os.path.join(workdir, basename)
+                      for basename in shard["units"]]
+    files = {}
+    for unit_filename in unit_filenames:
+        report = _load_json(_unit_outputs(unit_filename)[1], unit_filename)
+        if report["shard"] != shard["shard"]:
+            raise exceptions.ShardError(detail=unit_filename)
+        for entry in report["files"]:
+            _merge_entry(files.setdefault(entry["file"], {}), entry)
+    for entry in files.values():
+        namespaces = entry.pop("namespaces", None)
+        if (namespaces is not None and entry["verdict"] == SUITABLE
+                and not XMLAsInput().namespace_verdict(namespaces)):
+            entry["verdict"] = UNSUITABLE
+    numbers = Counter()
+    with _atomic_open(output_filename) as handle:
+        for unit_filename in unit_filenames:
+            with open(_unit_outputs(unit_filename)[0], encoding="utf8") as lines:
+                for line in lines:
+                    data = json.loads(line)
+                    if files[data["file"]]["verdict"] != SUITABLE:
+                        continue
+                    numbers[data["file"]] += 1
+                    data["number"] = numbers[data["file"]]
+                    handle.write(json.dumps(data, ensure_ascii=False) + "\n")
+    counts, verdicts = Counter(), Counter()
+    for entry in files.values():
+        if entry["verdict"] != SUITABLE:
+            entry.update(paragraphs=0, counts={}, warnings=0)
+        counts.update(entry["counts"])
+        verdicts[entry["verdict"]] += 1
+    report = {"version": SHARD_VERSION, "units": len(unit_filenames),
+              "files": list(files.values()), "counts": dict(counts),
+              "verdicts": dict(verdicts)}
+    with _atomic_open(report_filename) as handle:
+        json.dump(report, handle, indent=1, sort_keys=True)
+    return output_filename, report_filename
+
+
+def _partition(sizes, units):
+    # Contiguous (start, stop) ranges of sizes, of about the same total.
+    units = max(1, min(units, len(sizes)))
+    cumulative = list(itertools.accumulate(sizes))
+    total = cumulative[-1] if cumulative else 0
+    stops = []
+    for k in range(1, units):
+        stop = bisect.bisect_left(cumulative, total * k / units) + 1
+        lowest = (stops[-1] if stops else 0) + 1
+        highest = len(sizes) - (units - k)
+        stops.append(min(max(stop, lowest), highest))
+    stops.append(len(sizes))
+    return list(zip([0] + stops[:-1], stops))
+
+
+def _write_shard(workdir, units, accept_changes):
+    # A new shard id, so that outputs of an older shard are never merged.
+    shard_id = uuid.uuid4().hex
+    os.makedirs(workdir, exist_ok=True)
+    basenames = []
+    for number, unit in enumerate(units):
+        basename = f"unit-{number:04d}{UNIT_SUFFIX}"
+        unit.update(version=SHARD_VERSION, shard=shard_id, unit=number,
+                    units=len(units), accept_changes=accept_changes)
+        with _atomic_open(os.path.join(workdir, basename)) as handle:
+            json.dump(unit, handle, indent=1, sort_keys=True)
+        basenames.append(basename)
+    shard = {"version": SHARD_VERSION, "shard": shard_id, "units": basenames}
+    with _atomic_open(os.path.join(workdir, SHARD_BASENAME)) as handle:
+        json.dump(shard, handle, indent=1, sort_keys=True)
+    return [os.path.join(workdir, basename) for basename in basenames]
+
+
+def _extract_range(filename, unit):
+    # The Runs and namespaces of the range, with those outside the body.
+    input_filename = unit["files"][0]
+    stat = os.stat(input_filename)
+    if (stat.st_size, stat.st_mtime_ns) != (unit["size"], unit["mtime_ns"]):
+        raise exceptions.ShardError(detail=filename)
+    accept_changes = unit["accept_changes"]
+    with open_buffer(input_filename) as buffer:
+        span = find_body(buffer)
+        outside = runs.parse_outside_body(buffer, span, accept_changes)
+    styles, namespaces, has_trackchanges = outside
+    result = runs.extract_chunk(input_filename, unit["start"], unit["end"],
+                                 span.head, span.tail, styles, accept_changes)
+    if result is None:  # Not whole elements, unlike the split of the shard.
+        raise exceptions.ShardError(detail=filename)
+    paragraph_runs, chunk_namespaces, chunk_trackchanges = result
+    if has_trackchanges or chunk_trackchanges:
+        raise verdict_error(input_filename, TRACKCHANGES)
+    namespaces = list(dict.fromkeys(namespaces + chunk_namespaces))
+    return paragraph_runs, namespaces
+
+
+def _count_warnings(entry):
+    # Stage: count the records of entries that PreProcessed warned about.
+    entry["warnings"] = 0
+
+    def stage(records):
+        for record in records:
+            if record.error is not None:
+                entry["warnings"] += 1
+            yield record
+    return stage
+
+
+def _merge_entry(merged, entry):
+    # The entries of a file split by shard_file are in the order of its units.
+    if not merged:
+        merged.update(file=entry["file"], verdict=SUITABLE, paragraphs=0,
+                      counts={}, warnings=0)
+    if entry["verdict"] != SUITABLE:
+        if merged["verdict"] == SUITABLE:
+            merged["verdict"] = entry["verdict"]
+        return
+    merged["paragraphs"] += entry["paragraphs"]
+    merged["warnings"] += entry["warnings"]
+    merged["counts"] = dict(Counter(merged["counts"]) + Counter(entry["counts"]))
+    if "namespaces" in entry:
+        merged.setdefault("namespaces", []).extend(
+            tuple(pair) for pair in entry["namespaces"])
+
+
+def _unit_outputs(filename):
+    # The partial output and report filenames of a unit.
+    stem = filename[:-len(UNIT_SUFFIX)]
+    return stem + OUTPUT_SUFFIX, stem + REPORT_SUFFIX
+
+
+def _load_json(filename, unit_filename=None):
+    # A missing or invalid file is an error of the unit, or of the shard.
+    try:
+        with open(filename, encoding="utf8") as handle:
+            data = json.load(handle)
+        if data.get("version") != SHARD_VERSION:
+            raise ValueError(data.get("version"))
+    except (OSError, ValueError, AttributeError):
+        raise exceptions.ShardError(detail=unit_filename or filename) from None
+    return data
+
+
+@contextlib.contextmanager
+def _atomic_open(filename):
+    # Write then rename so that readers never see a partial file.
+    partial = filename + ".partial"
+    try:
+        with open(partial, "w", encoding="utf8") as handle:
+            yield handle
+    except BaseException:
+        os.remove(partial)
+        raise
+    os.replace(partial, filename)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Style resolution for Recompose.
+
+Formatting - namedtuple of the italic and small caps flags of a run.
+StyleIndex - class that resolves the formatting of paragraph and character
+    styles once per document.
+
+Copyright: Ian Vermes 2019
+"""
+
+from helpers.xml import SAMPLE_URIS
+
+from collections import namedtuple
+
+
+Formatting = namedtuple("Formatting", "italic smallcaps")
+
+NO_FORMATTING = Formatting(False, False)
+
+# w:val values that switch a toggle property such as w:i off.
+OFF_VALUES = frozenset(["0", "false", "off"])
+
+
+class StyleIndex(object):
+    """Effective italic and small caps formatting of every style ID.
+
+    The w:style elements of the styles part are read once, then every
+    paragraph (w:pStyle) and character (w:rStyle) style is resolved along its
+    w:basedOn chain, so formatting is a couple of dict lookups per run. A
+    property set by the character style takes precedence over that of the
+    paragraph style, paragraphs without w:pStyle have the default paragraph
+    style.
+
+    It is a parser target, the events of w:style elements are fed to the
+    start and end methods and all other events are ignored.
+
+    Kwarg:
+        w_uri(str): The URI of the w prefix.
+    Methods:
+        add
+        formatting
+        start
+        end
+        close: returns the index itself.
+    Class Methods:
+        from_tree
+    Attr:
+        default_paragraph(str, None): ID of the default paragraph style.
+        has_formatting(bool): Does any style give italic or small caps?
+    """
+
+    STYLE_TYPES = frozenset(["paragraph", "character"])
+
+    def __init__(self, w_uri=SAMPLE_URIS["w"]):
+        w = "{%s}" % w_uri
+        self._tag_style, self._tag_based_on = f"{w}style", f"{w}basedOn"
+        self._tag_rpr = f"{w}rPr"
+        self._tag_i, self._tag_caps = f"{w}i", f"{w}smallCaps"
+        self._attr_id, self._attr_type = f"{w}styleId", f"{w}type"
+        self._attr_default, self._attr_val = f"{w}default", f"{w}val"
+        self.default_paragraph = None
+        self._definitions = {}  # Style ID: [type, basedOn, italic, smallcaps]
+        self._paragraph = None  # Style ID: Formatting
+        self._character = None  # Style ID: (italic, smallcaps), None if unset
+        self._depth = 0
+        self._style = None  # Definition and depth while in a w:style
+        self._in_rpr = False
+
+    def __len__(self):
+        return len(self._definitions)
+
+    def __contains__(self, style_id):
+        return style_id in self._definitions
+
+    @classmethod
+    def from_tree(cls, tree, w_uri=SAMPLE_URIS["w"]):
+        """Make the index of the w:style elements of a tree or element."""
+        index = cls(w_uri)
+        for style in tree.iter(index._tag_style):
+            index.start(style.tag, style.attrib)
+            for child in style.iterchildren(index._tag_based_on,
+                                            index._tag_rpr):
+                index.start(child.tag, child.attrib)
+                if child.tag == index._tag_rpr:
+                    for prop in child.iterchildren(index._tag_i,
+                                                   index._tag_caps):
+                        index.start(prop.tag, prop.attrib)
+                        index.end(prop.tag)
+                index.end(child.tag)
+            index.end(style.tag)
+        return index
+
+    def add(self, style_id, style_type="paragraph", based_on=None,
+            italic=None, smallcaps=None):
+        """Add a style definition, None properties are inherited."""
+        self._definitions[style_id] = [style_type, based_on, italic, smallcaps]
+        self._paragraph = self._character = None
+
+    @property
+    def has_formatting(self):
+        if self._paragraph is None:
+            self._resolve_all()
+        return (any(any(f) for f in self._paragraph.values())
+                or any(any(f) for f in self._character.values()))
+
+    def formatting(self, paragraph_style=None, run_style=None):
+        """Get the Formatting that styles give a run, unknown IDs give none.
+
+        >>> index = StyleIndex()
+        >>> index.add("Title", italic=True)
+        >>> index.add("Upright", "character", italic=False, smallcaps=True)
+        >>> index.formatting("Title")
+        Formatting(italic=True, smallcaps=False)
+        >>> index.formatting("Title", "Upright")
+        Formatting(italic=False, smallcaps=True)
+        >>> index.formatting(None, "Unknown")
+        Formatting(italic=False, smallcaps=False)
+        """
+        if self._paragraph is None:
+            self._resolve_all()
+        if paragraph_style is None:
+            paragraph_style = self.default_paragraph
+        paragraph = self._paragraph.get(paragraph_style, NO_FORMATTING)
+        if run_style is None:
+            return paragraph
+        character = self._character.get(run_style)
+        if character is None:
+            return paragraph
+        italic, smallcaps = character
+        return Formatting(paragraph.italic if italic is None else italic,
+                          paragraph.smallcaps if smallcaps is None else smallcaps)
+
+    def _resolve_all(self):
+        resolved = {}
+        for style_id in self._definitions:
+            self._resolve(style_id, resolved, set())
+        self._paragraph, self._character = {}, {}
+        for style_id, (italic, smallcaps) in resolved.items():
+            if self._definitions[style_id][0] == "character":
+                self._character[style_id] = (italic, smallcaps)
+            else:
+                self._paragraph[style_id] = Formatting(bool(italic),
+                                                       bool(smallcaps))
+
+    def _resolve(self, style_id, resolved, seen):
+        # Every style is resolved once, then looked up by those based on it.
+        try:
+            return resolved[style_id]
+        except KeyError:
+            pass
+        definition = self._definitions.get(style_id)
+        if definition is None or style_id in seen:  # Unknown, or a cycle.
+            return (None, None)
+        seen.add(style_id)
+        _, based_on, italic, smallcaps = definition
+        if based_on is not None and (italic is None or smallcaps is None):
+            inherited = self._resolve(based_on, resolved, seen)
+            if italic is None:
+                italic = inherited[0]
+            if smallcaps is None:
+                smallcaps = inherited[1]
+        resolved[style_id] = result = (italic, smallcaps)
+        return result
+
+    def start(self, tag, attrib=None, nsmap=None):
+        self._depth += 1
+        style = self._style
+        if tag == self._tag_style:
+            style_type = attrib.get(self._attr_type, "paragraph")
+            style_id = attrib.get(self._attr_id)
+            if style_type in self.STYLE_TYPES and style_id is not None:
+                self._style = ([style_id, style_type, None, None, None],
+                               self._depth)
+                if (style_type == "paragraph"
+                        and attrib.get(self._attr_default) in ("1", "true")):
+                    self.default_paragraph = style_id
+        elif style is None:
+            return
+        elif self._depth == style[1] + 1:
+            if tag == self._tag_based_on:
+                style[0][2] = attrib.get(self._attr_val)
+            self._in_rpr = tag == self._tag_rpr
+        elif (self._in_rpr and self._depth == style[1] + 2
+              and tag in (self._tag_i, self._tag_caps)):
+            value = attrib.get(self._attr_val, "1") not in OFF_VALUES
+            style[0][3 if tag == self._tag_i else 4] = value
+
+    def end(self, tag):
+        style = self._style
+        if style is not None and self._depth == style[1]:
+            self.add(*style[0])
+            self._style = None
+            self._in_rpr = False
+        self._depth -= 1
+
+    def close(self):
+        return self
@@ -4,6 +4,21 @@
 
 XPaths - class that maps namespaced xpath queries to functions
 XMLAsInput - class for verifying suitablity of an XML file for Recompose
+PruningTarget - parser target that only builds the document package part
+AcceptChangesTarget - parser target that accepts tracked changes as read
+TriageTarget - parser target that builds nothing and stops at a revision mark
+VerdictCache - class that keeps the verdicts of input files between runs
+ParagraphSelector - class that lazily finds the paragraphs of the body
+BodySpan - namedtuple of the byte range of the body content and its context
+
+Other funcs:
+    open_buffer
+    load_tree
+    file_digest
+    verdict_error
+    find_body
+    split_body
+    triage_files
 
 Copyright: Ian Vermes 2019
 """
@@ -14,7 +29,13 @@ import exceptions
 from lxml import etree
 
 import os
-from collections import UserDict
+import re
+import json
+import mmap
+import hashlib
+import contextlib
+import concurrent.futures
+from collections import UserDict, namedtuple
 
 EXPECTED_PREFIXES = set(['xml', 'pkg', 'wps', 'wne', 'wpi', 'wpg', 'w15', 'w14',
                          'w', 'w10', 'wp', 'wp14', 'v', 'm', 'r', 'o', 'mv',
@@ -30,9 +51,158 @@ UNPREFIXED_URIS = {"http://schemas.openxmlformats.org/package/2006/relationships
                    "http://schemas.openxmlformats.org/officeDocument/2006/extended-properties",
                    "http://schemas.openxmlformats.org/officeDocument/2006/bibliography"}
 
+XML_URI = "http://www.w3.org/XML/1998/namespace"
+DOCUMENT_PART_NAMES = frozenset(["/word/document.xml"])
+PARAGRAPH_SCOPES = ("body", "package")
+SUITABLE = "suitable"
+UNSUITABLE = "unsuitable"
+TRACKCHANGES = "trackchanges"
+TRIAGE_VERDICTS = (SUITABLE, UNSUITABLE, TRACKCHANGES)
+
+BUFFER_TYPES = (bytes, mmap.mmap)
+FEED_SIZE = 1 << 20  # Bytes fed to the parser at a time.
+SNIFF_SIZE = 1 << 16  # Bytes searched for the first lines of a file.
+CHUNK_SIZE = 1 << 22  # Least bytes of whole body elements per chunk.
+
 FIND_NAMESPACES_GET_PREFIX_URI = etree.XPath("//namespace::*")
 QUERY_TRACKCHANGES_BY_PREDICATE = "//w:p//*[w:ins or w:del or @w:author]"
 
+BodySpan = namedtuple("BodySpan", "start end head tail")
+
+_RGX_PACKAGE_TAG = re.compile(rb"<pkg:package(?=[\s/>])[^>]*>")
+_RGX_DOCUMENT_PART_TAG = re.compile(
+    rb"<pkg:part\s[^>]*pkg:name=\"/word/document\.xml\"[^>]*>")
+_RGX_START_TAGS = {name: re.compile(rb"<%s(?=[\s/>])[^>]*>" % name)
+                   for name in (b"pkg:xmlData", b"w:document", b"w:body")}
+# Elements that may hold w:p, whether a top level element of the body or not.
+_RGX_BLOCK_TAG = re.compile(
+    rb"<(/?)w:(?:p|tbl|sdt|customXml)(?=[\s/>])[^>]*?(/?)>")
+
+
+@contextlib.contextmanager
+def open_buffer(filename):
+    """Context manager: read-only memory map of a file opened in binary mode.
+
+    Empty files can not be mapped and are read as empty bytes instead.
+    """
+    with open(filename, "rb") as handle:
+        try:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            buffer = handle.read()
+        try:
+            yield buffer
+        finally:
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+
+
+def load_tree(source, parser=None):
+    """Parse a buffer (bytes or mmap) or a file object into a tree.
+
+    Buffers are fed to the parser in slices, so there is no text decoding
+    by Python and no intermediate copy of the whole file.
+    """
+    if isinstance(source, BUFFER_TYPES):
+        if parser is None:
+            parser = etree.XMLParser()
+        for offset in range(0, len(source), FEED_SIZE):
+            parser.feed(source[offset:offset + FEED_SIZE])
+        result = parser.close()
+    else:
+        try:
+            source.seek(0, 0)
+            result = etree.parse(source, parser)
+        finally:
+            source.seek(0, 0)
+    # Parser targets (and parser.close) return the root element.
+    if isinstance(result, etree._Element):
+        result = result.getroottree()
+    return result
+
+
+def file_digest(filename, blocksize=1 << 20):
+    """SHA-1 digest of the content of a file."""
+    sha1 = hashlib.sha1()
+    with open(filename, "rb") as handle:
+        for block in iter(lambda: handle.read(blocksize), b""):
+            sha1.update(block)
+    return sha1.digest()
+
+
+def verdict_error(filename, verdict):
+    """The coded exception of an UNSUITABLE or TRACKCHANGES verdict."""
+    detail = os.path.basename(filename)
+    if verdict == TRACKCHANGES:
+        return exceptions.InputFileTrackChangesError(detail=detail)
+    else:
+        return exceptions.InputFileError(detail=detail)
+
+
+def find_body(buffer):
+    """Find the byte range of the w:body content of the document part.
+
+    The start tags are found by byte scanning, nothing is parsed. head holds
+    the start tags of the w:body and its ancestors, with their namespace
+    declarations, and tail their end tags, hence head + whole elements of the
+    content + tail is a document by itself.
+
+    Returns:
+        BodySpan, or None if there is no such w:body.
+    """
+    matches, names = [], [b"w:document", b"w:body"]
+    position = 0
+    package = _RGX_PACKAGE_TAG.search(buffer, 0, SNIFF_SIZE)
+    if package is not None:
+        part = _RGX_DOCUMENT_PART_TAG.search(buffer, package.end())
+        if part is None:
+            return None
+        matches = [package, part]
+        names = [b"pkg:package", b"pkg:part", b"pkg:xmlData"] + names
+        position = part.end()
+    for name in names[len(matches):]:
+        match = _RGX_START_TAGS[name].search(buffer, position)
+        if match is None or match.group().endswith(b"/>"):
+            return None
+        matches.append(match)
+        position = match.end()
+    end = buffer.find(b"</w:body>", position)
+    if end < 0:
+        return None
+    head = b"".join(match.group() for match in matches)
+    tail = b"".join(b"</%s>" % name for name in reversed(names))
+    return BodySpan(position, end, head, tail)
+
+
+def split_body(buffer, start, end, size=CHUNK_SIZE):
+    """Split a byte range of body content into chunks of whole elements.
+
+    A chunk ends after the end tag of a top level w:p, w:tbl, w:sdt or
+    w:customXml once it is at least size bytes long, the last chunk ends at
+    end. Tags are not told apart from the text of comments, hence a chunk is
+    only likely to be whole elements until it is parsed.
+
+    Returns:
+        list of (start, end) tuples, in document order and without gaps.
+    """
+    chunks = []
+    depth = 0
+    chunk_start = start
+    for match in _RGX_BLOCK_TAG.finditer(buffer, start, end):
+        closing, empty = match.groups()
+        if empty:
+            continue
+        elif not closing:
+            depth += 1
+            continue
+        depth -= 1
+        if not depth and match.end() - chunk_start >= size:
+            chunks.append((chunk_start, match.end()))
+            chunk_start = match.end()
+    if chunk_start < end or not chunks:
+        chunks.append((chunk_start, end))
+    return chunks
+
 
 class XPaths(UserDict):
     """Dictionary that maps xpath queries to etree.XPath with shared namespaces.
@@ -48,6 +218,8 @@ class XPaths(UserDict):
         get_xpath: For an xpath query, fetch a etree.XPath function from the
                    cache or compiler. Memoizes the function if necessary.
         get: Convenience method of get_xpath method.
+        copy: New XPaths with the same nsmap and queries compiled afresh,
+              e.g. for another thread.
     Attr:
         nsmap(dict): XML namespace prefix -> URI.
     """
@@ -82,6 +254,15 @@ class XPaths(UserDict):
     def get(self, query):
         return self.get_xpath(query)
 
+    def copy(self):
+        # A compiled etree.XPath is not to be shared between threads.
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone.data = {}
+        for query in list(self.data):
+            clone.add_xpath(query)
+        return clone
+
     @staticmethod
     def __get_tree(source):
         def tree2tree(source):
@@ -126,30 +307,313 @@ class XPaths(UserDict):
         raise NotImplementedError(self.__notimplemented)
 
 
+class PruningTarget(object):
+    """Parser target that builds a tree of only the wanted pkg:part elements.
+
+    Every other part, e.g. styles, fonts, theme and base64 binary data, is
+    skipped as it is read and never becomes a subtree. While parsing, the
+    target also gathers what the namespace and track changes checks need.
+
+    Kwarg:
+        keep_parts(set, None): pkg:name values of the parts to build, None to
+            build all parts.
+        builder(None): etree.TreeBuilder by default, otherwise any object with
+            the TreeBuilder interface that receives the events of kept parts.
+    Attr:
+        namespaces(list): (prefix, uri) of every namespace declaration.
+        has_trackchanges(bool): Same verdict as QUERY_TRACKCHANGES_BY_PREDICATE.
+    """
+
+    _PKG_PART = "{%s}part" % SAMPLE_URIS["pkg"]
+    _PKG_NAME = "{%s}name" % SAMPLE_URIS["pkg"]
+
+    def __init__(self, keep_parts=DOCUMENT_PART_NAMES, builder=None):
+        self.keep_parts = keep_parts
+        self.namespaces = [("xml", XML_URI)]
+        self.has_trackchanges = False
+        self._builder = etree.TreeBuilder() if builder is None else builder
+        self._skip_depth = 0
+        self._w_uri = None
+        # Per open element: (is w:p, number of w:p ancestors-or-self)
+        self._stack = [(False, 0)]
+
+    def start_ns(self, prefix, uri):
+        prefix = prefix or None
+        self.namespaces.append((prefix, uri))
+        if prefix == "w":
+            self._w_uri = uri
+
+    def start(self, tag, attrib, nsmap=None):
+        self._check_trackchanges(tag, attrib)
+        if self._skip_depth:
+            self._skip_depth += 1
+        elif (tag == self._PKG_PART and self.keep_parts is not None
+              and attrib.get(self._PKG_NAME) not in self.keep_parts):
+            self._skip_depth = 1
+        else:
+            nsmap = {(p or None): uri for p, uri in (nsmap or {}).items()}
+            self._builder.start(tag, attrib, nsmap)
+
+    def end(self, tag):
+        self._stack.pop()
+        if self._skip_depth:
+            self._skip_depth -= 1
+        else:
+            self._builder.end(tag)
+
+    def data(self, data):
+        if not self._skip_depth:
+            self._builder.data(data)
+
+    def comment(self, text):
+        if not self._skip_depth:
+            self._builder.comment(text)
+
+    def pi(self, target, data=None):
+        if not self._skip_depth:
+            self._builder.pi(target, data)
+
+    def close(self):
+        return self._builder.close()
+
+    def _check_trackchanges(self, tag, attrib):
+        w = "{%s}" % self._w_uri
+        parent_is_p, parent_p_count = self._stack[-1]
+        is_p = tag == f"{w}p"
+        self._stack.append((is_p, parent_p_count + is_p))
+        if self.has_trackchanges or not parent_p_count:
+            return
+        # Element is below a w:p: check @w:author, and w:ins or w:del whose
+        # parent is itself below a w:p.
+        if f"{w}author" in attrib:
+            self.has_trackchanges = True
+        elif tag in (f"{w}ins", f"{w}del"):
+            self.has_trackchanges = parent_p_count - parent_is_p > 0
+
+
+class AcceptChangesTarget(object):
+    """Parser target that accepts all tracked changes as the file is read.
+
+    Deleted content (w:del, w:moveFrom), the previous properties of the
+    w:*PrChange elements and the other revision marks are dropped, inserted
+    content (w:ins, w:moveTo) is unwrapped and the w:author and w:date
+    attributes are stripped, then the events go on to the next target. A
+    deleted paragraph mark is dropped, its paragraph is not joined to the
+    next one. Each event costs a set lookup, hence the cost is linear.
+
+    Kwarg:
+        target(None): etree.TreeBuilder by default, otherwise any parser
+            target, e.g. a PruningTarget.
+        w_uri(str): The URI of the w prefix.
+    Attr:
+        accepted(int): Number of revision elements dropped or unwrapped.
+    """
+
+    DROP_TAGS = ("del", "moveFrom", "rPrChange", "pPrChange", "sectPrChange",
+                 "tblPrChange", "tblPrExChange", "trPrChange", "tcPrChange",
+                 "tblGridChange", "numberingChange", "cellIns", "cellDel",
+                 "cellMerge", "moveFromRangeStart", "moveFromRangeEnd",
+                 "moveToRangeStart", "moveToRangeEnd",
+                 "customXmlInsRangeStart", "customXmlInsRangeEnd",
+                 "customXmlDelRangeStart", "customXmlDelRangeEnd",
+                 "customXmlMoveFromRangeStart", "customXmlMoveFromRangeEnd",
+                 "customXmlMoveToRangeStart", "customXmlMoveToRangeEnd")
+    UNWRAP_TAGS = ("ins", "moveTo")
+    REVISION_ATTRIBUTES = ("author", "date")
+
+    def __init__(self, target=None, w_uri=SAMPLE_URIS["w"]):
+        w = "{%s}" % w_uri
+        self._target = etree.TreeBuilder() if target is None else target
+        self._drop = frozenset(w + tag for tag in self.DROP_TAGS)
+        self._unwrap = frozenset(w + tag for tag in self.UNWRAP_TAGS)
+        self._attrs = tuple(w + attr for attr in self.REVISION_ATTRIBUTES)
+        self.accepted = 0
+        self._skip_depth = 0
+        self._unwrapped = []  # Per open element passed on: is it unwrapped?
+
+    def start_ns(self, prefix, uri):
+        if hasattr(self._target, "start_ns"):
+            self._target.start_ns(prefix, uri)
+
+    def end_ns(self, prefix):
+        if hasattr(self._target, "end_ns"):
+            self._target.end_ns(prefix)
+
+    def start(self, tag, attrib, nsmap=None):
+        if self._skip_depth:
+            self._skip_depth += 1
+            return
+        elif tag in self._drop:
+            self.accepted += 1
+            self._skip_depth = 1
+            return
+        unwrap = tag in self._unwrap
+        self._unwrapped.append(unwrap)
+        if unwrap:
+            self.accepted += 1
+            return
+        attr_author, attr_date = self._attrs
+        if attr_author in attrib or attr_date in attrib:
+            attrib = {key: value for key, value in attrib.items()
+                      if key not in self._attrs}
+        if nsmap and "" in nsmap:
+            nsmap = {(p or None): uri for p, uri in nsmap.items()}
+        self._target.start(tag, attrib, nsmap)
+
+    def end(self, tag):
+        if self._skip_depth:
+            self._skip_depth -= 1
+        elif not self._unwrapped.pop():
+            self._target.end(tag)
+
+    def data(self, data):
+        if not self._skip_depth:
+            self._target.data(data)
+
+    def comment(self, text):
+        if not self._skip_depth:
+            self._target.comment(text)
+
+    def pi(self, target, data=None):
+        if not self._skip_depth:
+            self._target.pi(target, data)
+
+    def close(self):
+        return self._target.close()
+
+
+class TriageTarget(PruningTarget):
+    """Parser target that builds nothing and ignores all after a revision mark.
+
+    The namespaces and track changes are gathered as by PruningTarget until
+    has_trackchanges is True, see XMLAsInput.triage.
+    """
+
+    def __init__(self):
+        super().__init__(keep_parts=None)
+
+    def start(self, tag, attrib, nsmap=None):
+        if not self.has_trackchanges:
+            self._check_trackchanges(tag, attrib)
+
+    def end(self, tag):
+        if not self.has_trackchanges:
+            self._stack.pop()
+
+    def data(self, data):
+        pass
+
+    def comment(self, text):
+        pass
+
+    def pi(self, target, data=None):
+        pass
+
+    def close(self):
+        return None
+
+
+class ParagraphSelector(object):
+    """Lazily select w:p elements from the body of the document part.
+
+    The paragraphs are the same, in the same document order, as those of
+    the '//w:p' and suitable paragraph queries of XMLAsInput, except that
+    other parts, e.g. headers, footers and the glossary, are not searched.
+    Descendant w:i and w:t are only looked for until the first one is found.
+
+    Kwarg:
+        w_uri(str): The URI of the w prefix.
+    Methods:
+        find_body
+        iter_all
+        iter_suitable
+    """
+
+    _PKG_PART = "{%s}part" % SAMPLE_URIS["pkg"]
+    _PKG_NAME = "{%s}name" % SAMPLE_URIS["pkg"]
+
+    def __init__(self, w_uri=SAMPLE_URIS["w"]):
+        w = "{%s}" % w_uri
+        self._tag_body, self._tag_p = f"{w}body", f"{w}p"
+        self._tag_i, self._tag_t = f"{w}i", f"{w}t"
+
+    def find_body(self, root):
+        """Get the w:body of the document part of a package, or None."""
+        for part in root.iterchildren(self._PKG_PART):
+            if part.get(self._PKG_NAME) in DOCUMENT_PART_NAMES:
+                root = part
+                break
+        return next(root.iter(self._tag_body), None)
+
+    def iter_all(self, root):
+        body = self.find_body(root)
+        if body is not None:
+            yield from body.iterdescendants(self._tag_p)
+
+    def iter_suitable(self, root):
+        tag_i, tag_t = self._tag_i, self._tag_t
+        for paragraph in self.iter_all(root):
+            if (next(paragraph.iterdescendants(tag_i), None) is not None
+                    and next(paragraph.iterdescendants(tag_t), None) is not None):
+                yield paragraph
+
+
 class XMLAsInput(object):
     """Check whether an input file is suitable.
 
+    The file is opened in binary mode and memory-mapped; all checks read that
+    one buffer, the file is parsed once and the tree is kept for the Attrs.
+
+    Kwarg:
+        prune(bool): False by default, otherwise parse the file once and only
+            build the document part, see PruningTarget. The checks give the
+            same verdicts with far less memory for packages with embedded
+            images and fonts.
+        builder(None): None by default, otherwise a callable that returns a
+            TreeBuilder-like object, such as helpers.runs.RunsBuilder. Implies
+            prune, the builder receives the events of all parts and the return
+            value of its close method is the Attr result instead of a tree.
+        accept_changes(bool): False by default, otherwise tracked changes
+            are accepted as the file is parsed, see AcceptChangesTarget, and
+            the track changes check is made on the accepted document.
+        verdict_cache(VerdictCache, None): None by default, otherwise the
+            verdict of isSuitable is looked up and recorded in the cache. A
+            cached verdict skips the checks, a suitable file is only parsed
+            for the Attrs.
     Methods:
         isSuitable
+        triage
         iter_paragraphs
+        sniff
+        namespace_verdict
     Attr:
         root
         tree
         nsmap
         xpaths
+        result
 
     """
 
-    def __init__(self):
+    def __init__(self, prune=False, builder=None, accept_changes=False,
+                 verdict_cache=None):
         super().__init__()
         self.logger = pkg_logging.getLogger()
+        self.builder = builder
+        self.prune = prune or builder is not None
+        self.accept_changes = accept_changes
+        self.verdict_cache = verdict_cache
         self.__suitable = False
         self.__has_trackchanges = False
+        self.__target = None
+        self.__parsed = (None, None)
         self.__tree = None
         self.__root = None
         self.__xpaths = None
+        self.__result = None
         self._find_paras_query = "//w:p"
         self._find_suitable_paras_query = "//w:p[(count(descendant::w:i) > 0) and (count(descendant::w:t) > 0)]"
+        self._selector = None
 
     @property
     def root(self):
@@ -183,7 +647,33 @@ class XMLAsInput(object):
             method = self.isSuitable.__name__
             raise exceptions.InputOperationError(detail=method)
 
-    def iter_paragraphs(self, force_all=False):
+    @property
+    def result(self):
+        if self.__suitable:
+            return self.__result
+        else:
+            method = self.isSuitable.__name__
+            raise exceptions.InputOperationError(detail=method)
+
+    def iter_paragraphs(self, force_all=False, scope="body"):
+        """Yield all paragraphs, or only those with w:i and w:t descendants.
+
+        Kwarg:
+            scope(str): 'body', by default, lazily selects the paragraphs of
+                the document body with a ParagraphSelector, 'package' queries
+                all parts of the package with XPath.
+        """
+        if scope == "body":
+            if self._selector is None:
+                self._selector = ParagraphSelector()
+            if force_all:
+                yield from self._selector.iter_all(self.root)
+            else:
+                yield from self._selector.iter_suitable(self.root)
+            return
+        elif scope != "package":
+            raise ValueError(f"Unknown scope '{scope}', expected one of "
+                             f"{PARAGRAPH_SCOPES}.")
         if force_all:
             query = self._find_paras_query
         else:
@@ -192,108 +682,369 @@ class XMLAsInput(object):
         for para in find_paras(self.tree):
             yield para
 
-    def _sniff(self, fileobject):
+    def sniff(self, source):
+        """Boolean check: do the first lines say the source is Word XML?
+
+        Arg:
+            source: A buffer, such as that of open_buffer, or a file object.
+        """
         try:
-            fileobject.seek(0, 0)
-            lines = [fileobject.readline().strip() for _ in range(2)]
+            lines = self._first_lines(source, 2)
         except UnicodeDecodeError:
             boolean = False
         else:
             boolean = ("xml" in lines[0] and "progid=\"Word.Document\"" in lines[1])
-        finally:
-            fileobject.seek(0, 0)
 
         return boolean
 
-    def _parse(self, fileobject):
+    def _sniff(self, source):
+        # The first check of the battery.
+        return self.sniff(source)
+
+    @staticmethod
+    def _first_lines(source, number):
+        if isinstance(source, BUFFER_TYPES):
+            lines = source[:SNIFF_SIZE].split(b"\n", number)[:number]
+        else:
+            try:
+                source.seek(0, 0)
+                lines = [source.readline() for _ in range(number)]
+            finally:
+                source.seek(0, 0)
+        lines += [b""] * (number - len(lines))
+        # Bytes are decoded as UTF-8 regardless of the locale.
+        return [(l.decode("utf8") if isinstance(l, bytes) else l).strip()
+                for l in lines]
+
+    def _get_tree(self, source):
+        # The checks of one battery share the same source and hence one tree.
+        parsed_source, tree = self.__parsed
+        if parsed_source is not source:
+            parser = None
+            if self.accept_changes:
+                parser = etree.XMLParser(target=AcceptChangesTarget())
+            tree = load_tree(source, parser)
+            self.__parsed = (source, tree)
+        return tree
+
+    def _parse(self, source):
         try:
-            fileobject.seek(0, 0)
-            etree.parse(fileobject)
+            self._get_tree(source)
         except (etree.XMLSyntaxError, UnicodeDecodeError):
             boolean = False
         else:
             boolean = True
-        finally:
-            fileobject.seek(0, 0)
         return boolean
 
-    def _trackchanges(self, fileobject):
+    def _prune(self, source):
+        if self.builder is None:
+            target = PruningTarget()
+        else:
+            target = PruningTarget(keep_parts=None, builder=self.builder())
+        if self.accept_changes:
+            parser = etree.XMLParser(target=AcceptChangesTarget(target),
+                                     huge_tree=True)
+        else:
+            parser = etree.XMLParser(target=target, huge_tree=True)
+        try:
+            result = load_tree(source, parser)
+        except (etree.XMLSyntaxError, UnicodeDecodeError):
+            boolean = False
+        else:
+            boolean = True
+            target.result = result
+            self.__target = target
+        return boolean
+
+    def _trackchanges(self, source):
         find_ns = FIND_NAMESPACES_GET_PREFIX_URI
         query_trackchanges = QUERY_TRACKCHANGES_BY_PREDICATE
         self.__has_trackchanges = False
-        try:
-            fileobject.seek(0, 0)
-            tree = etree.parse(fileobject)
-            nsmap = {p if p is not None else "ns0": uri for p, uri in find_ns(tree)}
-            elements = tree.xpath(query_trackchanges, namespaces=nsmap)
-            boolean = bool(len(elements) == 0)  # No elements expected
-        finally:
-            fileobject.seek(0, 0)
+        tree = self._get_tree(source)
+        nsmap = {p if p is not None else "ns0": uri for p, uri in find_ns(tree)}
+        elements = tree.xpath(query_trackchanges, namespaces=nsmap)
+        boolean = bool(len(elements) == 0)  # No elements expected
         self.__has_trackchanges = bool(len(elements))  # TC == has elements
         return boolean
 
-    def _namespace(self, fileobject):
+    def _namespace(self, source):
         find_ns = FIND_NAMESPACES_GET_PREFIX_URI
-        try:
-            fileobject.seek(0, 0)
-            tree = etree.parse(fileobject)
-            flag1_options = [set(), EXTRA_PREFIXES]
-
-            nsmap = {}  # Good files share prefixes and uris.
-            default_uris = set()
-            for prefix, uri in find_ns(tree):
-                if prefix is None:
-                    default_uris.add(uri)  # XML may multiple None prefixes
-                nsmap[prefix] = uri
-            prefixes = set(nsmap)
-            pref_vs_exp_pref = prefixes.symmetric_difference(EXPECTED_PREFIXES)
-
-            flag1 = pref_vs_exp_pref in flag1_options
-            flag2 = all([(nsmap.get(pre, "") == uri) for pre, uri in SAMPLE_URIS.items() if pre is not None])
-            flag3 = 1 < len(default_uris.intersection(UNPREFIXED_URIS)) <= 3
-            self.logger.debug(f"namespace: flag1={flag1}, flag2={flag2}, flag3={flag3}")
-            boolean = all([flag1, flag2, flag3])
-        finally:
-            fileobject.seek(0, 0)
+        tree = self._get_tree(source)
+        boolean = self.namespace_verdict(find_ns(tree))
+        return boolean
+
+    def namespace_verdict(self, prefix_uri_pairs):
+        """Boolean check: are these namespace declarations those of Word XML?
+
+        Arg:
+            prefix_uri_pairs(iterable): (prefix, uri) of every declaration of
+                a file, such as PruningTarget.namespaces.
+        """
+        flag1_options = [set(), EXTRA_PREFIXES]
+
+        nsmap = {}  # Good files share prefixes and uris.
+        default_uris = set()
+        for prefix, uri in prefix_uri_pairs:
+            if prefix is None:
+                default_uris.add(uri)  # XML may multiple None prefixes
+            nsmap[prefix] = uri
+        prefixes = set(nsmap)
+        pref_vs_exp_pref = prefixes.symmetric_difference(EXPECTED_PREFIXES)
+
+        flag1 = pref_vs_exp_pref in flag1_options
+        flag2 = all([(nsmap.get(pre, "") == uri) for pre, uri in SAMPLE_URIS.items() if pre is not None])
+        flag3 = 1 < len(default_uris.intersection(UNPREFIXED_URIS)) <= 3
+        self.logger.debug(f"namespace: flag1={flag1}, flag2={flag2}, flag3={flag3}")
+        boolean = all([flag1, flag2, flag3])
+        return boolean
+
+    def _battery_test(self, source):
+        if self.prune:
+            return self._pruned_battery_test(source)
+        boolean = self._sniff(source)
+        self.logger.debug(f"sniff={boolean}")
+        if boolean:
+            boolean = self._parse(source)
+        self.logger.debug(f"parse={boolean}")
+        if boolean:
+            boolean = self._trackchanges(source)
+        self.logger.debug(f"trackchanges={boolean}")
+        if boolean:
+            boolean = self._namespace(source)
+        self.logger.debug(f"namespace={boolean}")
         return boolean
 
-    def _battery_test(self, fileobject):
-        boolean = self._sniff(fileobject)
+    def _pruned_battery_test(self, source):
+        # One parse stands in for the parse, trackchanges & namespace checks.
+        self.__target = None
+        self.__has_trackchanges = False
+        boolean = self._sniff(source)
         self.logger.debug(f"sniff={boolean}")
         if boolean:
-            boolean = self._parse(fileobject)
+            boolean = self._prune(source)
         self.logger.debug(f"parse={boolean}")
         if boolean:
-            boolean = self._trackchanges(fileobject)
+            self.__has_trackchanges = self.__target.has_trackchanges
+            boolean = not self.__has_trackchanges
         self.logger.debug(f"trackchanges={boolean}")
         if boolean:
-            boolean = self._namespace(fileobject)
+            boolean = self.namespace_verdict(self.__target.namespaces)
         self.logger.debug(f"namespace={boolean}")
         return boolean
 
-    def __setup(self, filename):
+    def _cached_battery_test(self, source, verdict):
+        # A cached verdict stands in for the checks, only the parse is left.
+        self.__target = None
+        self.__has_trackchanges = verdict == TRACKCHANGES
+        self.logger.debug(f"cached={verdict}")
+        if verdict != SUITABLE:
+            return False
+        elif self.prune:
+            return self._prune(source)
+        else:
+            return self._parse(source)
+
+    def __setup(self):
         if not self.__suitable:
             return
-        self.__tree = tree = etree.parse(filename)
+        if self.builder is not None:
+            self.__result = self.__target.result
+            return
+        if self.prune:
+            self.__tree = tree = self.__target.result
+        else:
+            _, tree = self.__parsed
+            self.__tree = tree
         self.__root = tree.getroot()
         self.__xpaths = xpaths = XPaths(tree)
         xpaths.add_xpath(query=self._find_paras_query)
         xpaths.add_xpath(query=self._find_suitable_paras_query)
 
+    def triage(self, filename):
+        """Quick verdict on a file: SUITABLE, UNSUITABLE or TRACKCHANGES.
+
+        The checks of isSuitable are made in a single streaming parse that
+        builds no tree, see TriageTarget, and stops after the SNIFF_SIZE
+        bytes with the first revision mark. Nothing is kept for the Attrs.
+        Unlike isSuitable, a file with a revision mark before a syntax error
+        has TRACKCHANGES.
+        """
+        with open_buffer(filename) as buffer:
+            if not self.sniff(buffer):
+                verdict = UNSUITABLE
+            else:
+                verdict = self._triage_parse(buffer)
+        self.logger.debug(f"triage={verdict}")
+        return verdict
+
+    def _triage_parse(self, source):
+        target = TriageTarget()
+        parser = etree.XMLParser(target=target, huge_tree=True)
+        try:
+            for offset in range(0, len(source), SNIFF_SIZE):
+                parser.feed(source[offset:offset + SNIFF_SIZE])
+                if target.has_trackchanges:
+                    return TRACKCHANGES
+            parser.close()
+        except (etree.XMLSyntaxError, UnicodeDecodeError):
+            return UNSUITABLE
+        if target.has_trackchanges:
+            return TRACKCHANGES
+        elif self.namespace_verdict(target.namespaces):
+            return SUITABLE
+        else:
+            return UNSUITABLE
+
     def isSuitable(self, filename, fatal=None):
 
-        with open(filename, "r") as handle:
-            suitable = self._battery_test(handle)
+        self.__parsed = (None, None)
+        cache = self.verdict_cache
+        cached = None
+        if cache is not None:
+            cached = cache.get(filename, self.accept_changes)
+        if cached is not None and cached != SUITABLE:
+            # A cached negative verdict does not touch the file.
+            suitable = self._cached_battery_test(None, cached)
+        else:
+            with open_buffer(filename) as buffer:
+                if cached is None:
+                    suitable = self._battery_test(buffer)
+                else:
+                    suitable = self._cached_battery_test(buffer, cached)
 
         has_trackchanges = self.__has_trackchanges
+        if suitable:
+            verdict = SUITABLE
+        elif has_trackchanges:
+            verdict = TRACKCHANGES
+        else:
+            verdict = UNSUITABLE
+        if cache is not None and verdict != cached:
+            cache.set(filename, verdict, self.accept_changes)
+            cache.dump()
 
         if fatal and not suitable:
-            detail = os.path.basename(filename)
-            if has_trackchanges:
-                raise exceptions.InputFileTrackChangesError(detail=detail)
-            else:
-                raise exceptions.InputFileError(detail=detail)
+            raise verdict_error(filename, verdict)
         else:
             self.__suitable = suitable
-            self.__setup(filename)
+            self.__setup()
+            self.__parsed = (None, None)
             return suitable
+
+
+def triage_files(filenames, workers=None):
+    """Triage many files in parallel, see XMLAsInput.triage.
+
+    Kwarg:
+        workers(int, None): Number of worker processes, by default the number
+            of CPUs. Files are triaged in this process if there is only one.
+    Returns:
+        list of (filename, verdict) tuples, in the order of filenames.
+    """
+    filenames = list(filenames)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(filenames))
+    if workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            verdicts = list(executor.map(_triage, filenames))
+    else:
+        verdicts = [_triage(filename) for filename in filenames]
+    return list(zip(filenames, verdicts))
+
+
+def _triage(filename):
+    return XMLAsInput().triage(filename)
+
+
+class VerdictCache(object):
+    """JSON file of the isSuitable verdicts of input files.
+
+    Verdicts are kept by absolute filename with the size, modification time
+    and SHA-1 digest of the file, see runs.SidecarHeader. A changed size
+    invalidates the verdicts of a file, a changed modification time only does
+    so if the digest differs as well. Verdicts with and without
+    accept_changes are kept apart. A missing or invalid cache file is an
+    empty cache.
+
+    A file whose size and modification time are those of its entry is not
+    read. A new modification time of an unchanged file is written back, so
+    the file is only hashed once, e.g. after a copy.
+
+    Arg:
+        filename(str): Cache filename, written by dump.
+    Methods:
+        get
+        set
+        dump
+    Attr:
+        entries(dict): Fingerprint and verdicts by absolute filename.
+    """
+
+    VERSION = 1
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.filename) as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != self.VERSION:
+            return {}
+        return data.get("files", {})
+
+    @staticmethod
+    def _mode(accept_changes):
+        return "accepted" if accept_changes else "rejected"
+
+    def _current_entry(self, source):
+        # The entry of source if it still corresponds to the file, or None.
+        entry = self.entries.get(os.path.abspath(source))
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+        if entry["size"] != stat.st_size:
+            return None
+        elif entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry
+        elif entry["digest"] != file_digest(source).hex():
+            return None
+        entry["mtime_ns"] = stat.st_mtime_ns
+        self.dump()
+        return entry
+
+    def get(self, source, accept_changes=False):
+        """The cached verdict of an input file, None if there is none."""
+        entry = self._current_entry(source)
+        if entry is None:
+            return None
+        return entry["verdicts"].get(self._mode(accept_changes))
+
+    def set(self, source, verdict, accept_changes=False):
+        """Record the verdict of an input file."""
+        if verdict not in TRIAGE_VERDICTS:
+            raise ValueError(f"Unknown verdict '{verdict}', expected one of "
+                             f"{TRIAGE_VERDICTS}.")
+        entry = self._current_entry(source)
+        if entry is None:
+            stat = os.stat(source)
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                     "digest": file_digest(source).hex(), "verdicts": {}}
+            self.entries[os.path.abspath(source)] = entry
+        entry["verdicts"][self._mode(accept_changes)] = verdict
+
+    def dump(self):
+        """Write the verdicts to the cache file."""
+        data = {"version": self.VERSION, "files": self.entries}
+        # Write then rename so that readers never see a partial cache.
+        partial = self.filename + ".partial"
+        with open(partial, "w") as handle:
+            json.dump(data, handle, indent=1, sort_keys=True)
+        os.replace(partial, self.filename)
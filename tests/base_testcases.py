@@ -16,6 +16,9 @@ import subprocess
 import os
 import difflib
 import unicodedata
+import tempfile
+import timeit
+import sys
 
 # To allow consistent imports of pkg modules
 tests.context.main()
@@ -365,3 +368,170 @@ class CommandLineTestCase(BaseTestCase):
 
         cmd = cmd_template.format(**template_kwargs)
         return cmd
+
+
+class WordXMLTestCase(BaseTestCase):
+    """setUpClass makes a temporary directory for synthetic Word XML files.
+
+    The private resources are not always available, hence the helper methods
+    write small 'Save As XML' packages that pass XMLAsInput.isSuitable.
+    """
+
+    W_URI = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    DOCUMENT_NAMESPACES = {
+        "wpc": "http://schemas.microsoft.com/office/word/2010/wordprocessingCanvas",
+        "mo": "http://schemas.microsoft.com/office/mac/office/2008/main",
+        "mc": "http://schemas.openxmlformats.org/markup-compatibility/2006",
+        "mv": "urn:schemas-microsoft-com:mac:vml",
+        "o": "urn:schemas-microsoft-com:office:office",
+        "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+        "m": "http://schemas.openxmlformats.org/officeDocument/2006/math",
+        "v": "urn:schemas-microsoft-com:vml",
+        "wp14": "http://schemas.microsoft.com/office/word/2010/wordprocessingDrawing",
+        "wp": "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing",
+        "w10": "urn:schemas-microsoft-com:office:word",
+        "w": W_URI,
+        "w14": "http://schemas.microsoft.com/office/word/2010/wordml",
+        "w15": "http://schemas.microsoft.com/office/word/2012/wordml",
+        "wpg": "http://schemas.microsoft.com/office/word/2010/wordprocessingGroup",
+        "wpi": "http://schemas.microsoft.com/office/word/2010/wordprocessingInk",
+        "wne": "http://schemas.microsoft.com/office/word/2006/wordml",
+        "wps": "http://schemas.microsoft.com/office/word/2010/wordprocessingShape",
+        "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+        "sl": "http://schemas.openxmlformats.org/schemaLibrary/2006/main"}
+    ENTRIES = [
+        [(False, False, "Adelman, Rachel E., "),
+         (True, False, "The Female Ruse: Women's Deception and Divine "
+                       "Sanction in the Hebrew Bible. "),
+         (False, False, "Sheffield Phoenix Press, Sheffield, 2017. xv, "
+                        "256 pp. £60.00. "),
+         (False, True, "isbn"),
+         (False, False, " 978 1 91092 825 7.")],
+        [(False, False, "Berthelot, Katell, Michaël Langlois, and Thierry "
+                        "Legrand (eds),"),
+         (True, False, " La Bibliothèque de Qumran 3b: Torah. "),
+         (False, False, "Les Éditions du Cerf, Paris, 2017. xxi, 730 pp. "
+                        "€75.00. ISBN 978 2 20411 147 8.")],
+        [(False, False, "Ilan, Tal, "),
+         (True, False, "Lexicon of Jewish Names. "),
+         (True, False, "Texts and Studies: Volume 148. "),
+         (False, False, "Mohr Siebeck, Tübingen, 2018. xx, 493 pp. "
+                        "€174.00. ISBN 978 3 16155 640 5.")]]
+
+    # Tracked changes, and the same paragraph once Word accepts them all.
+    REVISIONS = ("<w:p><w:pPr><w:rPr><w:ins w:id=\"1\" w:author=\"Ian\"/>"
+                 "</w:rPr></w:pPr><w:r><w:t>Adelman, </w:t></w:r>"
+                 "<w:ins w:id=\"2\" w:author=\"Ian\" w:date=\"2019-01-01\">"
+                 "<w:r><w:rPr><w:i/></w:rPr><w:t>The Female Ruse.</w:t></w:r>"
+                 "</w:ins><w:del w:id=\"3\" w:author=\"Ian\"><w:r>"
+                 "<w:delText>The Male Ruse.</w:delText></w:r></w:del>"
+                 "<w:r w:rsidR=\"00A1\"><w:rPr><w:rPrChange w:id=\"4\" "
+                 "w:author=\"Ian\"><w:rPr><w:i/></w:rPr></w:rPrChange></w:rPr>"
+                 "<w:t> Sheffield, 2017.</w:t></w:r></w:p>")
+    REVISIONS_ACCEPTED = (
+        "<w:p><w:pPr><w:rPr/></w:pPr><w:r><w:t>Adelman, </w:t></w:r>"
+        "<w:r><w:rPr><w:i/></w:rPr><w:t>The Female Ruse.</w:t></w:r>"
+        "<w:r w:rsidR=\"00A1\"><w:rPr/><w:t> Sheffield, 2017.</w:t></w:r></w:p>")
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._tempdir = tempfile.TemporaryDirectory()
+        cls.tempdir = cls._tempdir.name
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tempdir.cleanup()
+        super().tearDownClass()
+
+    @classmethod
+    def make_run_xml(cls, italic, smallcaps, text, fragments=1):
+        """Make w:r XML, or fragments of it as Word does for revisions."""
+        rpr = "".join(["<w:i/>" if italic else "",
+                       "<w:smallCaps/>" if smallcaps else ""])
+        if fragments == 1:
+            text = text.replace("&", "&amp;").replace("<", "&lt;")
+            return (f"<w:r><w:rPr>{rpr}</w:rPr>"
+                    f"<w:t xml:space=\"preserve\">{text}</w:t></w:r>")
+        step = -(-len(text) // fragments)
+        pieces = [text[i:i + step].replace("&", "&amp;").replace("<", "&lt;")
+                  for i in range(0, len(text), step)]
+        noise = ["<w:proofErr w:type=\"spellStart\"/>",
+                 "<w:bookmarkStart w:id=\"0\" w:name=\"_GoBack\"/>",
+                 "<w:bookmarkEnd w:id=\"0\"/>"]
+        return "".join(f"<w:r w:rsidR=\"00{i:06X}\"><w:rPr>{rpr}"
+                       f"<w:rFonts w:hint=\"default\"/></w:rPr>"
+                       f"<w:t xml:space=\"preserve\">{piece}</w:t></w:r>"
+                       f"{noise[i % len(noise)]}"
+                       for i, piece in enumerate(pieces))
+
+    @classmethod
+    def make_paragraph_xml(cls, runs, fragments=1):
+        runs = "".join(cls.make_run_xml(*run, fragments=fragments)
+                       for run in runs)
+        return f"<w:p>{runs}</w:p>"
+
+    @classmethod
+    def make_word_xml(cls, basename, entries=None, body_extra="",
+                      parts_extra="", styles_extra="", fragments=1):
+        """Write a minimal Word XML package and return its filename.
+
+        Args:
+            basename(str): Filename within the temporary directory.
+        Kwargs:
+            entries(list): Each entry is a list of (italic, smallcaps, text)
+                tuples, by default ENTRIES.
+            body_extra(str): Raw XML appended to the w:body.
+            parts_extra(str): Raw XML appended to the pkg:package.
+            styles_extra(str): Raw XML appended to the w:styles.
+            fragments(int): Split each run into this many w:r elements with
+                proofing and bookmark elements in between.
+        """
+        if entries is None:
+            entries = cls.ENTRIES
+        paragraphs = [cls.make_paragraph_xml(e, fragments) for e in entries]
+        # Blank paragraphs separate entries just as they do in the resources.
+        body = "<w:p/>".join(paragraphs) + body_extra
+        xmlns = " ".join(f"xmlns:{p}=\"{uri}\""
+                         for p, uri in cls.DOCUMENT_NAMESPACES.items())
+        content = f"""<?xml version="1.0" standalone="yes"?>
+<?mso-application progid="Word.Document"?>
+<pkg:package xmlns:pkg="http://schemas.microsoft.com/office/2006/xmlPackage"><pkg:part pkg:name="/_rels/.rels" pkg:contentType="application/vnd.openxmlformats-package.relationships+xml"><pkg:xmlData><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"><Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/></Relationships></pkg:xmlData></pkg:part><pkg:part pkg:name="/word/document.xml" pkg:contentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"><pkg:xmlData><w:document {xmlns} mc:Ignorable="w14 w15 wp14"><w:body>{body}<w:sectPr/></w:body></w:document></pkg:xmlData></pkg:part><pkg:part pkg:name="/word/styles.xml" pkg:contentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"><pkg:xmlData><w:styles xmlns:w="{cls.W_URI}"><w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>{styles_extra}</w:styles></pkg:xmlData></pkg:part><pkg:part pkg:name="/docProps/app.xml" pkg:contentType="application/vnd.openxmlformats-officedocument.extended-properties+xml"><pkg:xmlData><Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties" xmlns:vt="http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes"><Pages>1</Pages></Properties></pkg:xmlData></pkg:part><pkg:part pkg:name="/docProps/core.xml" pkg:contentType="application/vnd.openxmlformats-package.core-properties+xml"><pkg:xmlData><cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" xmlns:dcmitype="http://purl.org/dc/dcmitype/" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"><dc:title/></cp:coreProperties></pkg:xmlData></pkg:part><pkg:part pkg:name="/customXml/item1.xml" pkg:contentType="application/xml"><pkg:xmlData><b:Sources xmlns:b="http://schemas.openxmlformats.org/officeDocument/2006/bibliography" xmlns="http://schemas.openxmlformats.org/officeDocument/2006/bibliography" SelectedStyle="/APA.XSL"/></pkg:xmlData></pkg:part><pkg:part pkg:name="/customXml/itemProps1.xml" pkg:contentType="application/vnd.openxmlformats-officedocument.customXmlProperties+xml"><pkg:xmlData><ds:datastoreItem ds:itemID="{{0}}" xmlns:ds="http://schemas.openxmlformats.org/officeDocument/2006/customXml"/></pkg:xmlData></pkg:part>{parts_extra}</pkg:package>
+"""
+        filename = os.path.join(cls.tempdir, basename)
+        with open(filename, "w", encoding="utf8") as handle:
+            handle.write(content)
+        return filename
+
+
+class BenchmarkTestCase(WordXMLTestCase):
+    """Measure time and memory of package code on synthetic Word XML files.
+
+    Memory is the peak resident set size of a fresh interpreter, as most of
+    the memory used by lxml is invisible to tracemalloc. Measuring memory
+    depends on the Linux /proc filesystem.
+    """
+
+    def peak_memory(self, code, **kwargs):
+        """Execute code in a subprocess and return its peak RSS in KiB."""
+        if not os.path.isfile("/proc/self/status"):
+            self.skipTest("Peak memory is only measured on Linux.")
+        main_dir = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                tests.context.PACKAGE_DIR))
+        preamble = f"import sys; sys.path.insert(0, {repr(main_dir)})\n"
+        # VmHWM, unlike ru_maxrss, is not inherited from the forking parent.
+        epilogue = ("\nwith open('/proc/self/status') as handle:\n"
+                    "    print([l for l in handle if 'VmHWM' in l][0].split()[1])")
+        script = preamble + code.format(**kwargs) + epilogue
+        result = subprocess.run([sys.executable, "-c", script],
+                                stdout=subprocess.PIPE, check=True)
+        return int(result.stdout.decode().split()[-1])
+
+    @staticmethod
+    def best_time(func, repeat=3, number=1):
+        """Best wall time in seconds over repeat calls of func."""
+        return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+    def report(self, title, **results):
+        lines = [f"{key:>24}: {value}" for key, value in results.items()]
+        print(f"\n*** {title}\n" + "\n".join(lines))
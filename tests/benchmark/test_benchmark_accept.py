@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Benchmark of accepting tracked changes while parsing in main/helpers/xml.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import BenchmarkTestCase
+from helpers import runs
+import exceptions
+
+import unittest
+
+
+class Benchmark_AcceptChanges(BenchmarkTestCase):
+
+    entries = 1000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        body = cls.REVISIONS * len(cls.ENTRIES) * cls.entries
+        cls.filename = cls.make_word_xml("revisions.xml",
+                                         entries=cls.ENTRIES * cls.entries,
+                                         body_extra=body)
+
+    def extract(self, accept_changes):
+        def func():
+            return runs.extract(self.filename, use_sidecar=False,
+                                backend="events", accept_changes=accept_changes)
+        return func
+
+    def extract_rejected(self):
+        try:
+            self.extract(accept_changes=False)()
+        except exceptions.InputFileTrackChangesError:
+            pass
+
+    def test_accept_changes_while_streaming(self):
+        paragraphs = self.extract(accept_changes=True)()
+        self.assertEqual(len(paragraphs), len(self.ENTRIES) * self.entries * 2,
+                         msg="Precondition")
+
+        # Without accepting, the same parse ends with the file rejected.
+        rejected = self.best_time(self.extract_rejected)
+        accepted = self.best_time(self.extract(accept_changes=True))
+
+        self.report(f"Events backend, {len(paragraphs)} paragraphs, half with "
+                    "tracked changes",
+                    rejected=f"{rejected:.4f} s",
+                    accepted=f"{accepted:.4f} s")
+        self.assertLess(accepted, rejected * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Benchmark of the single-pass author tokenizer of ProcessorAuthors.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import BenchmarkTestCase
+from tests.reference_processors import ReferenceAuthors, long_author_list
+from helpers import paragraphs
+
+import unittest
+
+
+class Benchmark_Authors_Tokenizer(BenchmarkTestCase):
+
+    sizes = (5, 50, 200)
+    copies = 200  # Distinct strings per size, so memoization never hits.
+
+    def process_all(self, Processor, strings):
+        def func():
+            paragraphs.clear_memo()
+            for string in strings:
+                processor = Processor(string)
+                processor.authors, processor.editors
+        return func
+
+    def test_tokenizer_on_long_author_lists(self):
+        results = {}
+        for size in self.sizes:
+            strings = [long_author_list(size).replace("Surname0", f"Name{i}")
+                       for i in range(self.copies)]
+            reference = self.best_time(self.process_all(ReferenceAuthors,
+                                                        strings))
+            tokenized = self.best_time(self.process_all(
+                paragraphs.ProcessorAuthors, strings))
+            results[f"{size} names reference"] = f"{reference:.4f} s"
+            results[f"{size} names tokenizer"] = f"{tokenized:.4f} s"
+            if size == max(self.sizes):
+                self.assertLess(tokenized, reference)
+
+        self.report(f"ProcessorAuthors on {self.copies} editor lists",
+                    **results)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Benchmark of the run extraction backends of main/helpers/runs.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import BenchmarkTestCase
+from helpers import runs
+from helpers import xml
+
+import unittest
+
+
+class Benchmark_Extraction_Backends(BenchmarkTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("backends.xml",
+                                         entries=cls.ENTRIES * 200,
+                                         fragments=3)
+        cls.input = xml.XMLAsInput()
+        cls.input.isSuitable(cls.filename, fatal=True)
+
+    def extract(self, backend):
+        def func():
+            runs.extract(self.filename, use_sidecar=False, backend=backend)
+        return func
+
+    def from_elements(self):
+        return [runs.runs_from_element(p) for p in self.input.iter_paragraphs()]
+
+    def from_xslt(self):
+        return runs.runs_from_xslt(self.input.tree)
+
+    def test_runs_from_parsed_tree(self):
+        self.assertEqual(self.from_xslt(), self.from_elements(),
+                         msg="Precondition")
+
+        elements = self.best_time(self.from_elements)
+        xslt = self.best_time(self.from_xslt)
+
+        self.report("Runs of 600 paragraphs of a parsed tree, 3 fragments",
+                    runs_from_element=f"{elements:.4f} s",
+                    runs_from_xslt=f"{xslt:.4f} s")
+        self.assertLess(xslt, elements)
+
+    def test_extract_backends(self):
+        results = {backend: f"{self.best_time(self.extract(backend)):.4f} s"
+                   for backend in runs.BACKENDS}
+
+        self.report("runs.extract of the same file, checks included",
+                    **results)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Benchmark of the parallel parsing of body chunks in main/helpers/runs.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import BenchmarkTestCase
+from helpers import runs
+
+import os
+import unittest
+
+
+class Benchmark_Extraction_Chunks(BenchmarkTestCase):
+
+    entries = 2000
+    chunk_size = 1 << 20
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("volume.xml",
+                                         entries=cls.ENTRIES * cls.entries,
+                                         fragments=3)
+
+    def extract_events(self):
+        return runs.extract(self.filename, use_sidecar=False, backend="events")
+
+    def extract_chunks(self, workers):
+        def func():
+            return runs.extract_chunks(self.filename, workers=workers,
+                                       chunk_size=self.chunk_size)
+        return func
+
+    def test_chunks_of_a_volume(self):
+        cpus = os.cpu_count() or 1
+        self.assertEqual(self.extract_chunks(cpus)(), self.extract_events(),
+                         msg="Precondition")
+
+        events = self.best_time(self.extract_events)
+        serial = self.best_time(self.extract_chunks(1))
+        parallel = self.best_time(self.extract_chunks(cpus))
+
+        size = os.path.getsize(self.filename) / (1 << 20)
+        self.report(f"Runs of {len(self.ENTRIES) * self.entries} paragraphs, "
+                    f"{size:.1f} MiB in 1 MiB chunks, {cpus} CPUs",
+                    events=f"{events:.4f} s",
+                    chunks_one_worker=f"{serial:.4f} s",
+                    chunks_all_cpus=f"{parallel:.4f} s")
+        if cpus < 4:
+            self.skipTest("Parallel parsing is only faster with 4 CPUs or more.")
+        self.assertLess(parallel, events)
+
+
+if __name__ == '__main__':
+    unittest.main()
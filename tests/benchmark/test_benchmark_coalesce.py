@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Benchmark of run coalescing before the italic analysis of PreProcessed.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import BenchmarkTestCase
+from helpers import paragraphs
+from helpers import runs
+from helpers import xml
+import exceptions
+
+import os
+import copy
+import unittest
+
+REAL_ISSUES = ["./resources/BR Autumn 2018.xml",
+               "./resources/BR Spring 2019 (final from ML).xml"]
+
+
+class Benchmark_Runs_Coalesce(BenchmarkTestCase):
+
+    fragments = 8  # w:r elements per run, like an issue with many revisions.
+    repeat = 3
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("fragments.xml",
+                                         entries=cls.ENTRIES * 50,
+                                         fragments=cls.fragments)
+
+    def get_paragraphs(self, filename):
+        input = xml.XMLAsInput()
+        input.isSuitable(filename, fatal=True)
+        return list(input.iter_paragraphs())
+
+    def preprocess_all(self, sources, coalesce):
+        # Elements are normalized in place, so every repeat gets fresh copies.
+        pool = iter([copy.deepcopy(sources) for _ in range(self.repeat)])
+
+        def func():
+            paragraphs.PreProcessed._reset_xpaths()
+            for source in next(pool):
+                try:
+                    paragraphs.PreProcessed(source, coalesce=coalesce)
+                except exceptions.RecomposeWarning:
+                    continue
+        return func
+
+    def report_issue(self, title, filename):
+        elements = self.get_paragraphs(filename)
+        extracted = runs.extract(filename, use_sidecar=False)
+        coalesced = [r.coalesce() for r in extracted]
+        results = {"run count before": sum(map(len, extracted)),
+                   "run count after": sum(map(len, coalesced))}
+        for coalesce in (False, True):
+            label = "after" if coalesce else "before"
+            from_elements = self.best_time(
+                self.preprocess_all(elements, coalesce), repeat=self.repeat)
+            from_runs = self.best_time(
+                self.preprocess_all(extracted, coalesce), repeat=self.repeat)
+            results[f"elements {label}"] = f"{from_elements:.4f} s"
+            results[f"runs {label}"] = f"{from_runs:.4f} s"
+        self.report(title, **results)
+        return results
+
+    def test_coalesce_fragmented_issue(self):
+        results = self.report_issue(
+            f"PreProcessed on {len(self.ENTRIES) * 50} paragraphs, "
+            f"runs in {self.fragments} fragments", self.filename)
+
+        self.assertLess(results["run count after"],
+                        results["run count before"])
+
+    def test_coalesce_real_issues(self):
+        filenames = [f for f in REAL_ISSUES if os.path.isfile(f)]
+        if not filenames:
+            self.skipTest("The private resources are not available.")
+        for filename in filenames:
+            self.report_issue(f"PreProcessed on {os.path.basename(filename)}",
+                              filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Benchmark of random access to paragraphs with main/helpers/index.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import BenchmarkTestCase
+from helpers import index
+from helpers import runs
+from helpers import xml
+
+import os
+import itertools
+import unittest
+
+
+class Benchmark_ParagraphIndex(BenchmarkTestCase):
+
+    entries = 300
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("issue.xml",
+                                         entries=cls.ENTRIES * cls.entries)
+        cls.index = index.ParagraphIndex(cls.filename).update()
+        # The last entry is the furthest from the start of the file.
+        cls.position = len(cls.index) - 1
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.index.filename)
+        super().tearDownClass()
+
+    def walk_to_paragraph(self):
+        input = xml.XMLAsInput()
+        input.isSuitable(self.filename, fatal=True)
+        paragraphs = input.iter_paragraphs(force_all=True)
+        return next(itertools.islice(paragraphs, self.position, None))
+
+    def seek_to_paragraph(self):
+        paragraph_index = index.ParagraphIndex(self.filename).update()
+        return next(paragraph_index.iter_paragraphs(self.position,
+                                                    self.position + 1))
+
+    def test_random_access(self):
+        self.assertEqual(runs.runs_from_element(self.seek_to_paragraph()),
+                         runs.runs_from_element(self.walk_to_paragraph()),
+                         msg="Precondition")
+
+        walk = self.best_time(self.walk_to_paragraph)
+        seek = self.best_time(self.seek_to_paragraph)
+        build = self.best_time(index.ParagraphIndex(self.filename).build)
+
+        self.report(f"Paragraph {self.position} of {len(self.index)}",
+                    iter_paragraphs=f"{walk:.4f} s",
+                    index_and_seek=f"{seek:.4f} s",
+                    index_build=f"{build:.4f} s")
+        self.assertLess(seek * 10, walk)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Benchmark of the execution modes of process_paragraphs in
+main/helpers/paragraphs.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import BenchmarkTestCase
+from helpers import paragraphs
+from helpers import runs
+from helpers import xml
+
+import os
+import unittest
+
+
+class Benchmark_ProcessParagraphs_Modes(BenchmarkTestCase):
+
+    entries = 500
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        filename = cls.make_word_xml("modes.xml",
+                                     entries=cls.ENTRIES * cls.entries)
+        cls.input = xml.XMLAsInput()
+        cls.input.isSuitable(filename, fatal=True)
+        cls.elements = list(cls.input.iter_paragraphs())
+        cls.runs = [runs.runs_from_element(e) for e in cls.elements]
+
+    def process(self, paragraph_elements, mode, workers):
+        def func():
+            paragraphs.PreProcessed._reset_xpaths()
+            return paragraphs.process_paragraphs(paragraph_elements,
+                                                 mode=mode, workers=workers)
+        return func
+
+    def test_modes(self):
+        cpus = os.cpu_count() or 1
+        results = {}
+        for source in ("elements", "runs"):
+            paragraph_elements = getattr(self, source)
+            for mode in paragraphs.EXECUTION_MODES:
+                func = self.process(paragraph_elements, mode, cpus)
+                results[f"{source} {mode}"] = self.best_time(func)
+
+        self.report(f"process_paragraphs of {len(self.elements)} paragraphs, "
+                    f"{cpus} CPUs",
+                    **{key: f"{value:.4f} s" for key, value in results.items()})
+        if cpus < 4:
+            self.skipTest("Worker pools are only faster with 4 CPUs or more.")
+        self.assertLess(results["elements process"],
+                        results["elements serial"])
+
+
+if __name__ == '__main__':
+    unittest.main()
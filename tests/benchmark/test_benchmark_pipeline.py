@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Benchmark of the asyncio pipeline in main/helpers/pipeline.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import BenchmarkTestCase
+from helpers import classifier
+from helpers import paragraphs
+from helpers import pipeline
+from helpers import runs
+
+import asyncio
+import time
+import unittest
+
+
+class Benchmark_AConvert(BenchmarkTestCase):
+
+    entries = 500
+    chunk_size = 1 << 16
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("pipeline.xml",
+                                         entries=cls.ENTRIES * cls.entries)
+
+    def serial(self):
+        start = time.perf_counter()
+        first = None
+        paragraph_runs = runs.extract(self.filename, use_sidecar=False,
+                                      backend="events")
+        for paragraph in paragraph_runs:
+            if classifier.classify(paragraph) == classifier.ENTRY:
+                paragraphs.PreProcessed(paragraph)
+            if first is None:
+                first = time.perf_counter() - start
+        return first, time.perf_counter() - start
+
+    def pipelined(self):
+        async def consume():
+            start = time.perf_counter()
+            first = None
+            async for record in pipeline.aconvert(self.filename,
+                                                  chunk_size=self.chunk_size):
+                if first is None:
+                    first = time.perf_counter() - start
+            return first, time.perf_counter() - start
+        return asyncio.run(consume())
+
+    def test_time_to_first_record(self):
+        serial = min(self.serial() for _ in range(3))
+        pipelined = min(self.pipelined() for _ in range(3))
+
+        self.report(f"First and all of {len(self.ENTRIES) * self.entries} "
+                    "paragraphs",
+                    serial=f"{serial[0]:.4f} s, {serial[1]:.4f} s",
+                    aconvert=f"{pipelined[0]:.4f} s, {pipelined[1]:.4f} s")
+        self.assertLess(pipelined[0], serial[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Benchmark of the pruned parsing mode of main/helpers/xml.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import BenchmarkTestCase
+
+import unittest
+
+
+class Benchmark_Pruning_Memory(BenchmarkTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # An issue with embedded images: ~32 MB of base64 binary data.
+        blob = "iVBORw0KGgoAAAANSUhEUgAA" * (1 << 16)
+        image = ("<pkg:part pkg:name=\"/word/media/image{i}.png\" "
+                 "pkg:contentType=\"image/png\" pkg:compression=\"store\">"
+                 "<pkg:binaryData>{blob}</pkg:binaryData></pkg:part>")
+        parts = "".join(image.format(i=i, blob=blob) for i in range(20))
+        cls.filename = cls.make_word_xml("images.xml", entries=cls.ENTRIES * 50,
+                                         parts_extra=parts)
+        cls.code = ("from helpers.xml import XMLAsInput\n"
+                    "input = XMLAsInput(prune={prune})\n"
+                    "assert input.isSuitable({filename!r}, fatal=True)\n"
+                    "assert len(list(input.iter_paragraphs())) == 150\n")
+
+    def test_pruning_reduces_peak_memory(self):
+        full = self.peak_memory(self.code, prune=False, filename=self.filename)
+        pruned = self.peak_memory(self.code, prune=True, filename=self.filename)
+
+        self.report("Peak RSS of isSuitable + iter_paragraphs (KiB)",
+                    full_tree=full, pruned=pruned)
+        self.assertLess(pruned, full)
+
+
+if __name__ == '__main__':
+    unittest.main()
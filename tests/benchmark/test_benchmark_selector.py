@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Benchmark of the ParagraphSelector of main/helpers/xml.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import BenchmarkTestCase
+from helpers import xml
+
+import unittest
+
+
+class Benchmark_Paragraph_Selector(BenchmarkTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Entries with long runs, plain paragraphs and a header part.
+        entries = [entry * 4 for entry in cls.ENTRIES] * 100
+        plain = cls.make_paragraph_xml([(False, False, "Plain text.")] * 20)
+        header = ("<pkg:part pkg:name=\"/word/header1.xml\" "
+                  "pkg:contentType=\"application/xml\"><pkg:xmlData>"
+                  f"<w:hdr xmlns:w=\"{cls.W_URI}\">{plain * 100}</w:hdr>"
+                  "</pkg:xmlData></pkg:part>")
+        cls.filename = cls.make_word_xml("selector.xml", entries=entries,
+                                         body_extra=plain * 300,
+                                         parts_extra=header)
+        cls.input = xml.XMLAsInput()
+        cls.input.isSuitable(cls.filename, fatal=True)
+
+    def select(self, **kwargs):
+        def func():
+            for paragraph in self.input.iter_paragraphs(**kwargs):
+                pass
+        return func
+
+    def select_first(self, **kwargs):
+        def func():
+            next(self.input.iter_paragraphs(**kwargs))
+        return func
+
+    def test_selector_against_package_query(self):
+        package = self.best_time(self.select(scope="package"))
+        body = self.best_time(self.select(scope="body"))
+        first_package = self.best_time(self.select_first(scope="package"))
+        first_body = self.best_time(self.select_first(scope="body"))
+
+        self.report("Suitable paragraphs of 300 entries and 300 plain ones",
+                    package_query=f"{package:.4f} s",
+                    body_selector=f"{body:.4f} s",
+                    first_package_query=f"{first_package:.6f} s",
+                    first_body_selector=f"{first_body:.6f} s")
+        self.assertLess(first_body, first_package)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Benchmark of the single-pass title scanner of ProcessorTitle.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import BenchmarkTestCase
+from tests.reference_processors import ReferenceTitle, long_title
+from helpers import paragraphs
+
+import unittest
+
+
+class Benchmark_Title_Scanner(BenchmarkTestCase):
+
+    sizes = (2, 20, 100)
+    copies = 200  # Distinct strings per size, so memoization never hits.
+
+    def process_all(self, Processor, strings):
+        def func():
+            paragraphs.clear_memo()
+            for string in strings:
+                processor = Processor(string)
+                processor.title, processor.series
+        return func
+
+    def test_scanner_on_long_titles(self):
+        results = {}
+        for size in self.sizes:
+            strings = [f"Title {i}: " + long_title(size)
+                       for i in range(self.copies)]
+            reference = self.best_time(self.process_all(ReferenceTitle,
+                                                        strings))
+            scanned = self.best_time(self.process_all(
+                paragraphs.ProcessorTitle, strings))
+            results[f"{size} clauses reference"] = f"{reference:.4f} s"
+            results[f"{size} clauses scanner"] = f"{scanned:.4f} s"
+            if size == max(self.sizes):
+                self.assertLess(scanned, reference)
+
+        self.report(f"ProcessorTitle on {self.copies} series titles",
+                    **results)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Benchmark of the cached verdicts of input files in main/helpers/xml.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import BenchmarkTestCase
+from helpers import xml
+
+import os
+import unittest
+
+
+class Benchmark_VerdictCache(BenchmarkTestCase):
+
+    entries = 200
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        entries = cls.ENTRIES * cls.entries
+        cls.filenames = {
+            xml.SUITABLE: cls.make_word_xml("verdicts_good.xml",
+                                            entries=entries),
+            xml.TRACKCHANGES: cls.make_word_xml("verdicts_tc.xml",
+                                                entries=entries,
+                                                body_extra=cls.REVISIONS)}
+        cls.cache = os.path.join(cls.tempdir, "verdicts.json")
+
+    def is_suitable(self, filename, cached):
+        def func():
+            cache = xml.VerdictCache(self.cache) if cached else None
+            return xml.XMLAsInput(verdict_cache=cache).isSuitable(filename)
+        return func
+
+    def test_cached_verdicts(self):
+        results = {}
+        for verdict, filename in self.filenames.items():
+            self.is_suitable(filename, cached=True)()
+            self.assertEqual(xml.VerdictCache(self.cache).get(filename),
+                             verdict, msg="Precondition")
+
+            checked = self.best_time(self.is_suitable(filename, cached=False))
+            cached = self.best_time(self.is_suitable(filename, cached=True))
+
+            results[f"{verdict} checked"] = f"{checked:.4f} s"
+            results[f"{verdict} cached"] = f"{cached:.4f} s"
+            self.assertLess(cached, checked)
+        self.report(f"isSuitable of {len(self.ENTRIES) * self.entries} "
+                    "paragraphs", **results)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+
+"""Reference Processor subclasses with the original string scanning rules.
+
+The optimised Processors must give the same results, the test suite and the
+benchmarks compare them with these.
+
+Copyright: Ian Vermes 2019
+"""
+
+import tests.context
+from helpers import paragraphs
+
+import re
+
+
+class ReferenceAuthors(paragraphs.ProcessorAuthors):
+    """ProcessorAuthors that rescans the string for every condition."""
+
+    @classmethod
+    def strip_editor(cls, string):
+        base_editor_pattern = r"\(ed[\.s]\)"
+        pattern_is_positional_editor = rf"({base_editor_pattern}\,$)"
+        rgx_positional_editor = re.compile(pattern_is_positional_editor)
+        new_string = rgx_positional_editor.sub("", string)
+        return new_string
+
+    @classmethod
+    def split(cls, string, join_first=True):
+        result = []
+        string = string.strip()
+        string = cls.strip_editor(string)
+        string = string.strip().strip(cls._COMMA)
+        other_auths, *last = string.rsplit(cls._OXFORDAND, maxsplit=1)
+        split_once = other_auths.split(cls._COMMASPACE, maxsplit=2)
+        first_surname, first_name, *other_auths = split_once
+        first = first_name, first_surname
+        if join_first:
+            first = " ".join(first)
+        result.append(first)
+        if other_auths:
+            other_auths = other_auths.pop()
+            other_auths = other_auths.split(cls._COMMASPACE)
+        result = result + other_auths + last
+        return result
+
+    def _ProcessorAuthors__count_commas(self):
+        return self._raw_string.count(self._COMMA)
+
+    def _cond_seperators_balance(self):
+        count_comma = self._raw_string.count(self._COMMA)
+        count_commaspace = self._raw_string.count(self._COMMASPACE)
+        flag = count_comma - count_commaspace == 1
+        if not flag:
+            self._structure_report.add(self._INVALID_PLACEHOLDER)
+        return flag
+
+    def _cond_ok_oxford_comma(self):
+        if self._raw_string.count(self._COMMA) > 2:
+            string = self._raw_string.lower()
+            flag = string.count(self._OXFORDCOMMA) == 1
+            if not flag:
+                self._structure_report.add(self._INVALID_PLACEHOLDER)
+        else:
+            flag = None
+        return flag
+
+    def _cond_editors(self):
+        rgx_editor_fuzzy = re.compile(r"([\(\ ][Ee][Dd][Ss\.]?)")
+        rgx_editor = re.compile(r"(\(ed[\.s]\))")
+        rgx_positional_editor = re.compile(r"(\(ed[\.s]\)\,$)")
+
+        string = self._raw_string
+        flag_position = rgx_positional_editor.search(string) is not None
+        flag_count_is_one = len(rgx_editor.findall(string)) == 1
+        self._has_editors = flag_position and flag_count_is_one
+        if flag_position:
+            if flag_count_is_one:
+                return True
+            self._structure_report.add(self._INVALID_PLACEHOLDER)
+            return False
+        elif rgx_editor.search(string) is not None:
+            self._structure_report.add(self._INVALID_PLACEHOLDER)
+            return False
+        elif rgx_editor_fuzzy.search(string) is not None:
+            self._structure_report.add(self._INVALID_PLACEHOLDER)
+            return False
+        else:
+            return True
+
+    def _cond_rogue_and(self):
+        count = self._raw_string.count
+        flag = count(" and ") == count(self._OXFORDAND)
+        if not flag:
+            self._structure_report.add(self._INVALID_PLACEHOLDER)
+        return flag
+
+
+class ReferenceTitle(paragraphs.ProcessorTitle):
+    """ProcessorTitle that rescans the string for every condition."""
+
+    _RGX_SERIES_ROMANDIGITS = re.compile(r"(\:\svolume\s[ivxlcm]{1,13}\.?)")
+    _RGX_SERIES_ARABICDIGITS = re.compile(r"(\:\svolume\s[1-9][0-9]{1,12}\.?)")
+    _RGX_RAW_ROMANDIGITS = re.compile(r"(volume\s[ivxlcm]{1,13}\.?)")
+    _RGX_RAW_ARABICDIGITS = re.compile(r"(volume\s[1-9][0-9]{1,12}\.?)")
+    _RGX_RAW_TERMINAL_PUNCT = re.compile(r"(?:[^\.\?\!])([\.\?\!]$)")
+
+    @classmethod
+    def split(cls, string):
+        if cls._isSeries(string):
+            string = string.rstrip(cls._FULLSTOP)  # Don't strip other punct.
+            result = string.rsplit(cls._FULLSTOP, 1)
+        else:
+            # Otherwise leave the string intact
+            result = [string, ""]
+        # Postprocess the strings.
+        for i, substring in enumerate(result):
+            result[i] = substring.strip().rstrip(cls._FULLSTOP)
+        return result
+
+    def _maincond_ends_with_punctuation(self):
+        last_char = self._raw_string[-1]
+        flag_terminal = last_char in self._TERMINAL_PUNCTUATION
+
+        rgx_penultimate = self._RGX_RAW_TERMINAL_PUNCT
+        flag_penultimate = bool(rgx_penultimate.search(self._raw_string))
+        flag = flag_terminal and flag_penultimate
+        # TODO injected error code/error detail is generic PLACEHOLDER
+        if not flag:
+            self._structure_report.add(self._INVALID_PLACEHOLDER)
+        return flag
+
+    def _cond_string_has_volume_but_is_not_series(self, rawstring, **_):
+        if self.isSeries():
+            return
+        else:
+            rawstring = rawstring.lower()
+            for substring in self._SERIES_SUBSTRINGS:
+                if substring in rawstring:
+                    warn = True
+                    break
+            else:
+                warn = False
+            if warn:
+                # TODO injected error code/error detail is generic PLACEHOLDER
+                self._structure_report.add(self._WARNING_PLACEHOLDER)
+            return
+
+    def _cond_string_has_volume_digits_before_first_fullstop(self, rawstring, **_):
+        rawstring = rawstring.lower()
+        rgx_volumeroman = self._RGX_RAW_ROMANDIGITS
+        rgx_volumearabic = self._RGX_RAW_ARABICDIGITS
+        flag_multiple_fullstop = rawstring.count(self._FULLSTOP) > 1
+        if flag_multiple_fullstop:
+            first, *rest = rawstring.split(self._FULLSTOP, 1)
+            # Check for the pattern: if either is there, that's bad.
+            pattern_roman_absent = rgx_volumeroman.search(first) is None
+            pattern_arabic_absent = rgx_volumearabic.search(first) is None
+            flag_absent = pattern_roman_absent and pattern_arabic_absent
+            if not flag_absent:
+                self._structure_report.add(self._INVALID_PLACEHOLDER)
+            return flag_absent
+        else:
+            # Nothing wrong with having only one fullstop.
+            return True
+
+    def _cond_string_has_volume_digits_before_first_colon(self, rawstring, **_):
+        rawstring = rawstring.lower()
+        rgx_volumeroman = self._RGX_RAW_ROMANDIGITS
+        rgx_volumearabic = self._RGX_RAW_ARABICDIGITS
+        flag_has_colon = rawstring.count(self._COLON) > 0
+        if flag_has_colon:
+            first, *rest = rawstring.split(self._COLON, 1)
+            # Check for the pattern: if either is there, that's bad.
+            pattern_roman_absent = rgx_volumeroman.search(first) is None
+            pattern_arabic_absent = rgx_volumearabic.search(first) is None
+            flag_absent = pattern_roman_absent and pattern_arabic_absent
+            if not flag_absent:
+                self._structure_report.add(self._INVALID_PLACEHOLDER)
+            return flag_absent
+        else:
+            # Nothing wrong with having no colons.
+            return True
+
+    def _cond_seriesinfo_colon_count(self, series, **_):
+        if not len(series):
+            return True
+        else:
+            count = series.count(self._COLON)
+            flag = count >= 1
+            if not flag:
+                self._structure_report.add(self._INVALID_PLACEHOLDER)
+            return flag
+
+    def _cond_seriesinfo_volume_proceded_by_numerals(self, series, **_):
+        if not len(series):
+            return True
+        else:
+            series = series.lower()
+            rgx_volume_roman = self._RGX_SERIES_ROMANDIGITS
+            rgx_volume_arabic = self._RGX_SERIES_ARABICDIGITS
+            flag_roman = bool(rgx_volume_roman.search(series))
+            flag_arabic = bool(rgx_volume_arabic.search(series))
+            flag = flag_roman or flag_arabic
+            if not flag:
+                self._structure_report.add(self._INVALID_PLACEHOLDER)
+            return flag
+
+    def _cond_seriesinfo_volume_abbreviated(self, series, **_):
+        if not len(series):
+            return True
+        else:
+            series = series.lower()
+            flag = all([sub in series for sub in self._SERIES_SUBSTRINGS])
+            if not flag:
+                self._structure_report.add(self._INVALID_PLACEHOLDER)
+            return flag
+
+    def isSeries(self):
+        return self._isSeries(self._raw_string)
+
+    @classmethod
+    def _isSeries(cls, string):
+        test_funcs = [cls._has_midstring_fullstop,
+                      cls._has_seriesinfo_after_midstring_fullstop,
+                      cls._has_colonvol_after_midstring_fullstop,
+                      cls._has_colonvol_after_final_midstring_fullstop]
+        battery = [f(string) for f in test_funcs]
+        flag = all(battery)
+        return flag
+
+    @classmethod
+    def _has_midstring_fullstop(cls, string):
+        partialstring = string[:-1]
+        flag = cls._FULLSTOP in partialstring
+        return flag
+
+    @classmethod
+    def _has_seriesinfo_after_midstring_fullstop(cls, string):
+        partialstring = string[:-1]
+        partialstring = partialstring.lower()
+        titlelike, *rest = partialstring.split(cls._FULLSTOP)
+        if not rest:
+            return False
+        else:
+            substrings_present = []
+            for fragment in rest:
+                for substring in cls._SERIES_SUBSTRINGS:
+                    if substring in fragment:
+                        substrings_present.append(True)
+                        break
+                else:
+                    substrings_present.append(False)
+            return any(substrings_present)
+
+    @classmethod
+    def _has_colonvol_after_final_midstring_fullstop(cls, string):
+        start = -1
+        result = cls._has_colonvol_after_midstring_fullstop(string, start)
+        return result
+
+    @classmethod
+    def _has_colonvol_after_midstring_fullstop(cls, string, start=0):
+        partialstring = string[:-1]
+        titlelike, *rest = partialstring.split(cls._FULLSTOP)
+        rgx_colonvol = cls._RGX_COLON_VOLUME
+        if not rest:
+            return False
+        else:
+            pattern_present = []
+            for fragment in rest[start:]:
+                if len(rgx_colonvol.findall(fragment)):
+                    pattern_present.append(True)
+                    break
+            else:
+                pattern_present.append(False)
+            return any(pattern_present)
+
+
+def long_author_list(count, editors=True):
+    """An author (or editor) string with count names in the house style."""
+    names = [f"Firstname{i} Surname{i}" for i in range(1, count)]
+    string = "Surname0, Firstname0"
+    if names[:-1]:
+        string += ", " + ", ".join(names[:-1])
+    string += f", and {names[-1]}"
+    string += " (eds)," if editors else ","
+    return string
+
+
+def long_title(count, series=True):
+    """A title string with count clauses, optionally with series info."""
+    clauses = [f"Clause {i}: on the subject of volume {i}" for i in range(count)]
+    string = ", ".join(clauses) + "."
+    if series:
+        string += f" Some Journal: Volume {count + 10}."
+    return string
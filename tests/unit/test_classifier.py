@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Unit test of main/helpers/classifier.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import WordXMLTestCase
+from helpers import classifier
+from helpers import paragraphs
+from helpers import runs
+import helpers.logging as pkg_logging
+import core
+
+from lxml import etree
+
+from collections import Counter
+from unittest.mock import patch
+import inspect
+import unittest
+
+
+class Test_Classifier(WordXMLTestCase):
+
+    HEADINGS = [[(True, False, "Biblical Studies")],
+                [(False, False, "Books received")],
+                [(True, False, "Note: "), (False, False, "see above.")]]
+    BLANKS = [[], [(False, False, "  ")], [(True, False, "\t")]]
+    SUSPICIOUS = [[(True, False, "The Female Ruse. "),
+                   (False, False, "Sheffield, 2017. £60.00.")],
+                  [(False, False, "Adelman, Rachel E., "),
+                   (True, False, "The Female Ruse. "),
+                   (False, False, "Sheffield Phoenix Press, Sheffield.")],
+                  [(False, False, "A stray paragraph without italics, "
+                                  "which is far too long to be taken for "
+                                  "a heading.")]]
+
+    def label_all(self, entries):
+        return [classifier.classify(runs.Runs(entry)) for entry in entries]
+
+    def test_entries(self):
+        result = self.label_all(self.ENTRIES)
+
+        self.assertEqual(result, [classifier.ENTRY] * len(self.ENTRIES))
+
+    def test_headings_blanks_and_suspicious(self):
+        setup = {classifier.HEADING: self.HEADINGS,
+                 classifier.BLANK: self.BLANKS,
+                 classifier.SUSPICIOUS: self.SUSPICIOUS}
+        for expected, entries in setup.items():
+            for entry in entries:
+                with self.subTest(entry=entry):
+                    result = classifier.classify(runs.Runs(entry))
+                    self.assertEqual(result, expected)
+
+    def test_heading_style(self):
+        entry = runs.Runs(self.ENTRIES[0])
+        for style in ["Heading1", "Title", "TOC2"]:
+            with self.subTest(style=style):
+                result = classifier.classify(entry, paragraph_style=style)
+                self.assertEqual(result, classifier.HEADING)
+
+        result = classifier.classify(entry, paragraph_style="Bibliography")
+        self.assertEqual(result, classifier.ENTRY)
+
+    def test_element_same_as_runs(self):
+        w = f"xmlns:w=\"{self.W_URI}\""
+        for entry in self.ENTRIES + self.HEADINGS + self.SUSPICIOUS:
+            with self.subTest(entry=entry):
+                xml = self.make_paragraph_xml(entry).replace("<w:p>",
+                                                             f"<w:p {w}>")
+                element = etree.fromstring(xml)
+                self.assertEqual(classifier.classify(element),
+                                 classifier.classify(runs.Runs(entry)))
+
+    def test_element_paragraph_style(self):
+        w = f"xmlns:w=\"{self.W_URI}\""
+        runs_xml = "".join(self.make_run_xml(*r) for r in self.ENTRIES[0])
+        element = etree.fromstring(f"<w:p {w}><w:pPr><w:pStyle "
+                                   f"w:val=\"Heading2\"/></w:pPr>{runs_xml}"
+                                   "</w:p>")
+
+        self.assertEqual(classifier.classify(element), classifier.HEADING)
+
+    def test_runs_paragraph_style(self):
+        entry = runs.Runs(self.ENTRIES[0], style="Heading2")
+
+        self.assertEqual(classifier.classify(entry), classifier.HEADING)
+        self.assertEqual(classifier.classify(entry, paragraph_style="Normal"),
+                         classifier.ENTRY)
+
+    def test_extracted_runs_paragraph_style(self):
+        runs_xml = "".join(self.make_run_xml(*r) for r in self.ENTRIES[0])
+        body = (f"<w:p><w:pPr><w:pStyle w:val=\"Heading2\"/></w:pPr>"
+                f"{runs_xml}</w:p>")
+        filename = self.make_word_xml("heading.xml", body_extra=body)
+        expected = [classifier.ENTRY] * len(self.ENTRIES) + [classifier.HEADING]
+        for backend in runs.BACKENDS:
+            with self.subTest(backend=backend):
+                paragraphs = runs.extract(filename, use_sidecar=False,
+                                          backend=backend)
+
+                result = [label for label, _ in
+                          classifier.classify_paragraphs(paragraphs)]
+
+                self.assertEqual(result, expected)
+
+    def test_price_currencies_same_as_ProcessorMeta(self):
+        for currency in paragraphs.CURRENCIES:
+            with self.subTest(currency=currency):
+                entry = [(False, False, "Adelman, Rachel E., "),
+                         (True, False, "The Female Ruse. "),
+                         (False, False, f"Sheffield, 2017. {currency}60.00.")]
+                meta = paragraphs.ProcessorMeta.split(entry[-1][-1])
+
+                self.assertEqual(classifier.classify(runs.Runs(entry)),
+                                 classifier.ENTRY)
+                self.assertEqual(meta["price"], f"{currency}60.00")
+
+    def test_wrong_arg(self):
+        with self.assertRaises(TypeError):
+            classifier.classify("Adelman, Rachel E.,")
+
+    def test_classify_paragraphs_counts(self):
+        entries = self.ENTRIES + self.HEADINGS + self.BLANKS + self.SUSPICIOUS
+        counts = Counter()
+
+        result = list(classifier.classify_paragraphs(
+            (runs.Runs(e) for e in entries), counts))
+
+        self.assertEqual(len(result), len(entries))
+        self.assertEqual(counts, {classifier.ENTRY: len(self.ENTRIES),
+                                  classifier.HEADING: len(self.HEADINGS),
+                                  classifier.BLANK: len(self.BLANKS),
+                                  classifier.SUSPICIOUS: len(self.SUSPICIOUS)})
+
+    def test_process_paragraphs_only_processes_entries(self):
+        entries = [runs.Runs(e) for e in self.ENTRIES + self.SUSPICIOUS]
+        entries += [runs.Runs(e) for e in self.HEADINGS]
+
+        with patch.object(paragraphs.PreProcessed, "__init__", autospec=True,
+                          return_value=None) as mock_preprocessed:
+            counts = paragraphs.process_paragraphs(entries, classify=True)
+
+        self.assertEqual(mock_preprocessed.call_count, len(self.ENTRIES))
+        self.assertEqual(counts[classifier.ENTRY], len(self.ENTRIES))
+        self.assertEqual(counts[classifier.HEADING], len(self.HEADINGS))
+
+        with patch.object(paragraphs.PreProcessed, "__init__", autospec=True,
+                          return_value=None) as mock_preprocessed:
+            counts = paragraphs.process_paragraphs(entries)
+
+        self.assertEqual(mock_preprocessed.call_count, len(entries))
+        self.assertEqual(counts, Counter())
+
+    def test_process_paragraphs_warns_of_skipped_paragraphs(self):
+        entries = [runs.Runs(e) for e in self.ENTRIES + self.SUSPICIOUS]
+        logger = pkg_logging.getLogger().logger
+
+        with self.assertLogs(logger, level="WARNING") as logs:
+            paragraphs.process_paragraphs(entries, classify=True)
+
+        skipped = [l for l in logs.output
+                   if l.startswith("WARNING") and "Skipped suspicious" in l]
+        self.assertEqual(len(skipped), len(self.SUSPICIOUS))
+
+    def test_main_does_not_classify_by_default(self):
+        parameter = inspect.signature(core.main).parameters["classify"]
+
+        self.assertIs(parameter.default, False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,12 +5,15 @@
 
 Copyright: Ian Vermes 2019
 """
-from tests.base_testcases import BaseTestCase, InputFileTestCase
+from tests.base_testcases import BaseTestCase, InputFileTestCase, WordXMLTestCase
 import core
 import exceptions
+from helpers import runs
+from helpers import xml
 
 import testfixtures
 
+import argparse
 import tempfile
 import unittest
 import unittest.mock
@@ -73,6 +76,174 @@ class TestArguments(InputFileTestCase):
                     self.assertIsInstance(fail.exception, expected_exception)
 
 
+class TestSidecar(WordXMLTestCase):
+    """Test core.main reuses the sidecar of extracted runs."""
+
+    def test_main_writes_and_reuses_sidecar(self):
+        input = self.make_word_xml("core_sidecar.xml")
+        output = os.path.join(self.tempdir, "output.xml")
+        sidecar = input + ".runs"
+
+        core.main(input, output, sidecar=True)
+        self.assertTrue(os.path.isfile(sidecar))
+
+        with unittest.mock.patch("helpers.runs.XMLAsInput") as mock_input:
+            core.main(input, output, sidecar=True)
+        mock_input.assert_not_called()
+
+
+class TestVerdictCache(WordXMLTestCase):
+    """Test core.main reuses the cached verdicts of input files."""
+
+    @unittest.mock.patch("exceptions.RecomposeExit.clean_exit")
+    def test_main_rejects_cached_verdict_unread(self, mock_clean_exit):
+        input = self.make_word_xml("core_verdict.xml",
+                                   body_extra=self.REVISIONS)
+        output = os.path.join(self.tempdir, "output.xml")
+        cache = os.path.join(self.tempdir, "verdicts.json")
+
+        for attempt in range(2):
+            with self.subTest(attempt=attempt), \
+                    testfixtures.OutputCapture() as captured, \
+                    unittest.mock.patch("helpers.xml.open_buffer",
+                                        wraps=xml.open_buffer) as mock_open:
+                with self.assertRaises(exceptions.RecomposeExit):
+                    core.main(input, output, backend="tree",
+                              verdict_cache=cache)
+
+                self.assertIn("InputFileTrackChangesError", captured.captured)
+                self.assertEqual(mock_open.call_count, 1 - attempt)
+        self.assertTrue(os.path.isfile(cache))
+
+
+class TestBackend(WordXMLTestCase):
+    """Test core.main passes the extraction backend on."""
+
+    def test_main_with_events_backend(self):
+        input = self.make_word_xml("core_backend.xml")
+        output = os.path.join(self.tempdir, "output.xml")
+
+        with unittest.mock.patch("helpers.paragraphs.process_paragraphs") as mock_process:
+            core.main(input, output, backend="events")
+
+        expected = runs.extract(input, use_sidecar=False)
+        mock_process.assert_called_once_with(expected, classify=False)
+
+    def test_main_selects_backend(self):
+        input = self.make_word_xml("core_auto.xml")
+        output = os.path.join(self.tempdir, "output.xml")
+        setup = [("tree", {}), ("events", {"max_memory": 1})]
+        for expected, kwargs in setup:
+            with self.subTest(**kwargs):
+                with unittest.mock.patch("helpers.runs.extract",
+                                         return_value=[]) as mock_extract:
+                    core.main(input, output, **kwargs)
+
+                mock_extract.assert_called_once_with(input, use_sidecar=False,
+                                                     backend=expected,
+                                                     accept_changes=False,
+                                                     verdict_cache=None)
+
+    def test_main_requested_backend_is_not_selected(self):
+        input = self.make_word_xml("core_requested.xml")
+        output = os.path.join(self.tempdir, "output.xml")
+
+        with unittest.mock.patch("helpers.runs.select_backend") as mock_select:
+            core.main(input, output, backend="events", max_memory=1)
+
+        mock_select.assert_not_called()
+
+
+class TestTriage(WordXMLTestCase):
+    """Test the --check-only triage of many files."""
+
+    def test_triage_directory_and_file(self):
+        good = self.make_word_xml("triage_good.xml")
+        self.make_word_xml("triage_tc.xml", body_extra=self.REVISIONS)
+        other = os.path.join(self.tempdir, "triage_other.txt")
+        with open(other, "w") as handle:
+            handle.write("Not XML")
+
+        with testfixtures.OutputCapture() as output:
+            counts = core.triage([self.tempdir, other], workers=1)
+
+        self.assertEqual(counts, {"suitable": 1, "trackchanges": 1,
+                                  "unsuitable": 1})
+        lines = output.captured.splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[0].split(), ["suitable", good])
+
+    def test_main_wrapper_with_check_only(self):
+        with unittest.mock.patch("core.triage") as mock_triage, \
+                unittest.mock.patch("core.main") as mock_main:
+            core.main_wrapper(check_only=["a.xml"], input_filename=None)
+
+        mock_triage.assert_called_once_with(["a.xml"])
+        mock_main.assert_not_called()
+
+
+class TestShard(WordXMLTestCase):
+    """Test the shard, run_shard and merge entry points."""
+
+    def test_shard_run_and_merge(self):
+        input = self.make_word_xml("core_shard.xml")
+        workdir = os.path.join(self.tempdir, "core_shard")
+
+        with testfixtures.OutputCapture() as output:
+            units = core.shard(input, workdir, units=2)
+            for unit in units:
+                core.run_shard(unit)
+            merged, report = core.merge(workdir)
+
+        self.assertEqual(output.captured.split(), units + [merged, report])
+        with open(merged) as handle:
+            self.assertEqual(len(handle.readlines()), len(self.ENTRIES))
+
+    @unittest.mock.patch("exceptions.RecomposeExit.clean_exit")
+    def test_merge_of_unrun_units_exits(self, mock_clean_exit):
+        input = self.make_word_xml("core_unrun.xml")
+        workdir = os.path.join(self.tempdir, "core_unrun")
+
+        with testfixtures.OutputCapture() as output:
+            core.shard(input, workdir, units=1)
+            with self.assertRaises(exceptions.RecomposeExit):
+                core.merge(workdir)
+
+        self.assertIn("ShardError", output.captured)
+
+    def test_main_wrapper_dispatches(self):
+        setup = [({"shard_dir": "work", "units": 2, "input_filename": "a.xml"},
+                  "core.shard", ("a.xml", "work", 2, False, False)),
+                 ({"shard_unit": "unit.json"}, "core.run_shard",
+                  ("unit.json",)),
+                 ({"merge_dir": "work"}, "core.merge", ("work",))]
+        for kwargs, target, expected in setup:
+            with self.subTest(target=target), \
+                    unittest.mock.patch(target) as mock_entry, \
+                    unittest.mock.patch("core.main") as mock_main:
+                core.main_wrapper(**kwargs)
+
+            mock_entry.assert_called_once_with(*expected)
+            mock_main.assert_not_called()
+
+
+class TestArgParser(BaseTestCase):
+    """Test the conversions of the command line arguments."""
+
+    def test_to_bytes(self):
+        setup = {"1024": 1024, "512M": 512 << 20, "2g": 2 << 30,
+                 "1.5GB": 3 << 29, " 64k ": 64 << 10}
+        for size, expected in setup.items():
+            with self.subTest(size=size):
+                self.assertEqual(core.RecomposeArgParser.to_bytes(size),
+                                 expected)
+
+    def test_to_bytes_raises(self):
+        for size in ["", "M", "-1G", "0", "lots"]:
+            with self.subTest(size=size):
+                with self.assertRaises(argparse.ArgumentTypeError):
+                    core.RecomposeArgParser.to_bytes(size)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -13,6 +13,7 @@ import unittest
 import unittest.mock
 import os
 import inspect
+import pickle
 import sys
 
 import importlib
@@ -293,6 +294,22 @@ class Test_Exceptions(BaseTestCase):
 
         self.assertGreater(counter, 0, msg="No Exception classes tested!")
 
+    def test_pkgexception_subclass_pickles(self):
+        parent_cls = exceptions._CodedErrors
+        counter = 0
+        for cls in self.get_subclasses_only("exceptions", parent_cls):
+            cls_name = cls.__name__
+            counter += 1
+            with self.subTest(cls_name=cls_name):
+
+                err = self.instantiate_exception(cls, "Sent to a process.")
+
+                copied = pickle.loads(pickle.dumps(err))
+                self.assertIs(type(copied), cls)
+                self.assertEqual(copied.args, err.args)
+
+        self.assertGreater(counter, 0, msg="No Exception classes tested!")
+
     def get_default_string(self, exc_cls, auto_format=False):
         key = exc_cls._strcode
         string = exceptions.EXC_STRINGS.get(key, "")
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Unit test of main/helpers/index.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import WordXMLTestCase
+from helpers import index
+from helpers import runs
+from helpers import xml
+import exceptions
+
+from lxml import etree
+
+import os
+import unittest
+from unittest.mock import patch
+
+
+class Test_ParagraphIndex(WordXMLTestCase):
+
+    PARA_IDS = ("<w:p w14:paraId=\"1A2B3C4D\" w14:textId=\"77777777\">"
+                "<w:r><w:rPr><w:i/></w:rPr><w:t>Found</w:t></w:r></w:p>"
+                "<w:p><w:r><w:t>Out </w:t><w:pict><w:p w14:paraId=\"0000ABCD\">"
+                "<w:r><w:t>In</w:t></w:r></w:p></w:pict></w:r></w:p>")
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("index.xml", body_extra=cls.PARA_IDS)
+
+    def setUp(self):
+        self.index = index.ParagraphIndex(self.filename)
+        self.addCleanup(self.remove_index)
+
+    def remove_index(self):
+        if os.path.isfile(self.index.filename):
+            os.remove(self.index.filename)
+
+    def get_elements(self):
+        input = xml.XMLAsInput()
+        input.isSuitable(self.filename, fatal=True)
+        return list(input.iter_paragraphs(force_all=True))
+
+    def assertSameParagraphs(self, result, expected):
+        self.assertEqual(len(result), len(expected))
+        for result_p, expected_p in zip(result, expected):
+            self.assertEqual(runs.runs_from_element(result_p),
+                             runs.runs_from_element(expected_p))
+            self.assertEqual(result_p.attrib, expected_p.attrib)
+
+    def test_same_paragraphs_as_selector(self):
+        expected = self.get_elements()
+
+        result = list(self.index.build().iter_paragraphs())
+
+        self.assertEqual(len(self.index), len(expected))
+        self.assertSameParagraphs(result, expected)
+
+    def test_iter_paragraphs_slice(self):
+        expected = self.get_elements()
+        self.index.build()
+        for start, stop in [(0, 1), (2, 5), (5, None), (None, 2)]:
+            with self.subTest(start=start, stop=stop):
+                result = list(self.index.iter_paragraphs(start, stop))
+                self.assertSameParagraphs(result, expected[start:stop])
+
+    def test_find_by_para_id(self):
+        self.index.build()
+
+        found = self.index.find("1a2b3c4d")
+        nested = self.index.find("ABCD")
+
+        self.assertEqual(runs.runs_from_element(found).text, "Found")
+        self.assertEqual(runs.runs_from_element(nested).text, "In")
+        with self.assertRaises(KeyError):
+            self.index.find("12345678")
+
+    def test_only_reads_the_paragraph(self):
+        self.index.build()
+        entry = self.index.entries[-1]
+
+        with patch("lxml.etree.fromstring",
+                   wraps=etree.fromstring) as mock_fromstring:
+            self.index.find("0000ABCD")
+
+        source, = mock_fromstring.call_args[0]
+        self.assertLess(len(source), os.path.getsize(self.filename) // 2)
+        self.assertIn(b"<w:t>In</w:t>", source)
+        self.assertEqual(entry.para_id, "0000ABCD")
+
+    def test_roundtrip(self):
+        self.assertFalse(self.index.isValid())
+        self.index.update()
+        self.assertTrue(self.index.isValid())
+
+        loaded = index.ParagraphIndex(self.filename).update()
+
+        self.assertEqual(loaded.entries, self.index.entries)
+        self.assertSameParagraphs(list(loaded.iter_paragraphs()),
+                                  list(self.index.iter_paragraphs()))
+
+    def test_update_rebuilds_when_source_changes(self):
+        filename = self.make_word_xml("index_changed.xml")
+        paragraph_index = index.ParagraphIndex(filename)
+        self.addCleanup(os.remove, paragraph_index.filename)
+        paragraph_index.update()
+        self.make_word_xml("index_changed.xml", body_extra=self.PARA_IDS)
+
+        self.assertFalse(paragraph_index.isValid())
+        self.assertEqual(len(paragraph_index.update()),
+                         len(self.get_elements()))
+
+    def test_stale_index_raises_before_reading(self):
+        filename = self.make_word_xml("index_stale.xml",
+                                      body_extra=self.PARA_IDS)
+        built = index.ParagraphIndex(filename).build()
+        loaded = index.ParagraphIndex(filename)
+        self.addCleanup(os.remove, loaded.filename)
+        loaded.update()
+        self.make_word_xml("index_stale.xml", entries=self.ENTRIES[1:],
+                           body_extra=self.PARA_IDS)
+
+        for paragraph_index in [built, loaded]:
+            with self.subTest(loaded=paragraph_index is loaded):
+                with self.assertRaises(exceptions.SidecarError):
+                    next(paragraph_index.iter_paragraphs())
+                with self.assertRaises(exceptions.SidecarError):
+                    paragraph_index.find("1A2B3C4D")
+        with self.assertRaises(exceptions.SidecarError):
+            built.dump()
+
+    def test_loaded_index_reads_when_only_mtime_changes(self):
+        self.index.update()
+        loaded = index.ParagraphIndex(self.filename).load()
+        stat = os.stat(self.filename)
+        os.utime(self.filename, ns=(stat.st_atime_ns,
+                                    stat.st_mtime_ns + 10 ** 9))
+        self.addCleanup(os.utime, self.filename,
+                        ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        found = loaded.find("1A2B3C4D")
+
+        self.assertEqual(runs.runs_from_element(found).text, "Found")
+
+    def test_load_garbage_raises(self):
+        with open(self.index.filename, "wb") as handle:
+            handle.write(b"garbage")
+
+        with self.assertRaises(exceptions.SidecarError):
+            self.index.load()
+
+    def test_build_without_body_raises(self):
+        filename = os.path.join(self.tempdir, "index_nobody.xml")
+        with open(filename, "w") as handle:
+            handle.write(f"<w:document xmlns:w=\"{self.W_URI}\"/>")
+
+        with self.assertRaises(exceptions.InputFileError):
+            index.ParagraphIndex(filename).build()
+
+
+if __name__ == '__main__':
+    unittest.main()
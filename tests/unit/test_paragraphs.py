@@ -7,11 +7,16 @@ Copyright: Ian Vermes 2019
 """
 
 from tests.base_testcases import ParagraphsTestCase, BaseTestCase, ProcessorTestCase_Genuine
+from tests.base_testcases import WordXMLTestCase
 from tests.special_testcases import ProcessorTestCase_Abstract
+from tests.reference_processors import (ReferenceAuthors, ReferenceTitle,
+                                        long_author_list, long_title)
 
 import helpers.logging as pkg_logging
 from helpers import paragraphs
 import helpers.paragraphs  # for tagetted mocking
+from helpers import runs
+from helpers import xml
 import exceptions
 
 import testfixtures
@@ -20,10 +25,16 @@ from lxml import etree
 from unittest.mock import patch, MagicMock
 from collections import defaultdict
 import random
+import re
 import unittest
 import functools
 import itertools
 import os
+import types
+import threading
+import contextlib
+import collections
+import json
 
 PREPROCESSED_CONFIG = {
     "pre_italic": "Berthelot, Katell, Michaël Langlois and Thierry Legrand,",
@@ -680,6 +691,501 @@ class Test_ProcessorMeta_Class(ProcessorTestCase_Abstract, ProcessorTestCase_Gen
                 result = method(string)
                 self.assertEqual(expected, result)
 
+class Test_Processor_Memoization(BaseTestCase):
+
+    def setUp(self):
+        paragraphs.clear_memo()
+        self.addCleanup(paragraphs.clear_memo)
+        self.authors = PREPROCESSED_CONFIG["pre_italic"]
+        self.title = "Some title. Journal: Volume XI."
+
+    def test_memo_info_names(self):
+        expected = {"ProcessorAuthors.split", "ProcessorAuthors.strip_editor",
+                    "ProcessorTitle.scan",
+                    "ProcessorMeta.split", "Processor._validation_state"}
+
+        self.assertTrue(expected.issubset(paragraphs.memo_info()))
+
+    def test_repeated_strings_hit(self):
+        expected = paragraphs.ProcessorAuthors.split(self.authors)
+        result = paragraphs.ProcessorAuthors.split(self.authors)
+
+        info = paragraphs.memo_info()["ProcessorAuthors.split"]
+        self.assertEqual(result, expected)
+        self.assertEqual((info.hits, info.misses), (1, 1))
+        self.assertEqual(info.hit_rate, 0.5)
+
+    def test_returned_values_are_copies(self):
+        result = paragraphs.ProcessorTitle.split(self.title)
+        result.append("mutated")
+
+        self.assertEqual(paragraphs.ProcessorTitle.split(self.title),
+                         ["Some title", "Journal: Volume XI"])
+
+    def test_validation_runs_once_per_string(self):
+        with patch.object(paragraphs.ProcessorTitle, "_isValid",
+                          autospec=True,
+                          side_effect=paragraphs.ProcessorTitle._isValid) as mock_isValid:
+            first = paragraphs.ProcessorTitle(self.title)
+            second = paragraphs.ProcessorTitle(self.title)
+
+        mock_isValid.assert_called_once()
+        self.assertEqual(first.validation_results, second.validation_results)
+        self.assertEqual((first.title, first.series),
+                         (second.title, second.series))
+
+    def test_validation_state_is_not_shared(self):
+        first = paragraphs.ProcessorAuthors(self.authors)
+        second = paragraphs.ProcessorAuthors(self.authors)
+
+        first._structure_report.add("mutated")
+
+        self.assertNotIn("mutated", second.validation_results)
+        self.assertEqual(first.isEditor(), second.isEditor())
+
+    def test_same_results_as_unmemoized(self):
+        strings = [self.authors, "Roberts, Lilly-Ann (ed.),",
+                   "Wrong, Borris L. ed,"]
+        expected = []
+        for string in strings:
+            paragraphs.clear_memo()
+            processor = paragraphs.ProcessorAuthors(string)
+            expected.append((processor.authors, processor.editors,
+                             processor.validation_results))
+
+        result = []
+        for string in strings * 2:
+            processor = paragraphs.ProcessorAuthors(string)
+            result.append((processor.authors, processor.editors,
+                           processor.validation_results))
+
+        self.assertEqual(result, expected * 2)
+
+    def test_clear_memo(self):
+        paragraphs.ProcessorTitle.scan(self.title)
+        self.assertEqual(paragraphs.memo_info()["ProcessorTitle.scan"].currsize, 1,
+                         msg="Precondition")
+
+        paragraphs.clear_memo()
+
+        info = paragraphs.memo_info()["ProcessorTitle.scan"]
+        self.assertEqual((info.hits, info.misses, info.currsize), (0, 0, 0))
+
+    def test_memo_is_bounded(self):
+        for info in paragraphs.memo_info().values():
+            with self.subTest(maxsize=info.maxsize):
+                self.assertEqual(info.maxsize, paragraphs.MEMO_MAXSIZE)
+
+
+class Test_ProcessorAuthors_Tokenizer(BaseTestCase):
+
+    strings = [PREPROCESSED_CONFIG["pre_italic"],
+               "Roberts, Lilly-Ann, and J.R.R. Tolkein (eds),",
+               "Roberts, Lilly-Ann (ed.),",
+               "  Roberts, Lilly-Ann (ed.),  ",
+               "Roberts, Lilly-Ann (ed.),\n",
+               "Roberts, Lilly-Ann (ed.), (eds),",
+               "Roberts, Lilly-Ann (eds) and Smith,",
+               "Wrong, Borris L. ed,",
+               "Allan Poe, Edgar (Ed.),",
+               "Roberts, Lilly-Ann, Tolkein, J.R.R., and Smith, Bob,",
+               "Roberts, Andrew, and Smith, ANDY,",
+               "Roberts, Lilly, AND Tolkein,",
+               "A, B, and and C,",
+               "A, B, AND and C,",
+               ",, and A, B,",
+               "A, B, and (ed.),",
+               "A,B,C,",
+               "A, B,, C,",
+               "No commas at all",
+               long_author_list(40),
+               long_author_list(40, editors=False)]
+
+    def setUp(self):
+        paragraphs.clear_memo()
+        self.addCleanup(paragraphs.clear_memo)
+
+    def test_counts_equal_str_count(self):
+        for string in self.strings:
+            with self.subTest(string=string):
+                tokens = paragraphs.ProcessorAuthors.tokenize(string)
+                self.assertEqual(tokens.commas, string.count(","))
+                self.assertEqual(tokens.commaspaces, string.count(", "))
+                self.assertEqual(tokens.oxford_commas,
+                                 string.lower().count(", and"))
+                self.assertEqual(tokens.bare_ands, string.count(" and "))
+                self.assertEqual(tokens.oxford_ands, string.count(", and "))
+                self.assertEqual(tokens.editors,
+                                 len(re.findall(r"\(ed[\.s]\)", string)))
+                self.assertEqual(tokens.positional_editor,
+                                 bool(re.search(r"\(ed[\.s]\)\,$", string)))
+
+    def test_split_and_strip_editor_same_as_reference(self):
+        Processor, Reference = paragraphs.ProcessorAuthors, ReferenceAuthors
+        for string in self.strings:
+            for join_first in (True, False):
+                with self.subTest(string=string, join_first=join_first):
+                    self.assertEqual(Processor.strip_editor(string),
+                                     Reference.strip_editor(string))
+                    try:
+                        expected = Reference.split(string, join_first)
+                    except ValueError:
+                        with self.assertRaises(ValueError):
+                            Processor.split(string, join_first)
+                    else:
+                        result = Processor.split(string, join_first)
+                        self.assertEqual(result, expected)
+
+    def test_processor_same_as_reference(self):
+        attrs = ["authors", "editors", "validation_results"]
+        for string in self.strings:
+            with self.subTest(string=string):
+                try:
+                    expected = ReferenceAuthors(string)
+                except ValueError:
+                    with self.assertRaises(ValueError):
+                        paragraphs.ProcessorAuthors(string)
+                    continue
+                result = paragraphs.ProcessorAuthors(string)
+                for attr in attrs:
+                    self.assertEqual(getattr(result, attr),
+                                     getattr(expected, attr), msg=attr)
+                self.assertEqual(result.isEditor(), expected.isEditor())
+
+    def test_string_tokenized_once(self):
+        string = long_author_list(40)
+
+        processor = paragraphs.ProcessorAuthors(string)
+        processor.isEditor()
+
+        info = paragraphs.memo_info()["ProcessorAuthors.tokenize"]
+        self.assertEqual(info.misses, 1)
+        self.assertGreater(info.hits, 0)
+
+
+class Test_ProcessorTitle_Scanner(BaseTestCase):
+
+    strings = ["Superior debugging 101.",
+               "Important subject matter,",
+               "Some title. Journal: Volume XI.",
+               "Journal: Volume XI. Some title.",
+               "Hope: a story. Some Journal: Volume I.",
+               "Hope: a story. Some Journal: Vol. I.",
+               "Hope: a story. Some Journal: volume 12.",
+               "Hope: a story. Some Journal: Volume 1.",
+               "Hope: a story. Some Journal: Volume I",
+               "Hope: a story. Some Journal:Volume I..",
+               "Hope. A story. Some Journal: Volume XI.",
+               "Volume XI of the work. Part two: Volume II.",
+               "Volume 12 of the work: a story.",
+               "İ" * 12 + ": a story. Volume 22.",
+               "İ" * 12 + " Volume 22. A story. Part two.",
+               "İ" * 12 + " Volume 22: a story.",
+               "A story about volumes.",
+               "A question?",
+               "An exclamation!.",
+               "Ends twice..",
+               "A. B.",
+               ".",
+               "x.",
+               long_title(20),
+               long_title(20, series=False)]
+
+    def setUp(self):
+        paragraphs.clear_memo()
+        self.addCleanup(paragraphs.clear_memo)
+
+    def test_scan_positions_equal_str_find(self):
+        for string in self.strings:
+            with self.subTest(string=string):
+                scan = paragraphs.ProcessorTitle.scan(string)
+                lower = string.lower()
+                self.assertEqual(scan.fullstops, lower.count("."))
+                self.assertEqual(scan.first_fullstop, lower.find("."))
+                self.assertEqual(scan.first_colon, lower.find(":"))
+                self.assertEqual(scan.has_vol, "vol" in lower)
+
+    def test_split_and_isSeries_same_as_reference(self):
+        Processor, Reference = paragraphs.ProcessorTitle, ReferenceTitle
+        for string in self.strings:
+            with self.subTest(string=string):
+                self.assertEqual(Processor._isSeries(string),
+                                 Reference._isSeries(string))
+                self.assertEqual(Processor.split(string),
+                                 Reference.split(string))
+
+    def test_processor_same_as_reference(self):
+        attrs = ["title", "series", "validation_results"]
+        for string in self.strings:
+            with self.subTest(string=string):
+                try:
+                    expected = ReferenceTitle(string)
+                except IndexError:
+                    with self.assertRaises(IndexError):
+                        paragraphs.ProcessorTitle(string)
+                    continue
+                result = paragraphs.ProcessorTitle(string)
+                for attr in attrs:
+                    self.assertEqual(getattr(result, attr),
+                                     getattr(expected, attr), msg=attr)
+                self.assertEqual(result.isSeries(), expected.isSeries())
+
+    def test_string_scanned_once(self):
+        processor = paragraphs.ProcessorTitle(long_title(20))
+        processor.isSeries()
+
+        info = paragraphs.memo_info()["ProcessorTitle.scan"]
+        self.assertEqual(info.misses, 1)
+        self.assertGreater(info.hits, 0)
+
+
+class Test_Processor_Batch(BaseTestCase):
+
+    authors = [PREPROCESSED_CONFIG["pre_italic"],
+               "Roberts, Lilly-Ann (ed.),",
+               "Wrong, Borris L. ed,",
+               "Roberts, Lilly-Ann and J.R.R. Tolkein,",
+               "No commas here",
+               "Roberts, Lilly-Ann, Tolkein,",
+               "Roberts, Lilly-Ann,"]
+    titles = [PREPROCESSED_CONFIG["italic"],
+              "Some title. Journal: Volume XI.",
+              "Journal: Volume XI. Some title.",
+              "Important subject matter,",
+              "Really?!",
+              "A",
+              "Superior debugging 101."]
+    metas = [PREPROCESSED_CONFIG["post_italic"],
+             "Translated by David Ball. Oxford University Press, Oxford, 2018. 368 pp. £25.00. ISBN 978 0 19049 954 9.",
+             "Princeton University Press, Princeton NJ, 2018. xiv, 351 pp. £32.95. ISBN 9780 69117 498 3.",
+             "Illustrated by Jo Bloggs. Some Press, London, 2001. ISSN 1234 567X.",
+             "Just some text"]
+
+    def setUp(self):
+        paragraphs.clear_memo()
+
+    def per_string(self, Processor, strings):
+        result = []
+        for string in strings:
+            processor = Processor(string)
+            result.append({a: getattr(processor, a)
+                           for a in Processor._data_attrs})
+        return result
+
+    def test_batch_counts_equal_str_count(self):
+        strings = ["a, b, and c,", ",,", "x", "and, and"]
+        tokens = [",", ", ", ", and", " and ", "and"]
+
+        result = paragraphs.Processor._batch_counts(strings, tokens)
+
+        for token in tokens:
+            with self.subTest(token=token):
+                self.assertEqual(result[token],
+                                 [string.count(token) for string in strings])
+
+    def test_batch_counts_lower_with_longer_lowercase(self):
+        # 'İ'.lower() is two code points long.
+        strings = ["İ" * 40 + " ISBN 1", "isbn", "İsbn İSBN"]
+        tokens = ["isbn", "i̇"]
+
+        result = paragraphs.Processor._batch_counts(strings, tokens,
+                                                    lower=True)
+
+        for token in tokens:
+            with self.subTest(token=token):
+                self.assertEqual(result[token],
+                                 [s.lower().count(token) for s in strings])
+
+    def test_meta_batch_with_longer_lowercase_same_as_split(self):
+        metas = ["İ" * 40 + " Press, 2018. ISBN 978 0 19049 954 9.",
+                 "Oxford University Press."]
+        expected = [paragraphs.ProcessorMeta.split(m) for m in metas]
+
+        result = paragraphs.ProcessorMeta.batch(metas)
+
+        self.assertEqual(result, expected)
+        self.assertEqual(result[0]["isbn"], "ISBN 978 0 19049 954 9")
+
+    def test_authors_batch_same_as_per_string(self):
+        expected = self.per_string(paragraphs.ProcessorAuthors, self.authors)
+
+        result = paragraphs.ProcessorAuthors.batch(self.authors)
+
+        self.assertEqual(result, expected)
+
+    def test_title_batch_same_as_per_string(self):
+        expected = self.per_string(paragraphs.ProcessorTitle, self.titles)
+
+        result = paragraphs.ProcessorTitle.batch(self.titles)
+
+        self.assertEqual(result, expected)
+
+    def test_meta_batch_same_as_split(self):
+        expected = [paragraphs.ProcessorMeta.split(m) for m in self.metas]
+
+        result = paragraphs.ProcessorMeta.batch(self.metas)
+
+        self.assertEqual(result, expected)
+
+    def test_batch_features_only_rule_out_invalid_strings(self):
+        cases = {paragraphs.ProcessorAuthors: self.authors,
+                 paragraphs.ProcessorTitle: self.titles}
+        for Processor, strings in cases.items():
+            ambiguous = Processor._batch_ambiguous(strings)
+            for string, flag in zip(strings, ambiguous):
+                with self.subTest(processor=Processor.__name__, string=string):
+                    if not flag:
+                        self.assertFalse(Processor(string).isValid())
+
+    def test_batch_only_processes_ambiguous_strings(self):
+        cases = {paragraphs.ProcessorAuthors: (self.authors, 4),
+                 paragraphs.ProcessorTitle: (self.titles, 4)}
+        for Processor, (strings, expected_calls) in cases.items():
+            with self.subTest(processor=Processor.__name__):
+                with patch.object(Processor, "_assign_values",
+                                  autospec=True) as mock_assign:
+                    Processor.batch(strings)
+
+                self.assertEqual(mock_assign.call_count, expected_calls)
+
+    def test_meta_batch_skips_searches_without_required_substrings(self):
+        with patch.object(paragraphs.ProcessorMeta, "_search_isbn",
+                          return_value="") as mock_isbn:
+            paragraphs.ProcessorMeta.batch(["Some Press, London, 2001."])
+
+        mock_isbn.assert_not_called()
+
+    def test_batch_fill_from_data_attrs(self):
+        class Processor(paragraphs.ProcessorTitle):
+            @classmethod
+            def _batch_ambiguous(cls, strings):
+                return [False] * len(strings)
+
+        result = Processor.batch(["Important subject matter,"])
+
+        self.assertEqual(result, [{"title": "", "series": ""}])
+
+    def test_batch_accepts_PreProcessed_like_objects(self):
+        pre = types.SimpleNamespace(**PREPROCESSED_CONFIG)
+        cases = {paragraphs.ProcessorAuthors: "pre_italic",
+                 paragraphs.ProcessorTitle: "italic",
+                 paragraphs.ProcessorMeta: "post_italic"}
+        for Processor, attr in cases.items():
+            with self.subTest(processor=Processor.__name__):
+                expected = Processor.batch([getattr(pre, attr)])
+                self.assertEqual(Processor.batch([pre]), expected)
+
+    def test_batch_wrong_args(self):
+        for Processor in paragraphs.PostProcessed._processor_types:
+            with self.subTest(processor=Processor.__name__):
+                with self.assertRaises(ValueError):
+                    Processor.batch(["Some, string,", ""])
+                with self.assertRaises(TypeError):
+                    Processor.batch([1])
+
+
+class Test_PostProcessed_Lazy(BaseTestCase):
+
+    def setUp(self):
+        self.pre = types.SimpleNamespace(**PREPROCESSED_CONFIG)
+
+    def test_no_processor_runs_on_instantiation(self):
+        classes = [P.__name__ for P in paragraphs.PostProcessed._processor_types]
+        mocks = [patch.object(paragraphs, name) for name in classes]
+        with contextlib.ExitStack() as stack:
+            mocked = [stack.enter_context(m) for m in mocks]
+            # The class attribute still refers to the genuine classes.
+            with patch.object(paragraphs.PostProcessed, "_processor_types",
+                              mocked):
+                paragraphs.PostProcessed(self.pre)
+
+        for mock in mocked:
+            mock.assert_not_called()
+
+    def test_every_default_field_on_access(self):
+        post = paragraphs.PostProcessed(self.pre)
+
+        self.assertTrue(post._data_attrs, msg="Precondition")
+        for attr in post._data_attrs:
+            with self.subTest(attr=attr):
+                getattr(post, attr)
+        self.assertNotIn(paragraphs.ProcessorMeta,
+                         paragraphs.PostProcessed._processor_types)
+
+    def test_requested_fields_identical(self):
+        expected = {"authors": paragraphs.ProcessorAuthors(self.pre).authors,
+                    "editors": paragraphs.ProcessorAuthors(self.pre).editors,
+                    "title": paragraphs.ProcessorTitle(self.pre).title,
+                    "series": paragraphs.ProcessorTitle(self.pre).series}
+        post = paragraphs.PostProcessed(self.pre, fields=expected)
+
+        for attr, value in expected.items():
+            with self.subTest(attr=attr):
+                self.assertEqual(getattr(post, attr), value)
+
+    def test_projection_skips_other_processors(self):
+        with patch.object(paragraphs.ProcessorAuthors, "_assign_values") as mock_authors:
+            post = paragraphs.PostProcessed(self.pre, fields=["title"])
+            post.title
+
+        mock_authors.assert_not_called()
+        self.assertNotIn("_processorauthors_obj", vars(post))
+        self.assertNotIn("_processormeta_obj", vars(post))
+
+    def test_processor_instantiated_once(self):
+        post = paragraphs.PostProcessed(self.pre, fields=["title", "series"])
+        with patch.object(paragraphs.ProcessorTitle, "_assign_values",
+                          autospec=True) as mock_assign:
+            post.title
+            post.series
+            post.title
+
+        mock_assign.assert_called_once()
+
+    def test_unrequested_field_raises_AttributeError(self):
+        post = paragraphs.PostProcessed(self.pre, fields=["title"])
+
+        self.assertFalse(hasattr(post, "authors"))
+        with self.assertRaises(AttributeError):
+            post.isbn
+
+    def test_unknown_field_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            paragraphs.PostProcessed(self.pre, fields=["title", "foo"])
+
+    def test_iter_processors_of_fields(self):
+        post = paragraphs.PostProcessed(self.pre, fields=["series", "editors"])
+
+        result = list(post.iter_processors())
+
+        self.assertEqual([P for P, _ in result],
+                         [paragraphs.ProcessorAuthors, paragraphs.ProcessorTitle])
+        for Processor, processor in result:
+            with self.subTest(processor=Processor.__name__):
+                self.assertIsInstance(processor, Processor)
+
+    def test_iter_processors_rejected_string(self):
+        pre = types.SimpleNamespace(**dict(PREPROCESSED_CONFIG, italic=""))
+        post = paragraphs.PostProcessed(pre, fields=["authors", "title"])
+
+        result = dict(post.iter_processors())
+
+        self.assertIsInstance(result[paragraphs.ProcessorAuthors],
+                              paragraphs.ProcessorAuthors)
+        self.assertIsNone(result[paragraphs.ProcessorTitle])
+
+    def test_iter_processors_raises_other_errors(self):
+        post = paragraphs.PostProcessed(self.pre, fields=["authors", "title"])
+
+        with patch.object(paragraphs.ProcessorTitle, "_assign_values",
+                          side_effect=ValueError("Boom")):
+            with self.assertRaises(ValueError) as cm:
+                list(post.iter_processors())
+
+        self.assertNotIsInstance(cm.exception,
+                                 exceptions.ProcessorEmptyStringError)
+
+
 class Test_PreProcessed(ParagraphsTestCase):
 
     def setUp(self):
@@ -1513,5 +2019,278 @@ class Test_ProcessParagraphs_Function(ParagraphsTestCase):
                                             msg=f"line='{line_1}'")
 
 
+
+class Test_ProcessParagraphs_Modes(WordXMLTestCase):
+
+    BAD_PATTERN = [(False, False, "Author, "), (True, False, "Title. "),
+                   (False, False, "Press, 2017. "),
+                   (True, False, "Series. "),
+                   (False, False, "12 pp. ISBN 978 3 16155 640 5.")]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        entries = (cls.ENTRIES + [cls.BAD_PATTERN]) * 4
+        filename = cls.make_word_xml("modes.xml", entries=entries)
+        cls.input = xml.XMLAsInput()
+        cls.input.isSuitable(filename, fatal=True)
+        cls.elements = list(cls.input.iter_paragraphs())
+
+    def setUp(self):
+        paragraphs.PreProcessed._reset_xpaths()
+        self.addCleanup(paragraphs.PreProcessed._reset_xpaths)
+
+    def process(self, paragraph_elements, **kwargs):
+        logger = pkg_logging.getLogger().logger
+        with self.assertLogs(logger, level="DEBUG") as logs:
+            counts = paragraphs.process_paragraphs(paragraph_elements,
+                                                   classify=True, **kwargs)
+        return counts, logs.output
+
+    def test_same_counts_and_logs_as_serial(self):
+        sources = {"elements": self.elements,
+                   "runs": [runs.runs_from_element(e) for e in self.elements]}
+        for source, paragraph_elements in sources.items():
+            expected = self.process(paragraph_elements)
+            warnings = [l for l in expected[1] if l.startswith("WARNING")]
+            self.assertEqual(len(warnings), 4, msg="Precondition")
+            for mode in ("thread", "process"):
+                with self.subTest(source=source, mode=mode):
+                    result = self.process(paragraph_elements, mode=mode,
+                                          workers=2)
+
+                    self.assertEqual(result, expected)
+
+    def test_threads_have_xpaths_of_their_own(self):
+        xpaths = {}
+        barrier = threading.Barrier(2, timeout=10)
+
+        def preprocess(element, coalesce=False, context=None):
+            barrier.wait()  # Both threads are busy at once.
+            paragraphs.PreProcessed(element, coalesce=coalesce,
+                                    context=context)
+            xpaths.setdefault(threading.get_ident(), set()).add(
+                id(context.xpaths))
+
+        with patch("helpers.paragraphs._preprocess", side_effect=preprocess):
+            paragraphs.process_paragraphs(self.elements[:2], mode="thread",
+                                          workers=2)
+
+        self.assertEqual(len(xpaths), 2)
+        self.assertTrue(all(len(ids) == 1 for ids in xpaths.values()))
+        self.assertEqual(len(set.union(*xpaths.values())), len(xpaths))
+        self.assertIsNone(paragraphs.PreProcessed._xpaths)
+
+    def test_threads_do_not_coalesce(self):
+        elements = [etree.fromstring(etree.tostring(e)) for e in self.elements]
+        main_thread = threading.get_ident()
+        coalesced_in = set()
+        coalesce_element = paragraphs.coalesce_element
+
+        def coalesce(paragraph):
+            coalesced_in.add(threading.get_ident())
+            return coalesce_element(paragraph)
+
+        with patch("helpers.paragraphs.coalesce_element",
+                   side_effect=coalesce) as mock_coalesce:
+            paragraphs.process_paragraphs(elements, coalesce=True,
+                                          mode="thread", workers=2)
+
+        self.assertEqual(mock_coalesce.call_count, len(elements))
+        self.assertEqual(coalesced_in, {main_thread})
+
+    def test_errors_are_raised(self):
+        with patch.object(paragraphs.PreProcessed, "identify_substrings",
+                          side_effect=KeyError("Boom")):
+            for mode in paragraphs.EXECUTION_MODES[:2]:
+                with self.subTest(mode=mode), self.assertRaises(KeyError):
+                    paragraphs.process_paragraphs(self.elements, mode=mode)
+
+    def test_unknown_mode_raises(self):
+        with self.assertRaises(ValueError):
+            paragraphs.process_paragraphs(self.elements, mode="fibres")
+
+
+
+class Test_DocumentContext(WordXMLTestCase):
+
+    OTHER_W_URI = "http://purl.oclc.org/ooxml/wordprocessingml/main"
+
+    def setUp(self):
+        paragraphs.PreProcessed._reset_xpaths()
+        self.addCleanup(paragraphs.PreProcessed._reset_xpaths)
+
+    def make_elements(self, uri):
+        return [etree.fromstring(f"<w:body xmlns:w=\"{uri}\">"
+                                 f"{self.make_paragraph_xml(entry)}"
+                                 "</w:body>")[0]
+                for entry in self.ENTRIES]
+
+    def test_documents_with_different_nsmaps(self):
+        documents = [self.make_elements(self.W_URI),
+                     self.make_elements(self.OTHER_W_URI)]
+        expected = [[paragraphs.PreProcessed(runs.runs_from_element(e)).italic
+                     for e in elements] for elements in documents]
+
+        with paragraphs.DocumentContext() as first, \
+                paragraphs.DocumentContext() as second:
+            # The paragraphs of both documents are interleaved.
+            result = [[], []]
+            for pair in zip(*documents):
+                for i, (element, context) in enumerate(zip(pair, (first,
+                                                                  second))):
+                    pre = paragraphs.PreProcessed(element, context=context)
+                    result[i].append(pre.italic)
+                    self.assertIs(pre.xpaths, context.xpaths)
+
+            self.assertEqual(first.nsmap["w"], self.W_URI)
+            self.assertEqual(second.nsmap["w"], self.OTHER_W_URI)
+        self.assertEqual(result, expected)
+        self.assertIsNone(paragraphs.PreProcessed._xpaths)
+
+    def test_close_releases_xpaths(self):
+        element, *_ = self.make_elements(self.W_URI)
+        context = paragraphs.DocumentContext()
+        xpaths = context.get_xpaths(element)
+
+        self.assertIs(context.get_xpaths(element), xpaths)
+        context.close()
+
+        self.assertIsNone(context.nsmap)
+        self.assertIsNone(context.xpaths)
+        self.assertIsNot(context.get_xpaths(element), xpaths)
+
+    def test_process_paragraphs_with_context(self):
+        elements = self.make_elements(self.OTHER_W_URI)
+        context = paragraphs.DocumentContext()
+
+        with patch.object(paragraphs.DocumentContext, "close") as mock_close:
+            paragraphs.process_paragraphs(elements, context=context)
+            mock_close.assert_not_called()
+            paragraphs.process_paragraphs(elements)
+            mock_close.assert_called_once_with()
+
+        self.assertEqual(context.nsmap["w"], self.OTHER_W_URI)
+
+
+
+class Test_Stages(WordXMLTestCase):
+
+    BAD_PATTERN = Test_ProcessParagraphs_Modes.BAD_PATTERN
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        heading = cls.make_paragraph_xml([(True, False, "Biblical Studies")])
+        cls.filename = cls.make_word_xml("stages.xml",
+                                         entries=cls.ENTRIES + [cls.BAD_PATTERN],
+                                         body_extra=heading)
+
+    def setUp(self):
+        paragraphs.PreProcessed._reset_xpaths()
+        self.addCleanup(paragraphs.PreProcessed._reset_xpaths)
+
+    def test_chain_serializes_every_paragraph(self):
+        expected = runs.extract(self.filename, use_sidecar=False)
+
+        lines = list(paragraphs.chain_stages(self.filename))
+
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([r["text"] for r in records],
+                         [p.text for p in expected])
+        self.assertEqual([r["label"] for r in records],
+                         ["entry"] * 4 + ["heading"])
+        for record, paragraph in zip(records[:3], expected):
+            with self.subTest(number=record["number"]):
+                pre = paragraphs.PreProcessed(paragraph)
+                self.assertEqual(record["italic"], pre.italic)
+                self.assertEqual(set(record["valid"]),
+                                 {"ProcessorAuthors", "ProcessorTitle"})
+        self.assertTrue(records[3]["error"].startswith(
+            "ParagraphItalicPatternWarning"))
+        self.assertNotIn("italic", records[4])
+
+    def test_stages_are_lazy(self):
+        consumed = []
+
+        def source():
+            for paragraph in runs.extract(self.filename, use_sidecar=False):
+                consumed.append(paragraph)
+                yield paragraph
+
+        chain = paragraphs.chain_stages(source())
+        self.assertEqual(consumed, [])
+
+        first = json.loads(next(chain))
+
+        self.assertEqual(first["number"], 1)
+        self.assertEqual(len(consumed), 1)
+
+    def test_stages_can_be_removed_and_added(self):
+        input = xml.XMLAsInput()
+        input.isSuitable(self.filename, fatal=True)
+        elements = list(input.iter_paragraphs())[:3]
+        stages = [paragraphs.select_paragraphs, paragraphs.process_records,
+                  functools.partial(filter, lambda r: r.preprocessed)]
+
+        records = list(paragraphs.chain_stages(elements, stages))
+
+        self.assertEqual([r.number for r in records], [1, 2, 3])
+        self.assertTrue(all(r.label is None and r.runs is None
+                            for r in records))
+        self.assertIs(records[0].preprocessed.xpaths,
+                      records[1].preprocessed.xpaths)
+
+    def test_classify_counts_and_process_skips(self):
+        counts = collections.Counter()
+        stages = [paragraphs.select_paragraphs, paragraphs.extract_runs,
+                  functools.partial(paragraphs.classify_records,
+                                    counts=counts),
+                  paragraphs.process_records]
+
+        with patch("helpers.paragraphs.PreProcessed",
+                   wraps=paragraphs.PreProcessed) as mock_pre:
+            records = list(paragraphs.chain_stages(self.filename, stages))
+
+        self.assertEqual(counts, {"entry": 4, "heading": 1})
+        self.assertEqual(mock_pre.call_count, 4)
+        self.assertIsInstance(records[3].error, exceptions.RecomposeWarning)
+        self.assertIsNone(records[4].preprocessed)
+
+    def test_paragraph_without_italics_is_an_error_without_classify(self):
+        styles = ("<w:style w:type=\"paragraph\" w:styleId=\"Quote\">"
+                  "<w:rPr><w:i/></w:rPr></w:style>")
+        plain = self.make_paragraph_xml([(False, False, "Not italic at all.")])
+        filename = self.make_word_xml("stages_styled.xml", body_extra=plain,
+                                      styles_extra=styles)
+        stages = [s for s in paragraphs.STAGES
+                  if s is not paragraphs.classify_records]
+
+        lines = list(paragraphs.chain_stages(filename, stages))
+
+        records = [json.loads(line) for line in lines]
+        # The blank paragraphs between entries are selected too.
+        errors = [r for r in records if "error" in r]
+        self.assertEqual([r["number"] for r in errors], [2, 4, 6])
+        self.assertEqual(errors[-1]["text"], "Not italic at all.")
+        for record in errors:
+            with self.subTest(number=record["number"]):
+                self.assertTrue(record["error"].startswith(
+                    "PreProcessedValueError"))
+
+    def test_errors_are_raised(self):
+        with patch.object(paragraphs.PreProcessed, "identify_substrings",
+                          side_effect=KeyError("Boom")):
+            with self.assertRaises(KeyError):
+                list(paragraphs.chain_stages(self.filename))
+
+    def test_unsuitable_file_raises(self):
+        filename = self.make_word_xml("stages_tc.xml",
+                                      body_extra=self.REVISIONS)
+
+        with self.assertRaises(exceptions.InputFileTrackChangesError):
+            next(paragraphs.chain_stages(filename))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Unit test of main/helpers/pipeline.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import WordXMLTestCase
+from helpers import pipeline
+from helpers import paragraphs
+from helpers import classifier
+from helpers import runs
+import exceptions
+import core
+
+import asyncio
+import concurrent.futures
+import os
+import unittest
+from unittest.mock import patch
+
+
+class Test_AConvert(WordXMLTestCase):
+
+    chunk_size = 1 << 10
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        heading = cls.make_paragraph_xml([(True, False, "Biblical Studies")])
+        cls.filename = cls.make_word_xml("pipeline.xml",
+                                         entries=cls.ENTRIES * 20,
+                                         body_extra=heading)
+
+    def convert(self, filename=None, stop=None, **kwargs):
+        if filename is None:
+            filename = self.filename
+        kwargs.setdefault("chunk_size", self.chunk_size)
+
+        async def collect():
+            records = []
+            async for record in pipeline.aconvert(filename, **kwargs):
+                records.append(record)
+                if len(records) == stop:
+                    break
+            return records
+        return asyncio.run(collect())
+
+    def expected(self):
+        records = []
+        paragraph_runs = runs.extract(self.filename, use_sidecar=False,
+                                      backend="events")
+        for number, paragraph in enumerate(paragraph_runs, start=1):
+            label = classifier.classify(paragraph)
+            italic = None
+            if label == classifier.ENTRY:
+                italic = paragraphs.PreProcessed(paragraph).italic
+            records.append((number, label, paragraph, italic))
+        return records
+
+    @staticmethod
+    def simplify(records):
+        return [(r.number, r.label, r.runs,
+                 r.preprocessed and r.preprocessed.italic) for r in records]
+
+    def test_same_records_as_serial(self):
+        expected = self.expected()
+        with patch("helpers.runs.extract_chunk",
+                   wraps=runs.extract_chunk) as mock_chunk:
+            result = self.convert()
+
+        self.assertGreater(mock_chunk.call_count, 2, msg="Precondition")
+        self.assertEqual(self.simplify(result), expected)
+        self.assertEqual(result[-1].label, classifier.HEADING)
+
+    def test_in_process_pool(self):
+        with concurrent.futures.ProcessPoolExecutor(2) as executor:
+            result = self.convert(executor=executor)
+
+        self.assertEqual(self.simplify(result), self.expected())
+
+    def test_backpressure(self):
+        with patch("helpers.runs.extract_chunk",
+                   wraps=runs.extract_chunk) as mock_chunk:
+            self.convert(queue_size=1, stop=1)
+            stopped = mock_chunk.call_count
+            self.convert(queue_size=1)
+            total = mock_chunk.call_count - stopped
+
+        # One batch is consumed, one per queue and one per stage in flight.
+        self.assertLessEqual(stopped, 5)
+        self.assertLess(stopped, total)
+
+    def test_fallback_skips_emitted_paragraphs(self):
+        calls = []
+
+        def extract_chunk(*args):
+            calls.append(args)
+            return None if len(calls) == 3 else runs.extract_chunk(*args)
+
+        with patch("helpers.runs.extract_chunk", side_effect=extract_chunk):
+            result = self.convert()
+
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.simplify(result), self.expected())
+
+    def test_unsuitable_files_raise(self):
+        trackchanges = self.make_word_xml("pipeline_tc.xml",
+                                          body_extra=self.REVISIONS)
+        other = os.path.join(self.tempdir, "pipeline.txt")
+        with open(other, "w") as handle:
+            handle.write("Not XML")
+        setup = [(trackchanges, exceptions.InputFileTrackChangesError),
+                 (other, exceptions.InputFileError)]
+        for filename, expected in setup:
+            with self.subTest(filename=os.path.basename(filename)):
+                with self.assertRaises(expected):
+                    self.convert(filename)
+
+    def test_unsuitable_namespaces_raise_before_records(self):
+        foo = "<foo:bar xmlns:foo=\"http://foo.com\"/>"
+        part = f"<pkg:part pkg:name=\"/x.xml\"><pkg:xmlData>{foo}" \
+               "</pkg:xmlData></pkg:part>"
+        setup = [("outside", self.make_word_xml("pipeline_ns1.xml",
+                                                 entries=self.ENTRIES * 20,
+                                                 parts_extra=part)),
+                 ("body", self.make_word_xml("pipeline_ns2.xml",
+                                              entries=self.ENTRIES * 20,
+                                              body_extra=foo))]
+        for where, filename in setup:
+            with self.subTest(where=where):
+                with patch("helpers.runs.extract_chunk",
+                           wraps=runs.extract_chunk) as mock_chunk:
+                    with self.assertRaises(exceptions.InputFileError):
+                        self.convert(filename, stop=1)
+                mock_chunk.assert_not_called()
+
+    def test_errors_are_raised(self):
+        with patch.object(paragraphs.PreProcessed, "identify_substrings",
+                          side_effect=KeyError("Boom")):
+            with self.assertRaises(KeyError):
+                self.convert()
+
+    def test_core_entry_point(self):
+        async def first():
+            async for record in core.aconvert(self.filename):
+                return record
+
+        record = asyncio.run(first())
+
+        self.assertEqual(record.number, 1)
+        self.assertEqual(record.label, classifier.ENTRY)
+
+
+if __name__ == '__main__':
+    unittest.main()
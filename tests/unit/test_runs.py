@@ -0,0 +1,652 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Unit test of main/helpers/runs.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import WordXMLTestCase
+from helpers import runs
+from helpers import paragraphs
+from helpers import xml
+import exceptions
+
+from lxml import etree
+
+from unittest.mock import patch
+import unittest
+import os
+
+
+class Test_Runs_Extraction(WordXMLTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("runs.xml")
+        cls.input = xml.XMLAsInput()
+        cls.input.isSuitable(cls.filename, fatal=True)
+
+    def setUp(self):
+        paragraphs.PreProcessed._reset_xpaths()
+
+    def test_runs_from_element(self):
+        paras = list(self.input.iter_paragraphs())
+        self.assertEqual(len(paras), len(self.ENTRIES), msg="Precondition")
+
+        for i, (para, entry) in enumerate(zip(paras, self.ENTRIES)):
+            with self.subTest(para_index=i):
+                result = runs.runs_from_element(para)
+
+                self.assertIsInstance(result, runs.Runs)
+                self.assertEqual(list(result), [runs.Run(*r) for r in entry])
+
+    def test_runs_from_element_wrong_arg(self):
+        with self.assertRaises(TypeError):
+            runs.runs_from_element("<w:p/>")
+
+    def test_PreProcessed_from_runs_matches_element(self):
+        attrs = ["pre_italic", "italic", "post_italic"]
+        for i, para in enumerate(self.input.iter_paragraphs()):
+            from_element = paragraphs.PreProcessed(para)
+            from_runs = paragraphs.PreProcessed(runs.runs_from_element(para))
+            for attr in attrs:
+                with self.subTest(para_index=i, attr=attr):
+                    self.assertEqual(getattr(from_element, attr),
+                                     getattr(from_runs, attr))
+
+    def test_PreProcessed_from_runs_matches_element_italic_mark(self):
+        w = f"xmlns:w=\"{self.W_URI}\""
+        snippet = (f"<w:p {w}><w:pPr><w:rPr><w:i/></w:rPr></w:pPr>"
+                   "<w:r><w:t>Smith, J. </w:t></w:r>"
+                   "<w:r><w:rPr><w:i/></w:rPr><w:t>A Title.</w:t></w:r>"
+                   "<w:r><w:t> Press, 2018.</w:t></w:r></w:p>")
+        para = etree.fromstring(snippet)
+        expected = ("Smith, J.", "A Title.", "Press, 2018.")
+
+        from_element = paragraphs.PreProcessed(para)
+        from_runs = paragraphs.PreProcessed(runs.runs_from_element(para))
+
+        for pre in (from_element, from_runs):
+            with self.subTest(source=type(pre._PreProcessed__paragraph)):
+                self.assertEqual((pre.pre_italic, pre.italic, pre.post_italic),
+                                 expected)
+
+    def test_PreProcessed_from_runs_raises_on_pattern(self):
+        bad = runs.Runs([(False, False, "Pre"), (True, False, "Italic"),
+                         (False, False, "Interrupted"), (True, False, "More"),
+                         (False, False, "Post")])
+        expected_exception = exceptions.ParagraphItalicPatternWarning
+
+        with self.assertRaises(expected_exception) as fail:
+            paragraphs.PreProcessed(bad)
+        self.assertIn("italic, non-italic, italic", str(fail.exception))
+
+    def test_PreProcessed_from_runs_without_italic(self):
+        no_italic = runs.Runs([(False, False, "Just some text.")])
+
+        with self.assertRaises(exceptions.PreProcessedValueError):
+            paragraphs.PreProcessed(no_italic)
+
+
+class Test_RunsSidecar(WordXMLTestCase):
+
+    def setUp(self):
+        self.filename = self.make_word_xml("sidecar.xml")
+        self.sidecar = runs.RunsSidecar(self.filename)
+        self.addCleanup(self.remove_sidecar)
+
+    def remove_sidecar(self):
+        if os.path.exists(self.sidecar.filename):
+            os.remove(self.sidecar.filename)
+
+    def test_default_filename(self):
+        expected = self.filename + runs.RunsSidecar.SUFFIX
+        self.assertEqual(self.sidecar.filename, expected)
+
+    def test_roundtrip(self):
+        expected = runs.extract(self.filename, use_sidecar=False)
+        self.assertFalse(self.sidecar.isValid(), msg="Precondition")
+
+        self.sidecar.dump(expected)
+        result = self.sidecar.load()
+
+        self.assertTrue(self.sidecar.isValid())
+        self.assertEqual(result, expected)
+        for paragraph_runs in result:
+            self.assertIsInstance(paragraph_runs, runs.Runs)
+
+    def test_invalid_when_source_changes(self):
+        self.sidecar.dump(runs.extract(self.filename, use_sidecar=False))
+        self.assertTrue(self.sidecar.isValid(), msg="Precondition")
+
+        with open(self.filename, "a") as handle:
+            handle.write("\n")
+
+        self.assertFalse(self.sidecar.isValid())
+
+    def test_valid_when_only_mtime_changes(self):
+        self.sidecar.dump(runs.extract(self.filename, use_sidecar=False))
+        stat = os.stat(self.filename)
+        os.utime(self.filename, ns=(stat.st_atime_ns,
+                                    stat.st_mtime_ns + 10 ** 9))
+
+        self.assertTrue(self.sidecar.isValid())
+
+    def test_load_garbage_raises(self):
+        with open(self.sidecar.filename, "wb") as handle:
+            handle.write(b"not a sidecar")
+
+        self.assertFalse(self.sidecar.isValid())
+        with self.assertRaises(exceptions.SidecarError):
+            self.sidecar.load()
+
+    def test_extract_reuses_sidecar_without_parsing(self):
+        expected = runs.extract(self.filename)
+        self.assertTrue(self.sidecar.isValid(), msg="Precondition")
+
+        with patch("helpers.runs.XMLAsInput") as mock_input:
+            result = runs.extract(self.filename)
+
+        mock_input.assert_not_called()
+        self.assertEqual(result, expected)
+
+
+class Test_RunsBuilder(WordXMLTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("builder.xml")
+
+    def setUp(self):
+        paragraphs.PreProcessed._reset_xpaths()
+
+    def tree_runs(self, snippet):
+        tree = etree.fromstring(snippet).getroottree()
+        query = ("//w:p[(count(descendant::w:i) > 0) and "
+                 "(count(descendant::w:t) > 0)]")
+        paras = tree.xpath(query, namespaces={"w": self.W_URI})
+        return [runs.runs_from_element(p) for p in paras]
+
+    def test_same_runs_as_tree_for_snippets(self):
+        w = f"xmlns:w=\"{self.W_URI}\""
+        i_run = "<w:r><w:rPr><w:i/></w:rPr><w:t>Title</w:t></w:r>"
+        snippets = {
+            "plain": f"<w:p {w}><w:r><w:t>A, </w:t></w:r>{i_run}</w:p>",
+            "no italic": f"<w:p {w}><w:r><w:t>A</w:t></w:r></w:p>",
+            "run without t": f"<w:p {w}><w:r><w:tab/></w:r>{i_run}</w:p>",
+            "deep italic": (f"<w:p {w}><w:r><w:rPr><w:x><w:i/></w:x></w:rPr>"
+                            "<w:t>A</w:t></w:r></w:p>"),
+            "nested t": (f"<w:p {w}><w:r><w:x><w:t>hidden</w:t></w:x>"
+                         f"<w:t>A</w:t></w:r>{i_run}</w:p>"),
+            "comment in t": (f"<w:p {w}><w:r><w:t>A<!--c-->B</w:t></w:r>"
+                             f"{i_run}</w:p>"),
+            "textbox": (f"<w:body {w}><w:p><w:r><w:t>Out </w:t><w:pict><w:p>"
+                        f"{i_run}</w:p></w:pict></w:r>{i_run}</w:p>"
+                        f"<w:p>{i_run}</w:p></w:body>"),
+            "smallcaps": (f"<w:p {w}><w:r><w:rPr><w:smallCaps/></w:rPr>"
+                          f"<w:t>isbn</w:t></w:r>{i_run}</w:p>")}
+        for key, snippet in snippets.items():
+            with self.subTest(snippet=key):
+                expected = self.tree_runs(snippet)
+
+                result = etree.fromstring(
+                    snippet, etree.XMLParser(target=runs.RunsBuilder()))
+
+                self.assertEqual(result, expected)
+
+    def test_extract_same_runs_as_tree(self):
+        expected = runs.extract(self.filename, use_sidecar=False)
+
+        result = runs.extract(self.filename, use_sidecar=False,
+                              backend="events")
+
+        self.assertGreater(len(result), 0, msg="Precondition")
+        self.assertEqual(result, expected)
+        for paragraph_runs in result:
+            self.assertIsInstance(paragraph_runs, runs.Runs)
+
+    def test_extract_same_PreProcessed_strings_as_tree(self):
+        attrs = ["pre_italic", "italic", "post_italic"]
+        tree_runs = runs.extract(self.filename, use_sidecar=False)
+        event_runs = runs.extract(self.filename, use_sidecar=False,
+                                  backend="events")
+        for i, (expected, result) in enumerate(zip(tree_runs, event_runs)):
+            expected = paragraphs.PreProcessed(expected)
+            result = paragraphs.PreProcessed(result)
+            for attr in attrs:
+                with self.subTest(para_index=i, attr=attr):
+                    self.assertEqual(getattr(result, attr),
+                                     getattr(expected, attr))
+
+    def test_extract_events_raises_same_exception(self):
+        trackchanges = ("<w:p><w:ins w:id=\"1\" w:author=\"Ian\"><w:r>"
+                        "<w:t>Inserted</w:t></w:r></w:ins></w:p>")
+        filename = self.make_word_xml("builder_tc.xml", body_extra=trackchanges)
+
+        with self.assertRaises(exceptions.InputFileTrackChangesError):
+            runs.extract(filename, use_sidecar=False, backend="events")
+
+    def test_extract_events_builds_no_tree(self):
+        with patch("lxml.etree.TreeBuilder") as mock_builder:
+            runs.extract(self.filename, use_sidecar=False, backend="events")
+
+        mock_builder.assert_not_called()
+
+    def test_extract_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            runs.extract(self.filename, use_sidecar=False, backend="foo")
+
+
+class Test_Runs_Styles(WordXMLTestCase):
+
+    STYLES = ("<w:style w:type=\"paragraph\" w:styleId=\"Quote\">"
+              "<w:rPr><w:i/></w:rPr></w:style>"
+              "<w:style w:type=\"character\" w:styleId=\"BookTitle\">"
+              "<w:rPr><w:i/></w:rPr></w:style>"
+              "<w:style w:type=\"character\" w:styleId=\"Upright\">"
+              "<w:rPr><w:i w:val=\"0\"/><w:smallCaps/></w:rPr></w:style>")
+    BODY = ("<w:p><w:r><w:t>Adelman, Rachel E., </w:t></w:r>"
+            "<w:r><w:rPr><w:rStyle w:val=\"BookTitle\"/></w:rPr>"
+            "<w:t>The Female Ruse.</w:t></w:r>"
+            "<w:r><w:t> Sheffield, 2017.</w:t></w:r></w:p>"
+            "<w:p><w:pPr><w:pStyle w:val=\"Quote\"/></w:pPr>"
+            "<w:r><w:rPr><w:rStyle w:val=\"Upright\"/></w:rPr>"
+            "<w:t>Ilan, Tal, </w:t></w:r>"
+            "<w:r><w:t>Lexicon of Jewish Names.</w:t></w:r></w:p>"
+            "<w:p><w:r><w:rPr><w:rStyle w:val=\"Upright\"/></w:rPr>"
+            "<w:t>Not italic at all.</w:t></w:r></w:p>")
+    EXPECTED = [[(False, False, "Adelman, Rachel E., "),
+                 (True, False, "The Female Ruse."),
+                 (False, False, " Sheffield, 2017.")],
+                [(False, True, "Ilan, Tal, "),
+                 (True, False, "Lexicon of Jewish Names.")]]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("styles.xml", body_extra=cls.BODY,
+                                         styles_extra=cls.STYLES)
+
+    def test_styled_runs_for_both_backends(self):
+        expected = self.ENTRIES + self.EXPECTED
+        expected = [runs.Runs(entry) for entry in expected]
+        for backend in runs.BACKENDS:
+            with self.subTest(backend=backend):
+                result = runs.extract(self.filename, use_sidecar=False,
+                                      backend=backend)
+
+                self.assertEqual(result, expected)
+
+    def test_paragraph_style_for_all_backends(self):
+        expected = [None] * len(self.ENTRIES) + [None, "Quote"]
+        for backend in runs.BACKENDS:
+            with self.subTest(backend=backend):
+                result = runs.extract(self.filename, use_sidecar=False,
+                                      backend=backend)
+
+                self.assertEqual([r.style for r in result], expected)
+
+    def test_sidecar_keeps_paragraph_style(self):
+        sidecar = runs.RunsSidecar(self.filename)
+        self.addCleanup(os.remove, sidecar.filename)
+        expected = runs.extract(self.filename, use_sidecar=False)
+
+        sidecar.dump(expected)
+        result = sidecar.load()
+
+        self.assertEqual([r.style for r in result],
+                         [r.style for r in expected])
+        self.assertEqual(result[-1].coalesce().style, "Quote")
+
+    def test_runs_from_element_without_styles(self):
+        input = xml.XMLAsInput()
+        input.isSuitable(self.filename, fatal=True)
+        paragraph = list(input.iter_paragraphs(force_all=True))[-3]
+        styles = runs.StyleIndex.from_tree(input.tree)
+
+        self.assertEqual(runs.runs_from_element(paragraph).pattern,
+                         (False, False, False))
+        self.assertEqual(runs.runs_from_element(paragraph, styles).pattern,
+                         (False, True, False))
+
+    def test_sidecar_of_previous_version_is_invalid(self):
+        sidecar = runs.RunsSidecar(self.filename)
+        self.addCleanup(os.remove, sidecar.filename)
+        sidecar.dump(runs.extract(self.filename, use_sidecar=False))
+        with open(sidecar.filename, "r+b") as handle:
+            handle.seek(4)
+            handle.write((1).to_bytes(2, "little"))
+
+        self.assertFalse(sidecar.isValid())
+
+
+class Test_Runs_Coalesce(WordXMLTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("fragments.xml", fragments=4)
+
+    def setUp(self):
+        paragraphs.PreProcessed._reset_xpaths()
+
+    def paragraphs(self):
+        input = xml.XMLAsInput()
+        input.isSuitable(self.filename, fatal=True)
+        return list(input.iter_paragraphs())
+
+    def test_coalesce_merges_same_formatting(self):
+        entry = runs.Runs([(False, False, "A"), (False, False, "b"),
+                           (True, False, "C"), (True, True, "d"),
+                           (True, True, "e"), (False, False, "")])
+        expected = runs.Runs([(False, False, "Ab"), (True, False, "C"),
+                              (True, True, "de"), (False, False, "")])
+
+        self.assertEqual(entry.coalesce(), expected)
+
+    def test_coalesce_returns_self_when_nothing_to_merge(self):
+        entry = runs.Runs(self.ENTRIES[0])
+
+        self.assertIs(entry.coalesce(), entry)
+
+    def test_coalesce_fragments_to_entries(self):
+        fragmented = runs.extract(self.filename, use_sidecar=False)
+        self.assertGreater(sum(map(len, fragmented)),
+                           sum(map(len, self.ENTRIES)), msg="Precondition")
+
+        result = [r.coalesce() for r in fragmented]
+
+        expected = [runs.Runs(entry).coalesce() for entry in self.ENTRIES]
+        self.assertEqual(result, expected)
+
+    def test_coalesce_element(self):
+        w = "{%s}" % self.W_URI
+        expected = [runs.Runs(entry).coalesce() for entry in self.ENTRIES]
+        for i, (para, entry) in enumerate(zip(self.paragraphs(), expected)):
+            with self.subTest(para_index=i):
+                before = len(para.findall(f"{w}r"))
+
+                removed = runs.coalesce_element(para)
+
+                self.assertEqual(removed, before - len(entry))
+                self.assertEqual(runs.runs_from_element(para), entry)
+                for tag in runs.NOISE_TAGS:
+                    self.assertIsNone(para.find(w + tag))
+
+    def test_coalesce_element_keeps_other_runs(self):
+        w = f"xmlns:w=\"{self.W_URI}\""
+        para = etree.fromstring(
+            f"<w:p {w}><w:r><w:t>A</w:t></w:r><w:r><w:tab/><w:t>B</w:t></w:r>"
+            "<w:r><w:t>C</w:t></w:r><w:r><w:rPr><w:rStyle w:val=\"X\"/>"
+            "</w:rPr><w:t>D</w:t></w:r></w:p>")
+
+        removed = runs.coalesce_element(para)
+
+        self.assertEqual(removed, 0)
+        self.assertEqual(len(para), 4)
+
+    def test_PreProcessed_same_substrings_when_coalesced(self):
+        attrs = ["pre_italic", "italic", "post_italic"]
+        originals = self.paragraphs()
+        coalesced = self.paragraphs()
+        for i, (original, para) in enumerate(zip(originals, coalesced)):
+            expected = paragraphs.PreProcessed(original)
+            from_runs = paragraphs.PreProcessed(
+                runs.runs_from_element(original), coalesce=True)
+            from_element = paragraphs.PreProcessed(para, coalesce=True)
+            for attr in attrs:
+                with self.subTest(para_index=i, attr=attr):
+                    self.assertEqual(getattr(from_runs, attr),
+                                     getattr(expected, attr))
+                    self.assertEqual(getattr(from_element, attr),
+                                     getattr(expected, attr))
+
+
+class Test_Runs_XSLT(WordXMLTestCase):
+
+    RESOURCES = ["./resources/BR Autumn 2018.xml",
+                 "./resources/BR Spring 2019 (final from ML).xml"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("xslt.xml", fragments=3)
+
+    def setUp(self):
+        paragraphs.PreProcessed._reset_xpaths()
+
+    def document(self, body):
+        return etree.fromstring(f"<w:document xmlns:w=\"{self.W_URI}\">"
+                                f"<w:body>{body}</w:body></w:document>")
+
+    def test_same_runs_as_tree_for_snippets(self):
+        i_run = "<w:r><w:rPr><w:i/></w:rPr><w:t>Title</w:t></w:r>"
+        snippets = {
+            "plain": f"<w:p><w:r><w:t>A, </w:t></w:r>{i_run}</w:p>",
+            "no italic": "<w:p><w:r><w:t>A</w:t></w:r></w:p>",
+            "run without t": f"<w:p><w:r><w:tab/></w:r>{i_run}</w:p>",
+            "comment in t": (f"<w:p><w:r><w:t>A<!--c-->B</w:t></w:r>{i_run}"
+                             "</w:p>"),
+            "empty t": f"<w:p><w:r><w:t/></w:r>{i_run}</w:p>",
+            "textbox": (f"<w:p><w:r><w:t>Out </w:t><w:pict><w:p>{i_run}"
+                        f"</w:p></w:pict></w:r>{i_run}</w:p>"),
+            "smallcaps": ("<w:p><w:r><w:rPr><w:smallCaps/></w:rPr>"
+                          f"<w:t>isbn</w:t></w:r>{i_run}</w:p>")}
+        selector = xml.ParagraphSelector()
+        for key, snippet in snippets.items():
+            with self.subTest(snippet=key):
+                root = self.document(snippet)
+                expected = [runs.runs_from_element(p)
+                            for p in selector.iter_suitable(root)]
+
+                result = runs.runs_from_xslt(root.getroottree())
+
+                self.assertEqual(result, expected)
+
+    def test_same_runs_as_tree_with_styles(self):
+        styles = runs.StyleIndex()
+        styles.add("Quote", italic=True)
+        root = self.document("<w:p><w:pPr><w:pStyle w:val=\"Quote\"/></w:pPr>"
+                             "<w:r><w:t>A</w:t></w:r></w:p>"
+                             "<w:p><w:r><w:t>B</w:t></w:r></w:p>")
+        expected = list(runs.styled_paragraphs(
+            xml.ParagraphSelector().iter_all(root), styles))
+
+        result = runs.runs_from_xslt(root.getroottree(), styles)
+
+        self.assertEqual(len(result), 1, msg="Precondition")
+        self.assertEqual(result, expected)
+
+    def test_extract_same_runs_as_tree(self):
+        expected = runs.extract(self.filename, use_sidecar=False)
+
+        result = runs.extract(self.filename, use_sidecar=False,
+                              backend="xslt")
+
+        self.assertGreater(len(result), 0, msg="Precondition")
+        self.assertEqual(result, expected)
+
+    def test_same_PreProcessed_strings_as_elements(self):
+        filenames = [self.filename] + [f for f in self.RESOURCES
+                                       if os.path.isfile(f)]
+        attrs = ["pre_italic", "italic", "post_italic"]
+        for filename in filenames:
+            input = xml.XMLAsInput()
+            input.isSuitable(filename, fatal=True)
+            elements = list(input.iter_paragraphs())
+            result = runs.runs_from_xslt(input.tree)
+            self.assertEqual(len(result), len(elements), msg=filename)
+            for i, (element, paragraph_runs) in enumerate(zip(elements, result)):
+                try:
+                    expected = paragraphs.PreProcessed(element)
+                except exceptions.RecomposeWarning:
+                    with self.assertRaises(exceptions.RecomposeWarning):
+                        paragraphs.PreProcessed(paragraph_runs)
+                    continue
+                processed = paragraphs.PreProcessed(paragraph_runs)
+                for attr in attrs:
+                    with self.subTest(filename=filename, para_index=i,
+                                      attr=attr):
+                        self.assertEqual(getattr(processed, attr),
+                                         getattr(expected, attr))
+
+
+class Test_Runs_Chunks(WordXMLTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("chunks.xml",
+                                         entries=cls.ENTRIES * 4,
+                                         fragments=2)
+
+    def assertSameAsEvents(self, filename, **kwargs):
+        expected = runs.extract(filename, use_sidecar=False, backend="events")
+
+        result = runs.extract_chunks(filename, **kwargs)
+
+        self.assertGreater(len(result), 0, msg="Precondition")
+        self.assertEqual(result, expected)
+
+    def test_same_runs_as_events_in_one_process(self):
+        for chunk_size in [1, 1000, xml.CHUNK_SIZE]:
+            with self.subTest(chunk_size=chunk_size):
+                self.assertSameAsEvents(self.filename, workers=1,
+                                        chunk_size=chunk_size)
+
+    def test_same_runs_as_events_in_workers(self):
+        self.assertSameAsEvents(self.filename, workers=2, chunk_size=1)
+
+    def test_same_runs_with_styles(self):
+        filename = self.make_word_xml("chunks_styles.xml",
+                                      body_extra=Test_Runs_Styles.BODY,
+                                      styles_extra=Test_Runs_Styles.STYLES)
+
+        self.assertSameAsEvents(filename, workers=1, chunk_size=1)
+
+    def test_bad_split_parses_serially(self):
+        # The end tag in the comment is taken for the end of the paragraph.
+        comment = ("<w:p><w:r><w:t>A</w:t></w:r><!-- </w:p> -->"
+                   "<w:r><w:rPr><w:i/></w:rPr><w:t>B</w:t></w:r></w:p>")
+        filename = self.make_word_xml("chunks_comment.xml", body_extra=comment)
+
+        with patch.object(runs, "extract_events",
+                          wraps=runs.extract_events) as mock_events:
+            self.assertSameAsEvents(filename, workers=1, chunk_size=1)
+
+        self.assertEqual(mock_events.call_count, 2)
+
+    def test_raises_same_exceptions(self):
+        trackchanges = ("<w:p><w:ins w:id=\"1\" w:author=\"Ian\"><w:r>"
+                        "<w:t>Inserted</w:t></w:r></w:ins></w:p>")
+        unknown = ("<pkg:part pkg:name=\"/word/foo.xml\"><pkg:xmlData>"
+                   "<foo:bar xmlns:foo=\"urn:foo\"/></pkg:xmlData></pkg:part>")
+        setup = {"trackchanges": ({"body_extra": trackchanges},
+                                  exceptions.InputFileTrackChangesError),
+                 "namespace": ({"parts_extra": unknown},
+                               exceptions.InputFileError)}
+        for key, (kwargs, exception) in setup.items():
+            filename = self.make_word_xml(f"chunks_{key}.xml", **kwargs)
+            for backend in ["events", "chunks"]:
+                with self.subTest(key=key, backend=backend):
+                    with self.assertRaises(exception):
+                        runs.extract(filename, use_sidecar=False,
+                                     backend=backend)
+
+
+class Test_Runs_SelectBackend(WordXMLTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("select.xml")
+        cls.size = os.path.getsize(cls.filename)
+
+    def select(self, max_memory=None, cpus=4, **constants):
+        constants = {"SMALL_FILE": runs.SMALL_FILE,
+                     "HUGE_BODY": runs.HUGE_BODY, **constants}
+        with patch.multiple(runs, **constants), \
+                patch("os.cpu_count", return_value=cpus):
+            backend, reason = runs.select_backend(self.filename, max_memory)
+        self.assertIn(backend, runs.BACKENDS)
+        self.assertTrue(reason)
+        return backend
+
+    def test_small_file_gets_tree(self):
+        self.assertEqual(self.select(), "tree")
+
+    def test_large_file_gets_events(self):
+        self.assertEqual(self.select(SMALL_FILE=self.size - 1), "events")
+
+    def test_huge_body_gets_chunks(self):
+        self.assertEqual(self.select(HUGE_BODY=1), "chunks")
+        self.assertEqual(self.select(HUGE_BODY=1, cpus=1), "tree")
+        self.assertEqual(self.select(HUGE_BODY=1, cpus=None), "tree")
+
+    def test_max_memory(self):
+        tree_memory = self.size * runs.MEMORY_FACTORS["tree"]
+
+        self.assertEqual(self.select(max_memory=tree_memory), "tree")
+        self.assertEqual(self.select(max_memory=tree_memory - 1), "events")
+        self.assertEqual(self.select(max_memory=1), "events")
+
+    def test_not_word_xml(self):
+        filename = os.path.join(self.tempdir, "select_other.xml")
+        with open(filename, "w") as handle:
+            handle.write("<foo/>")
+
+        with patch.object(runs, "HUGE_BODY", 1):
+            backend, _ = runs.select_backend(filename)
+
+        self.assertEqual(backend, "tree")
+
+
+class Test_Runs_AcceptChanges(WordXMLTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("revisions.xml",
+                                         body_extra=cls.REVISIONS)
+        cls.accepted_filename = cls.make_word_xml(
+            "accepted.xml", body_extra=cls.REVISIONS_ACCEPTED)
+
+    def test_same_runs_as_accepted_in_word(self):
+        for backend in runs.BACKENDS:
+            with self.subTest(backend=backend):
+                expected = runs.extract(self.accepted_filename,
+                                        use_sidecar=False, backend=backend)
+
+                result = runs.extract(self.filename, use_sidecar=False,
+                                      backend=backend, accept_changes=True)
+
+                self.assertEqual(result, expected)
+                with self.assertRaises(exceptions.InputFileTrackChangesError):
+                    runs.extract(self.filename, use_sidecar=False,
+                                 backend=backend)
+
+    def test_chunks_accept_changes(self):
+        expected = runs.extract(self.accepted_filename, use_sidecar=False)
+
+        result = runs.extract_chunks(self.filename, workers=1, chunk_size=1,
+                                     accept_changes=True)
+
+        self.assertEqual(result, expected)
+
+    def test_accepted_runs_have_their_own_sidecar(self):
+        sidecar = runs.RunsSidecar(self.filename,
+                                   self.filename + runs.ACCEPTED_SUFFIX)
+        self.addCleanup(os.remove, sidecar.filename)
+
+        runs.extract(self.filename, accept_changes=True)
+
+        self.assertTrue(sidecar.isValid())
+        self.assertFalse(runs.RunsSidecar(self.filename).isValid())
+        with self.assertRaises(exceptions.InputFileTrackChangesError):
+            runs.extract(self.filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Unit test of main/helpers/shards.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import WordXMLTestCase
+from helpers import shards
+from helpers import xml
+import exceptions
+import core
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+
+class Test_Partition(unittest.TestCase):
+
+    def test_contiguous_ranges_of_about_the_same_size(self):
+        setup = [([1] * 10, 3, [(0, 4), (4, 7), (7, 10)]),
+                 ([9, 1, 1, 1, 1, 1, 1, 1, 1, 1], 2, [(0, 1), (1, 10)]),
+                 ([5, 5], 4, [(0, 1), (1, 2)]),
+                 ([0, 0, 0], 2, [(0, 1), (1, 3)]),
+                 ([], 3, [(0, 0)])]
+        for sizes, units, expected in setup:
+            with self.subTest(sizes=sizes, units=units):
+                self.assertEqual(shards._partition(sizes, units), expected)
+
+
+class Test_Shards(WordXMLTestCase):
+
+    chunk_size = 1 << 12
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("shards.xml",
+                                         entries=cls.ENTRIES * 30)
+
+    def workdir(self, name):
+        return os.path.join(self.tempdir, self.id().rsplit(".", 1)[-1], name)
+
+    def read(self, filenames):
+        output, report = filenames
+        with open(output, encoding="utf8") as handle:
+            lines = handle.read()
+        with open(report, encoding="utf8") as handle:
+            report = json.load(handle)
+        return lines, report
+
+    def write_manifest(self, basename, lines):
+        manifest = os.path.join(self.tempdir, basename)
+        with open(manifest, "w", encoding="utf8") as handle:
+            handle.write("\n".join(lines) + "\n")
+        return manifest
+
+    def test_units_in_processes_merge_as_one_unit(self):
+        workdir = self.workdir("file")
+        units = shards.shard_file(self.filename, workdir, 3,
+                                  chunk_size=self.chunk_size)
+        self.assertEqual(len(units), 3, msg="Precondition")
+
+        processes = [subprocess.Popen([sys.executable, core.__file__,
+                                       "--run-shard", unit])
+                     for unit in units]
+        self.assertEqual([p.wait(timeout=60) for p in processes], [0] * 3)
+        result = self.read(shards.merge_units(workdir))
+
+        manifest = self.write_manifest("one.txt", [self.filename])
+        single = self.workdir("manifest")
+        unit, = shards.shard_manifest(shards.read_manifest(manifest), single,
+                                      3)
+        shards.run_unit(unit)
+        expected = self.read(shards.merge_units(single))
+        self.assertEqual(result[0], expected[0])
+        self.assertEqual(result[1], dict(expected[1], units=3))
+        numbers = [json.loads(line)["number"]
+                   for line in result[0].splitlines()]
+        self.assertEqual(numbers, list(range(1, 91)))
+
+    def test_manifest_reports_rejected_files(self):
+        trackchanges = self.make_word_xml("shards_tc.xml",
+                                          body_extra=self.REVISIONS)
+        other = os.path.join(self.tempdir, "shards.txt")
+        with open(other, "w") as handle:
+            handle.write("Not XML")
+        manifest = self.write_manifest("many.txt", [
+            "# Back issues", os.path.basename(trackchanges), "",
+            self.filename, os.path.basename(other)])
+        workdir = self.workdir("many")
+
+        units = shards.shard_manifest(shards.read_manifest(manifest), workdir,
+                                      2)
+        for unit in reversed(units):
+            shards.run_unit(unit)
+        lines, report = self.read(shards.merge_units(workdir))
+
+        self.assertEqual([(f["file"], f["verdict"]) for f in report["files"]],
+                         [(trackchanges, xml.TRACKCHANGES),
+                          (self.filename, xml.SUITABLE),
+                          (other, xml.UNSUITABLE)])
+        self.assertEqual(report["counts"], {"entry": 90})
+        self.assertEqual({json.loads(line)["file"]
+                          for line in lines.splitlines()}, {self.filename})
+
+    def test_merge_raises_for_missing_or_stale_units(self):
+        workdir = self.workdir("stale")
+        first, second = shards.shard_file(self.filename, workdir, 2,
+                                          chunk_size=self.chunk_size)
+        shards.run_unit(first)
+        with self.assertRaises(exceptions.ShardError):
+            shards.merge_units(workdir)
+
+        shards.run_unit(second)
+        shards.shard_file(self.filename, workdir, 2,
+                          chunk_size=self.chunk_size)
+        with self.assertRaises(exceptions.ShardError):
+            shards.merge_units(workdir)
+
+    def test_range_of_changed_file_raises(self):
+        filename = self.make_word_xml("shards_changed.xml")
+        unit, = shards.shard_file(filename, self.workdir("changed"), 1)
+        stat = os.stat(filename)
+        os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+        with self.assertRaises(exceptions.ShardError):
+            shards.run_unit(unit)
+        self.assertFalse(os.path.exists(unit[:-len(shards.UNIT_SUFFIX)]
+                                        + shards.OUTPUT_SUFFIX))
+
+    def test_trackchanges_of_a_range_reject_the_file(self):
+        filename = self.make_word_xml("shards_file_tc.xml",
+                                      entries=self.ENTRIES * 30,
+                                      body_extra=self.REVISIONS)
+        workdir = self.workdir("tc")
+
+        units = shards.shard_file(filename, workdir, 2,
+                                  chunk_size=self.chunk_size)
+        for unit in units:
+            shards.run_unit(unit)
+        lines, report = self.read(shards.merge_units(workdir))
+
+        self.assertEqual(lines, "")
+        self.assertEqual(report["files"][0]["verdict"], xml.TRACKCHANGES)
+        self.assertEqual(report["verdicts"], {xml.TRACKCHANGES: 1})
+
+    def test_shard_file_raises_for_unsuitable_file(self):
+        other = os.path.join(self.tempdir, "shards_other.txt")
+        with open(other, "w") as handle:
+            handle.write("Not XML")
+
+        with self.assertRaises(exceptions.InputFileError):
+            shards.shard_file(other, self.workdir("other"), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+"""Unit test of main/helpers/styles.py.
+
+Copyright: Ian Vermes 2019
+"""
+
+from tests.base_testcases import WordXMLTestCase
+from helpers import styles
+
+from lxml import etree
+
+import unittest
+
+
+class Test_StyleIndex(WordXMLTestCase):
+
+    STYLES = ("<w:style w:type=\"paragraph\" w:styleId=\"Entry\">"
+              "<w:basedOn w:val=\"Normal\"/></w:style>"
+              "<w:style w:type=\"paragraph\" w:styleId=\"Heading\">"
+              "<w:basedOn w:val=\"Entry\"/><w:pPr><w:i/></w:pPr>"
+              "<w:rPr><w:i/></w:rPr></w:style>"
+              "<w:style w:type=\"paragraph\" w:styleId=\"Subheading\">"
+              "<w:basedOn w:val=\"Heading\"/><w:rPr><w:smallCaps/></w:rPr>"
+              "</w:style>"
+              "<w:style w:type=\"character\" w:styleId=\"Emphasis\">"
+              "<w:rPr><w:i w:val=\"1\"/></w:rPr></w:style>"
+              "<w:style w:type=\"character\" w:styleId=\"Plain\">"
+              "<w:basedOn w:val=\"Emphasis\"/><w:rPr><w:i w:val=\"false\"/>"
+              "</w:rPr></w:style>"
+              "<w:style w:type=\"character\" w:styleId=\"Loop\">"
+              "<w:basedOn w:val=\"Loop\"/></w:style>"
+              "<w:style w:type=\"table\" w:styleId=\"Grid\">"
+              "<w:rPr><w:i/></w:rPr></w:style>")
+
+    def make_index(self, styles_extra=STYLES):
+        w = f"xmlns:w=\"{self.W_URI}\""
+        root = etree.fromstring(f"<w:styles {w}>{styles_extra}</w:styles>")
+        return styles.StyleIndex.from_tree(root)
+
+    def test_resolves_based_on_chain(self):
+        index = self.make_index()
+        setup = {"Normal": (False, False),
+                 "Entry": (False, False),
+                 "Heading": (True, False),
+                 "Subheading": (True, True)}
+        for style_id, expected in setup.items():
+            with self.subTest(style_id=style_id):
+                result = index.formatting(style_id)
+                self.assertEqual(result, styles.Formatting(*expected))
+
+    def test_character_style_takes_precedence(self):
+        index = self.make_index()
+        setup = [(("Entry", "Emphasis"), (True, False)),
+                 (("Heading", "Plain"), (False, False)),
+                 (("Subheading", "Plain"), (False, True)),
+                 (("Heading", "Loop"), (True, False)),
+                 (("Entry", "Unknown"), (False, False))]
+        for args, expected in setup:
+            with self.subTest(args=args):
+                result = index.formatting(*args)
+                self.assertEqual(result, styles.Formatting(*expected))
+
+    def test_default_paragraph_style(self):
+        index = self.make_index("<w:style w:type=\"paragraph\" "
+                                "w:default=\"1\" w:styleId=\"Body\">"
+                                "<w:rPr><w:i/></w:rPr></w:style>")
+
+        self.assertEqual(index.default_paragraph, "Body")
+        self.assertTrue(index.formatting().italic)
+        self.assertTrue(index.formatting(None, "Unknown").italic)
+
+    def test_ignores_other_style_types(self):
+        index = self.make_index()
+
+        self.assertNotIn("Grid", index)
+        self.assertFalse(index.formatting("Grid").italic)
+
+    def test_has_formatting(self):
+        plain = self.make_index("<w:style w:type=\"paragraph\" "
+                                "w:styleId=\"Normal\"/>")
+
+        self.assertFalse(plain.has_formatting)
+        self.assertTrue(self.make_index().has_formatting)
+
+    def test_events_same_as_from_tree(self):
+        w = f"xmlns:w=\"{self.W_URI}\""
+        snippet = f"<w:styles {w}>{self.STYLES}</w:styles>"
+        expected = self.make_index()
+
+        result = styles.StyleIndex()
+        etree.fromstring(snippet, etree.XMLParser(target=result))
+
+        self.assertEqual(len(result), len(expected))
+        for style_id in ["Entry", "Heading", "Subheading", "Emphasis", "Plain"]:
+            for run_style in [None, "Emphasis", "Plain"]:
+                with self.subTest(style_id=style_id, run_style=run_style):
+                    self.assertEqual(result.formatting(style_id, run_style),
+                                     expected.formatting(style_id, run_style))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,8 +5,9 @@
 
 Copyright: Ian Vermes 2019
 """
-from tests.base_testcases import BaseTestCase, InputFileTestCase
+from tests.base_testcases import BaseTestCase, InputFileTestCase, WordXMLTestCase
 from helpers import xml
+from helpers import runs
 import exceptions
 
 from lxml import etree
@@ -14,6 +15,8 @@ from lxml import etree
 import unittest
 import os
 import types
+import mmap
+from unittest.mock import patch
 
 
 class Test_XPaths_Class(InputFileTestCase):
@@ -145,6 +148,26 @@ class Test_XPaths_Class(InputFileTestCase):
         self.assertSubstringsInString(substrings, str(failure.exception))
 
 
+class Test_XPaths_Copy(WordXMLTestCase):
+
+    def test_copy_compiles_afresh(self):
+        input = xml.XMLAsInput()
+        input.isSuitable(self.make_word_xml("xpaths_copy.xml"), fatal=True)
+        xpaths = xml.XPaths(input.tree)
+        query = "count(//w:p)"
+        xpaths.add_xpath(query)
+
+        with patch.object(xml.XPaths, "make_nsmap") as mock_make_nsmap:
+            copied = xpaths.copy()
+
+        mock_make_nsmap.assert_not_called()
+        self.assertEqual(copied.nsmap, xpaths.nsmap)
+        self.assertEqual(list(copied), list(xpaths))
+        self.assertIsNot(copied.get(query), xpaths.get(query))
+        self.assertEqual(copied.get(query)(input.tree),
+                         xpaths.get(query)(input.tree))
+
+
 class Test_XMLAsInput_Workhorse(InputFileTestCase):
     @classmethod
     def setUpClass(cls):
@@ -369,7 +392,7 @@ class Test_XMLAsInput_Suitablilty(InputFileTestCase):
                     raise ValueError(f"Could not find {filename} for testing.")
                 with self.subTest(expected_bool=expected,
                                   file=os.path.basename(filename)):
-                    with open(filename, "r") as handle:
+                    with open(filename, "rb") as handle:
 
                         result = func(handle)
 
@@ -448,5 +471,538 @@ class Test_XMLAsInput_Suitablilty(InputFileTestCase):
                                              bool2file_map=files)
 
 
+class Test_XMLAsInput_Pruning(WordXMLTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.klass = xml.XMLAsInput
+        image = ("<pkg:part pkg:name=\"/word/media/image1.png\" "
+                 "pkg:contentType=\"image/png\"><pkg:binaryData>"
+                 f"{'iVBORw0KGgo' * 100}</pkg:binaryData></pkg:part>")
+        trackchanges = ("<w:p><w:ins w:id=\"1\" w:author=\"Ian\"><w:r>"
+                        "<w:t>Inserted</w:t></w:r></w:ins></w:p>")
+        cls.files = {}
+        cls.files["good"] = cls.make_word_xml("good.xml", parts_extra=image)
+        cls.files["trackchanges"] = cls.make_word_xml(
+            "trackchanges.xml", body_extra=trackchanges)
+        cls.files["namespace"] = cls.make_word_xml(
+            "namespace.xml", parts_extra=("<pkg:part pkg:name=\"/x.xml\">"
+                                          "<pkg:xmlData><foo:bar xmlns:foo="
+                                          "\"http://foo.com\"/></pkg:xmlData>"
+                                          "</pkg:part>"))
+        cls.files["malformed"] = cls.make_word_xml(
+            "malformed.xml", body_extra="<w:p>")
+
+    def test_same_verdicts_as_full_parse(self):
+        for key, filename in self.files.items():
+            with self.subTest(file=key):
+                full = self.klass()
+                pruned = self.klass(prune=True)
+
+                expected = full.isSuitable(filename)
+                result = pruned.isSuitable(filename)
+
+                self.assertEqual(result, expected)
+                self.assertEqual(result, key == "good")
+
+    def test_same_exceptions_as_full_parse(self):
+        expected = {"trackchanges": exceptions.InputFileTrackChangesError,
+                    "namespace": exceptions.InputFileError,
+                    "malformed": exceptions.InputFileError}
+        for key, expected_exception in expected.items():
+            with self.subTest(file=key):
+                with self.assertRaises(expected_exception) as fail:
+                    self.klass(prune=True).isSuitable(self.files[key], fatal=True)
+                self.assertIs(type(fail.exception), expected_exception)
+
+    def test_pruned_tree_has_only_document_part(self):
+        pruned = self.klass(prune=True)
+        pruned.isSuitable(self.files["good"], fatal=True)
+        find_parts = etree.XPath("//pkg:part/@pkg:name",
+                                 namespaces={"pkg": xml.SAMPLE_URIS["pkg"]})
+
+        names = find_parts(pruned.tree)
+
+        self.assertListEqual(names, sorted(xml.DOCUMENT_PART_NAMES))
+
+    def test_pruned_paragraphs_same_as_full(self):
+        full, pruned = self.klass(), self.klass(prune=True)
+        full.isSuitable(self.files["good"], fatal=True)
+        pruned.isSuitable(self.files["good"], fatal=True)
+        expected = [etree.tostring(p) for p in full.iter_paragraphs()]
+
+        result = [etree.tostring(p) for p in pruned.iter_paragraphs()]
+
+        self.assertGreater(len(result), 0, msg="Precondition")
+        self.assertListEqual(result, expected)
+
+    def test_target_trackchanges_same_as_query(self):
+        w = f"xmlns:w=\"{self.W_URI}\""
+        snippets = {
+            "author": f"<w:p {w}><w:r w:author=\"x\"><w:t>a</w:t></w:r></w:p>",
+            "nested ins": f"<w:p {w}><w:r><w:rPr><w:ins/></w:rPr></w:r></w:p>",
+            "top ins": f"<w:p {w}><w:ins><w:r/></w:ins></w:p>",
+            "outside p": f"<w:body {w}><w:sectPr w:author=\"x\"/></w:body>",
+            "none": f"<w:p {w}><w:r><w:t>a</w:t></w:r></w:p>"}
+        for key, snippet in snippets.items():
+            with self.subTest(snippet=key):
+                tree = etree.fromstring(snippet).getroottree()
+                query = xml.QUERY_TRACKCHANGES_BY_PREDICATE
+                expected = bool(tree.xpath(query, namespaces={"w": self.W_URI}))
+                target = xml.PruningTarget()
+
+                etree.fromstring(snippet, etree.XMLParser(target=target))
+
+                self.assertEqual(target.has_trackchanges, expected)
+
+
+class Test_XMLAsInput_Buffer(WordXMLTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.klass = xml.XMLAsInput
+        cls.good = cls.make_word_xml("buffer.xml")
+        cls.empty = os.path.join(cls.tempdir, "empty.xml")
+        open(cls.empty, "wb").close()
+
+    def test_open_buffer_is_memory_mapped(self):
+        with xml.open_buffer(self.good) as buffer:
+            self.assertIsInstance(buffer, mmap.mmap)
+            with open(self.good, "rb") as handle:
+                self.assertEqual(buffer[:], handle.read())
+
+    def test_open_buffer_empty_file(self):
+        with xml.open_buffer(self.empty) as buffer:
+            self.assertEqual(buffer, b"")
+
+    def test_load_tree_same_for_all_sources(self):
+        expected = etree.tostring(etree.parse(self.good))
+        with open(self.good, "rb") as handle:
+            data = handle.read()
+            sources = {"bytes": data, "binary file": handle}
+            with xml.open_buffer(self.good) as buffer:
+                sources["mmap"] = buffer
+                for key, source in sources.items():
+                    with self.subTest(source=key):
+                        tree = xml.load_tree(source)
+                        self.assertEqual(etree.tostring(tree), expected)
+
+    def test_load_tree_feeds_in_slices(self):
+        expected = etree.tostring(etree.parse(self.good))
+        with open(self.good, "rb") as handle:
+            data = handle.read()
+
+        with patch("helpers.xml.FEED_SIZE", 7):
+            tree = xml.load_tree(data)
+
+        self.assertEqual(etree.tostring(tree), expected)
+
+    def test_empty_file_is_not_suitable(self):
+        self.assertFalse(self.klass().isSuitable(self.empty))
+        self.assertFalse(self.klass(prune=True).isSuitable(self.empty))
+
+    def test_battery_parses_once(self):
+        input = self.klass()
+        with patch("helpers.xml.load_tree", wraps=xml.load_tree) as mock_load:
+            result = input.isSuitable(self.good)
+
+        self.assertTrue(result, msg="Precondition")
+        self.assertEqual(mock_load.call_count, 1)
+        self.assertEqual(len(list(input.iter_paragraphs())), len(self.ENTRIES))
+
+    def test_sniff_ignores_locale_encoding(self):
+        with patch("locale.getpreferredencoding", return_value="ascii"):
+            result = self.klass().isSuitable(self.good)
+
+        self.assertTrue(result)
+
+    def test_sniff_rejects_undecodable_bytes(self):
+        self.assertFalse(self.klass()._sniff(b"\xff\xfe<?xml\n"))
+
+
+class Test_ParagraphSelector(WordXMLTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.klass = xml.XMLAsInput
+        header = cls.make_paragraph_xml([(True, False, "Running header")])
+        cls.header_part = ("<pkg:part pkg:name=\"/word/header1.xml\" "
+                           "pkg:contentType=\"application/xml\"><pkg:xmlData>"
+                           f"<w:hdr xmlns:w=\"{cls.W_URI}\">{header}</w:hdr>"
+                           "</pkg:xmlData></pkg:part>")
+        textbox = ("<w:p><w:r><w:t>Out </w:t><w:pict><w:p><w:r><w:rPr><w:i/>"
+                   "</w:rPr><w:t>In</w:t></w:r></w:p></w:pict></w:r></w:p>"
+                   "<w:p><w:r><w:rPr><w:i/></w:rPr></w:r></w:p>")
+        cls.filename = cls.make_word_xml("selector.xml", body_extra=textbox)
+        cls.header_filename = cls.make_word_xml("header.xml",
+                                                parts_extra=cls.header_part)
+
+    def get_input(self, filename, **kwargs):
+        input = self.klass(**kwargs)
+        input.isSuitable(filename, fatal=True)
+        return input
+
+    def test_same_paragraphs_as_package_query(self):
+        input = self.get_input(self.filename)
+        for force_all in (False, True):
+            with self.subTest(force_all=force_all):
+                expected = list(input.iter_paragraphs(force_all, "package"))
+
+                result = list(input.iter_paragraphs(force_all))
+
+                self.assertGreater(len(result), 0, msg="Precondition")
+                self.assertEqual(result, expected)
+
+    def test_same_paragraphs_when_pruned(self):
+        expected = [etree.tostring(p) for p
+                    in self.get_input(self.filename).iter_paragraphs()]
+
+        pruned = self.get_input(self.filename, prune=True)
+        result = [etree.tostring(p) for p in pruned.iter_paragraphs()]
+
+        self.assertEqual(result, expected)
+
+    def test_other_parts_are_not_searched(self):
+        input = self.get_input(self.header_filename)
+        package = list(input.iter_paragraphs(scope="package"))
+
+        result = list(input.iter_paragraphs())
+
+        self.assertEqual(len(package), len(self.ENTRIES) + 1, msg="Precondition")
+        self.assertEqual(result, package[:len(self.ENTRIES)])
+
+    def test_events_backend_ignores_other_parts(self):
+        for backend in runs.BACKENDS:
+            with self.subTest(backend=backend):
+                result = runs.extract(self.header_filename, use_sidecar=False,
+                                      backend=backend)
+                self.assertEqual(result, [runs.Runs(e) for e in self.ENTRIES])
+
+    def test_paragraphs_are_yielded_lazily(self):
+        input = self.get_input(self.filename)
+        paragraphs = input.iter_paragraphs()
+
+        self.assertIsInstance(paragraphs, types.GeneratorType)
+        with patch.object(input, "_XMLAsInput__xpaths") as mock_xpaths:
+            next(paragraphs)
+        mock_xpaths.get.assert_not_called()
+
+    def test_unknown_scope(self):
+        input = self.get_input(self.filename)
+
+        with self.assertRaises(ValueError):
+            list(input.iter_paragraphs(scope="foo"))
+
+    def test_find_body_without_package(self):
+        w = f"xmlns:w=\"{self.W_URI}\""
+        root = etree.fromstring(f"<w:document {w}><w:body><w:p/></w:body>"
+                                "</w:document>")
+        selector = xml.ParagraphSelector()
+
+        self.assertIs(selector.find_body(root), root[0])
+        self.assertEqual(list(selector.iter_all(root)), [root[0][0]])
+        self.assertIsNone(selector.find_body(root[0][0]))
+
+
+class Test_Body_Chunks(WordXMLTestCase):
+
+    TABLE = ("<w:tbl><w:tr><w:tc><w:p><w:r><w:t>A</w:t></w:r></w:p>"
+             "<w:p><w:r><w:t>B</w:t></w:r></w:p></w:tc></w:tr></w:tbl>")
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("chunks.xml", body_extra=cls.TABLE)
+
+    def get_span(self, filename):
+        with xml.open_buffer(filename) as buffer:
+            span = xml.find_body(buffer)
+            content = buffer[span.start:span.end]
+        return span, content
+
+    def test_find_body_of_package(self):
+        span, content = self.get_span(self.filename)
+
+        self.assertTrue(content.startswith(b"<w:p>"))
+        self.assertTrue(content.endswith(b"<w:sectPr/>"))
+        self.assertTrue(span.head.startswith(b"<pkg:package"))
+        self.assertEqual(span.tail, b"</w:body></w:document></pkg:xmlData>"
+                                    b"</pkg:part></pkg:package>")
+        root = etree.fromstring(span.head + content + span.tail)
+        self.assertEqual(len(xml.ParagraphSelector().find_body(root)),
+                         len(self.ENTRIES) * 2 + 1)
+
+    def test_find_body_without_package(self):
+        w = f"xmlns:w=\"{self.W_URI}\"".encode()
+        buffer = b"<w:document " + w + b"><w:body><w:p/></w:body></w:document>"
+
+        span = xml.find_body(buffer)
+
+        self.assertEqual(buffer[span.start:span.end], b"<w:p/>")
+        self.assertEqual(span.tail, b"</w:body></w:document>")
+
+    def test_find_body_not_found(self):
+        w = f"xmlns:w=\"{self.W_URI}\"".encode()
+        for buffer in [b"<w:document " + w + b"><w:body/></w:document>",
+                       b"<w:document " + w + b"></w:document>",
+                       b"<pkg:package><pkg:part pkg:name=\"/word/x.xml\">"
+                       b"<pkg:xmlData><w:document><w:body></w:body>"]:
+            with self.subTest(buffer=buffer):
+                self.assertIsNone(xml.find_body(buffer))
+
+    def test_split_body_into_whole_elements(self):
+        span, _ = self.get_span(self.filename)
+        with xml.open_buffer(self.filename) as buffer:
+            for size in [1, 200, 1 << 20]:
+                with self.subTest(size=size):
+                    chunks = xml.split_body(buffer, span.start, span.end, size)
+
+                    self.assertEqual(chunks[0][0], span.start)
+                    self.assertEqual(chunks[-1][1], span.end)
+                    for (_, end), (start, _) in zip(chunks, chunks[1:]):
+                        self.assertEqual(end, start)
+                    for start, end in chunks:
+                        etree.fromstring(span.head + buffer[start:end]
+                                         + span.tail)
+
+    def test_split_body_keeps_tables_whole(self):
+        span, content = self.get_span(self.filename)
+        chunks = xml.split_body(content, 0, len(content), size=1)
+
+        # Every entry, the table and then the w:sectPr.
+        self.assertEqual(len(chunks), len(self.ENTRIES) + 2)
+        self.assertEqual(content[slice(*chunks[-2])], self.TABLE.encode())
+
+
+class Test_AcceptChangesTarget(WordXMLTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.filename = cls.make_word_xml("revisions.xml",
+                                         body_extra=cls.REVISIONS)
+        cls.accepted_filename = cls.make_word_xml(
+            "accepted.xml", body_extra=cls.REVISIONS_ACCEPTED)
+
+    def test_accepts_snippet(self):
+        w = f"xmlns:w=\"{self.W_URI}\""
+        target = xml.AcceptChangesTarget()
+        snippet = self.REVISIONS.replace("<w:p>", f"<w:p {w}>", 1)
+        expected = etree.fromstring(
+            self.REVISIONS_ACCEPTED.replace("<w:p>", f"<w:p {w}>", 1))
+
+        result = etree.fromstring(snippet, etree.XMLParser(target=target))
+
+        self.assertEqual(etree.tostring(result), etree.tostring(expected))
+        self.assertEqual(target.accepted, 4)
+
+    def test_passes_other_targets_on(self):
+        w = f"xmlns:w=\"{self.W_URI}\""
+        snippet = f"<w:p {w}><!--c--><?pi x?><w:r><w:t>A</w:t></w:r></w:p>"
+        expected = etree.fromstring(snippet)
+
+        result = etree.fromstring(snippet, etree.XMLParser(
+            target=xml.AcceptChangesTarget(etree.TreeBuilder())))
+
+        self.assertEqual(etree.tostring(result), etree.tostring(expected))
+
+    def test_input_is_suitable_when_accepted(self):
+        for kwargs in [{}, {"prune": True}, {"builder": runs.RunsBuilder}]:
+            with self.subTest(**kwargs):
+                rejected = xml.XMLAsInput(**kwargs)
+                accepted = xml.XMLAsInput(accept_changes=True, **kwargs)
+
+                self.assertFalse(rejected.isSuitable(self.filename))
+                self.assertTrue(accepted.isSuitable(self.filename))
+
+    def test_same_tree_as_accepted_in_word(self):
+        for prune in (False, True):
+            with self.subTest(prune=prune):
+                input = xml.XMLAsInput(prune=prune, accept_changes=True)
+                input.isSuitable(self.filename, fatal=True)
+                expected = xml.XMLAsInput(prune=prune)
+                expected.isSuitable(self.accepted_filename, fatal=True)
+
+                result = [etree.tostring(p) for p in input.iter_paragraphs()]
+
+                self.assertEqual(result, [etree.tostring(p) for p
+                                          in expected.iter_paragraphs()])
+
+
+class Test_XMLAsInput_Triage(WordXMLTestCase):
+
+    TRACKCHANGES = ("<w:p><w:ins w:id=\"1\" w:author=\"Ian\"><w:r>"
+                    "<w:t>Inserted</w:t></w:r></w:ins></w:p>")
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        unknown = ("<pkg:part pkg:name=\"/word/foo.xml\"><pkg:xmlData>"
+                   "<foo:bar xmlns:foo=\"urn:foo\"/></pkg:xmlData></pkg:part>")
+        cls.filenames = {
+            xml.SUITABLE: cls.make_word_xml("triage_good.xml"),
+            xml.TRACKCHANGES: cls.make_word_xml(
+                "triage_tc.xml", body_extra=cls.TRACKCHANGES
+                + cls.make_paragraph_xml(cls.ENTRIES[0]) * 1000),
+            xml.UNSUITABLE: cls.make_word_xml("triage_ns.xml",
+                                              parts_extra=unknown)}
+        cls.malformed = os.path.join(cls.tempdir, "triage_malformed.xml")
+        with open(cls.filenames[xml.SUITABLE]) as handle:
+            content = handle.read()
+        with open(cls.malformed, "w") as handle:
+            handle.write(content[:len(content) // 2])
+
+    def test_same_verdict_as_isSuitable(self):
+        filenames = list(self.filenames.items())
+        filenames.append((xml.UNSUITABLE, self.malformed))
+        for expected, filename in filenames:
+            with self.subTest(filename=os.path.basename(filename)):
+                input = xml.XMLAsInput()
+
+                result = input.triage(filename)
+
+                self.assertEqual(result, expected)
+                self.assertEqual(input.isSuitable(filename),
+                                 expected == xml.SUITABLE)
+
+    def test_builds_no_tree(self):
+        with patch("lxml.etree.TreeBuilder") as mock_builder:
+            for filename in self.filenames.values():
+                xml.XMLAsInput().triage(filename)
+
+        mock_builder.return_value.start.assert_not_called()
+
+    def test_stops_at_first_revision_mark(self):
+        filename = self.filenames[xml.TRACKCHANGES]
+        self.assertGreater(os.path.getsize(filename), xml.SNIFF_SIZE * 2,
+                           msg="Precondition")
+
+        with patch.object(xml.TriageTarget, "start", autospec=True,
+                          side_effect=xml.TriageTarget.start) as mock_start:
+            result = xml.XMLAsInput().triage(filename)
+
+        elements = xml.load_tree(open(filename, "rb").read()).iter()
+        self.assertEqual(result, xml.TRACKCHANGES)
+        self.assertLess(mock_start.call_count, len(list(elements)) // 2)
+
+    def test_triage_files_in_parallel(self):
+        expected = [(f, v) for v, f in self.filenames.items()]
+        filenames = [f for f, _ in expected]
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                result = xml.triage_files(filenames, workers=workers)
+                self.assertEqual(result, expected)
+
+
+
+class Test_VerdictCache(WordXMLTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.good = cls.make_word_xml("verdict_good.xml")
+        cls.trackchanges = cls.make_word_xml("verdict_tc.xml",
+                                             body_extra=cls.REVISIONS)
+
+    def setUp(self):
+        self.filename = os.path.join(self.tempdir, "verdicts.json")
+        self.addCleanup(self.remove_cache)
+
+    def remove_cache(self):
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
+
+    def is_suitable(self, filename, fatal=None, **kwargs):
+        input = xml.XMLAsInput(verdict_cache=xml.VerdictCache(self.filename),
+                               **kwargs)
+        return input, input.isSuitable(filename, fatal=fatal)
+
+    def test_suitable_verdict_skips_battery(self):
+        self.is_suitable(self.good)
+
+        for prune in (False, True):
+            with self.subTest(prune=prune), \
+                    patch.object(xml.XMLAsInput, "_battery_test") as mock_test:
+                input, result = self.is_suitable(self.good, prune=prune)
+
+                mock_test.assert_not_called()
+                self.assertTrue(result)
+                self.assertEqual(len(list(input.iter_paragraphs())),
+                                 len(self.ENTRIES))
+
+    def test_negative_verdict_raises_unread(self):
+        self.assertFalse(self.is_suitable(self.trackchanges)[1])
+
+        with patch("helpers.xml.open_buffer") as mock_open:
+            with self.assertRaises(exceptions.InputFileTrackChangesError):
+                self.is_suitable(self.trackchanges, fatal=True)
+            self.assertFalse(self.is_suitable(self.trackchanges)[1])
+
+        mock_open.assert_not_called()
+
+    def test_verdicts_by_accept_changes(self):
+        cache = xml.VerdictCache(self.filename)
+        cache.set(self.trackchanges, xml.TRACKCHANGES)
+
+        self.assertEqual(cache.get(self.trackchanges), xml.TRACKCHANGES)
+        self.assertIsNone(cache.get(self.trackchanges, accept_changes=True))
+        self.assertTrue(self.is_suitable(self.trackchanges,
+                                         accept_changes=True)[1])
+        self.assertEqual(xml.VerdictCache(self.filename).get(
+            self.trackchanges, accept_changes=True), xml.SUITABLE)
+
+    def test_fingerprint(self):
+        filename = self.make_word_xml("verdict_changed.xml")
+        cache = xml.VerdictCache(self.filename)
+        cache.set(filename, xml.SUITABLE)
+        stat = os.stat(filename)
+
+        os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(cache.get(filename), xml.SUITABLE)
+        self.make_word_xml("verdict_changed.xml", body_extra=self.REVISIONS)
+        self.assertIsNone(cache.get(filename))
+
+    def test_same_size_and_mtime_skips_digest(self):
+        self.is_suitable(self.trackchanges)
+
+        with patch("helpers.xml.file_digest") as mock_digest:
+            with self.assertRaises(exceptions.InputFileTrackChangesError):
+                self.is_suitable(self.trackchanges, fatal=True)
+
+        mock_digest.assert_not_called()
+
+    def test_new_mtime_is_written_back(self):
+        filename = self.make_word_xml("verdict_touched.xml",
+                                      body_extra=self.REVISIONS)
+        cache = xml.VerdictCache(self.filename)
+        cache.set(filename, xml.TRACKCHANGES)
+        cache.dump()
+        stat = os.stat(filename)
+        os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertEqual(cache.get(filename), xml.TRACKCHANGES)
+        with patch("helpers.xml.file_digest") as mock_digest:
+            result = xml.VerdictCache(self.filename).get(filename)
+
+        mock_digest.assert_not_called()
+        self.assertEqual(result, xml.TRACKCHANGES)
+
+    def test_invalid_cache_is_empty(self):
+        for content in ("garbage", "[]", '{"version": 0, "files": {}}'):
+            with self.subTest(content=content):
+                with open(self.filename, "w") as handle:
+                    handle.write(content)
+
+                self.assertEqual(xml.VerdictCache(self.filename).entries, {})
+
+    def test_set_unknown_verdict_raises(self):
+        with self.assertRaises(ValueError):
+            xml.VerdictCache(self.filename).set(self.good, "maybe")
+
+
 if __name__ == '__main__':
     unittest.main()